@@ -1,5 +1,5 @@
 from flask import Flask, request, session, send_from_directory
-from .models import db
+from .models import db, Session
 from flask_migrate import Migrate
 from .config import DevelopmentConfig, ProductionConfig
 import os
@@ -10,6 +10,10 @@ import uuid
 from datetime import datetime, timedelta
 from flask.sessions import SessionInterface, SessionMixin
 from werkzeug.datastructures import CallbackDict
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .session_cache import CachedSession, get_session_cache
 
 class DatabaseSession(CallbackDict, SessionMixin):
     def __init__(self, initial=None, sid=None, permanent=False):
@@ -19,6 +23,7 @@ class DatabaseSession(CallbackDict, SessionMixin):
         self.sid = sid
         self.permanent = permanent
         self.modified = False
+        self.stored = None  # CachedSession read when the session was opened
 
 class DatabaseSessionInterface(SessionInterface):
     def __init__(self, app):
@@ -31,6 +36,7 @@ class DatabaseSessionInterface(SessionInterface):
         self.cookie_httponly = app.config.get('SESSION_COOKIE_HTTPONLY', True)
         self.cookie_samesite = app.config.get('SESSION_COOKIE_SAMESITE', 'None')
         self.max_age = app.config.get('SESSION_MAX_AGE', timedelta(days=31))
+        self.refresh_interval = app.config.get('SESSION_REFRESH_INTERVAL', 300)
 
     def open_session(self, app, request):
         sid = request.cookies.get(self.cookie_name)
@@ -38,37 +44,52 @@ class DatabaseSessionInterface(SessionInterface):
             sid = self._generate_sid()
             return DatabaseSession(sid=sid, permanent=self.permanent)
     
-        # Find session in database
-        from .models import db
-        session_record = db.session.execute(
-            db.text("SELECT * FROM session WHERE session_id = :sid"),
-            {"sid": sid}
-        ).fetchone()
-    
-        if not session_record:
+        cache = get_session_cache(app)
+        cached = cache.get(sid) if cache else None
+        if cached is not None and cache.needs_confirmation(cached):
+            # Another process may have rewritten or ended the session; every write moves the expiry
+            session_record = self._read(sid)
+            if session_record is not None and session_record.expiry == cached.expiry:
+                cache.confirmed(sid, cached)
+            else:
+                cache.reject(sid)
+                cached = self._decode(cache, sid, session_record)
+        elif cached is None:
+            # Find session in database
+            cached = self._decode(cache, sid, self._read(sid))
+        
+        if cached is None:
             return DatabaseSession(sid=sid, permanent=self.permanent)
-    
-        # Check if session has expired
-        # Handle both string and datetime types for expiry
-        expiry = session_record.expiry
-        if isinstance(expiry, str):
-            try:
-                expiry = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
-            except ValueError:
-                # If parsing fails, treat as expired
-                return DatabaseSession(sid=sid, permanent=self.permanent)
         
-        if expiry < datetime.utcnow():
+        # Check if session has expired
+        if cached.expiry < datetime.utcnow():
             return DatabaseSession(sid=sid, permanent=self.permanent)
     
-        # Load session data
+        # Sessions hold scalars, so a top-level copy keeps the cached values intact
+        session = DatabaseSession(dict(cached.values), sid=sid, permanent=self.permanent)
+        session.modified = False
+        session.stored = cached
+        return session
+
+    def _read(self, sid):
+        table = Session.__table__
+        return db.session.execute(
+            select(table.c.data, table.c.expiry).where(table.c.session_id == sid)
+        ).fetchone()
+
+    def _decode(self, cache, sid, session_record):
+        """The stored session as a ``CachedSession``, cached when caching is on; None if missing or unreadable."""
+        if session_record is None:
+            return None
         try:
-            session_data = json.loads(session_record.data)
-            session = DatabaseSession(session_data, sid=sid, permanent=self.permanent)
-            session.modified = False
-            return session
-        except (json.JSONDecodeError, KeyError):
-            return DatabaseSession(sid=sid, permanent=self.permanent)
+            values = json.loads(session_record.data)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        if not isinstance(values, dict):
+            return None
+        if cache:
+            cache.put(sid, session_record.data, values, session_record.expiry)
+        return CachedSession(session_record.data, values, session_record.expiry, 0)
 
     def save_session(self, app, session, response):
         domain = self.cookie_domain
@@ -81,28 +102,22 @@ class DatabaseSessionInterface(SessionInterface):
         else:
             expiry = datetime.utcnow() + timedelta(days=1)
         
-        # Save session to database
         session_data = json.dumps(dict(session))
         
-        from .models import db
-        # Check if session already exists
-        existing = db.session.execute(
-            db.text("SELECT id FROM session WHERE session_id = :sid"),
-            {"sid": session.sid}
-        ).fetchone()
-        
-        if existing:
-            db.session.execute(
-                db.text("UPDATE session SET data = :data, expiry = :expiry WHERE session_id = :sid"),
-                {"data": session_data, "expiry": expiry, "sid": session.sid}
-            )
+        # Unchanged data whose stored expiry is recent enough needs no write
+        cache = get_session_cache(app)
+        stored = getattr(session, 'stored', None)
+        if stored and stored.data == session_data and \
+                stored.expiry >= expiry - timedelta(seconds=self.refresh_interval):
+            expiry = stored.expiry
+            if cache:
+                cache.record_write(skipped=True)
         else:
-            db.session.execute(
-                db.text("INSERT INTO session (session_id, data, expiry) VALUES (:sid, :data, :expiry)"),
-                {"sid": session.sid, "data": session_data, "expiry": expiry}
-            )
-        
-        db.session.commit()
+            self._upsert(session.sid, session_data, expiry)
+            db.session.commit()
+            if cache:
+                cache.put(session.sid, session_data, json.loads(session_data), expiry)
+                cache.record_write(skipped=False)
         
         # Set cookie
         response.set_cookie(
@@ -117,6 +132,33 @@ class DatabaseSessionInterface(SessionInterface):
             samesite=self.cookie_samesite
         )
 
+    def end_session(self, session):
+        """Delete the session row; other processes notice on their next request for it.
+
+        Leaves committing to the caller.
+        """
+        table = Session.__table__
+        db.session.execute(table.delete().where(table.c.session_id == session.sid))
+        cache = get_session_cache(self.app)
+        if cache:
+            cache.discard(session.sid)
+
+    def _upsert(self, sid, data, expiry):
+        """Insert or update the session row in one statement where the database supports it."""
+        table = Session.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+            statement = dialect_insert(table).values(session_id=sid, data=data, expiry=expiry)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.session_id],
+                set_={'data': statement.excluded.data, 'expiry': statement.excluded.expiry},
+            ))
+        elif not db.session.execute(
+            table.update().where(table.c.session_id == sid).values(data=data, expiry=expiry)
+        ).rowcount:
+            db.session.execute(table.insert().values(session_id=sid, data=data, expiry=expiry))
+
     def _generate_sid(self):
         return str(uuid.uuid4())
 
@@ -190,8 +232,12 @@ def create_app(config=None):
     db.init_app(app)
     Migrate(app, db)
     
-    # Set up custom session interface
-    app.session_interface = DatabaseSessionInterface(app)
+    # Set up custom session interface: database rows or signed cookies
+    if app.config.get('SESSION_BACKEND', 'database') == 'signed':
+        from .signed_sessions import SignedSessionInterface
+        app.session_interface = SignedSessionInterface(app)
+    else:
+        app.session_interface = DatabaseSessionInterface(app)
     
     logging.basicConfig(level=logging.DEBUG)
     # Remove or comment out lines like:
@@ -199,6 +245,16 @@ def create_app(config=None):
     # But keep error logging and other non-session, non-login logs.
     from .routes import auth_bp
     app.register_blueprint(auth_bp)
+    from .grading import register_cli
+    register_cli(app)
+    from . import auth, dashboard_stats, leaderboard, messaging, question_cache, response_cache, session_reaper
+    auth.init_app(app)
+    dashboard_stats.init_app(app)
+    leaderboard.init_app(app)
+    messaging.init_app(app)
+    question_cache.init_app(app)
+    response_cache.init_app(app)
+    session_reaper.init_app(app)
     # Serve avatars
     @app.route('/uploads/avatars/<filename>')
     def uploaded_avatar(filename):
@@ -0,0 +1,283 @@
+"""
+Recruiter analytics queries for SmartRecruiter
+
+``GET /analytics/recruiter/summary`` reports on everything a recruiter owns:
+assessments and their attempts, interviews, practice problems and messages.
+Each section is one aggregate query (monthly trends are a ``GROUP BY`` over
+30-day buckets, per-assessment and per-category numbers are grouped joins),
+so memory use and the number of statements stay constant however long the
+recruiter's history is.
+
+An optional ``from``/``to`` window restricts activity to that period: attempts
+by ``started_at``, interviews and assessments by ``created_at``, practice
+attempts and messages by ``timestamp``. The trend buckets then end at ``to``.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, distinct, func, select, union
+
+from .models import (
+    db, Assessment, AssessmentAttempt, AssessmentQuestion, Category, Interview, Message,
+    PracticeProblem, PracticeProblemAttempt,
+)
+
+TREND_BUCKETS = 6
+BUCKET_DAYS = 30
+
+
+class InvalidAnalyticsQuery(ValueError):
+    """Raised for a malformed ``from``/``to`` window."""
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _average(total, count) -> float:
+    return round((total or 0) / count, 1) if count else 0
+
+
+def _parse_bound(value: Optional[str], name: str, end: bool = False) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise InvalidAnalyticsQuery(f'{name} must be an ISO 8601 date or datetime')
+    parsed = parsed.replace(tzinfo=None)
+    # A bare date as the upper bound includes that whole day
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def parse_window(args) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """``(start, end)`` from the ``from``/``to`` query parameters; either may be None."""
+    start = _parse_bound(args.get('from'), 'from')
+    end = _parse_bound(args.get('to'), 'to', end=True)
+    if start and end and start >= end:
+        raise InvalidAnalyticsQuery('from must be before to')
+    return start, end
+
+
+def _within(column, start, end):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
+
+
+def _trend_counts(column, conditions, anchor: datetime) -> Dict[int, int]:
+    """Rows per 30-day bucket; bucket ``i`` covers ``[anchor - 30i days, anchor - 30(i-1) days)``."""
+    starts = [anchor - timedelta(days=BUCKET_DAYS * i) for i in range(TREND_BUCKETS)]
+    bucket = case(*((column >= starts[i], i) for i in range(TREND_BUCKETS)))
+    rows = db.session.execute(
+        select(bucket.label('bucket'), func.count().label('total'))
+        .where(*conditions, column >= starts[-1], column < starts[0] + timedelta(days=BUCKET_DAYS))
+        .group_by(bucket)
+    )
+    return {row.bucket: row.total for row in rows}
+
+
+def recruiter_analytics(recruiter_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        now: Optional[datetime] = None) -> Dict:
+    """The full analytics summary for ``recruiter_id`` within the optional window."""
+    anchor = end or now or datetime.now()
+    owned = Assessment.recruiter_id == recruiter_id
+    attempt_window = _within(AssessmentAttempt.started_at, start, end)
+    interview_window = _within(Interview.created_at, start, end)
+
+    attempts = db.session.execute(
+        select(
+            func.count(AssessmentAttempt.id).label('total'),
+            _count_if(AssessmentAttempt.status == 'completed').label('completed'),
+            func.sum(AssessmentAttempt.score).label('score_sum'),
+        )
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .where(owned, *attempt_window)
+    ).one()
+    interviews = db.session.execute(
+        select(
+            func.count(Interview.id).label('total'),
+            _count_if(Interview.status == 'completed').label('completed'),
+        ).where(Interview.recruiter_id == recruiter_id, *interview_window)
+    ).one()
+    total_assessments = db.session.execute(
+        select(func.count(Assessment.id)).where(owned, *_within(Assessment.created_at, start, end))
+    ).scalar_one()
+    total_practice_problems = db.session.execute(
+        select(func.count(PracticeProblem.id)).where(PracticeProblem.recruiter_id == recruiter_id)
+    ).scalar_one()
+    practice = db.session.execute(
+        select(
+            func.count(PracticeProblemAttempt.id).label('total'),
+            _count_if(PracticeProblemAttempt.passed == True).label('passed'),
+            func.sum(PracticeProblemAttempt.score).label('score_sum'),
+        )
+        .join(PracticeProblem, PracticeProblem.id == PracticeProblemAttempt.problem_id)
+        .where(PracticeProblem.recruiter_id == recruiter_id,
+               *_within(PracticeProblemAttempt.timestamp, start, end))
+    ).one()
+    messages = db.session.execute(
+        select(
+            func.count(Message.id).label('total'),
+            _count_if((Message.receiver_id == recruiter_id) & (func.coalesce(Message.read, False) == False)).label('unread'),
+        ).where((Message.sender_id == recruiter_id) | (Message.receiver_id == recruiter_id),
+                *_within(Message.timestamp, start, end))
+    ).one()
+    candidates = union(
+        select(AssessmentAttempt.interviewee_id.label('user_id'))
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .where(owned, *attempt_window),
+        select(Interview.interviewee_id.label('user_id'))
+        .where(Interview.recruiter_id == recruiter_id, *interview_window),
+    ).subquery()
+    total_candidates = db.session.execute(select(func.count(distinct(candidates.c.user_id)))).scalar_one()
+
+    # Monthly trends
+    assessment_buckets = _trend_counts(
+        AssessmentAttempt.started_at,
+        [AssessmentAttempt.assessment_id.in_(select(Assessment.id).where(owned)), *attempt_window],
+        anchor,
+    )
+    interview_buckets = _trend_counts(
+        Interview.created_at, [Interview.recruiter_id == recruiter_id, *interview_window], anchor,
+    )
+    months = [(anchor - timedelta(days=BUCKET_DAYS * i)).strftime('%b %Y') for i in range(TREND_BUCKETS)]
+
+    # Top performing assessments
+    average = func.coalesce(func.sum(AssessmentAttempt.score), 0) / func.count(AssessmentAttempt.id)
+    top_rows = db.session.execute(
+        select(
+            Assessment.id,
+            Assessment.title,
+            Assessment.is_test,
+            func.count(AssessmentAttempt.id).label('total'),
+            _count_if(AssessmentAttempt.status == 'completed').label('completed'),
+            func.sum(AssessmentAttempt.score).label('score_sum'),
+        )
+        .join(AssessmentAttempt, AssessmentAttempt.assessment_id == Assessment.id)
+        .where(owned, *attempt_window)
+        .group_by(Assessment.id, Assessment.title, Assessment.is_test)
+        .order_by(average.desc(), Assessment.id)
+        .limit(5)
+    ).all()
+
+    # Category breakdown
+    assessments_per_category = (
+        select(Assessment.category_id, func.count(Assessment.id).label('assessments'))
+        .where(owned, *_within(Assessment.created_at, start, end))
+        .group_by(Assessment.category_id)
+        .subquery()
+    )
+    attempts_per_category = (
+        select(
+            Assessment.category_id,
+            func.count(AssessmentAttempt.id).label('attempts'),
+            func.sum(AssessmentAttempt.score).label('score_sum'),
+        )
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .where(owned, *attempt_window)
+        .group_by(Assessment.category_id)
+        .subquery()
+    )
+    category_rows = db.session.execute(
+        select(
+            Category.name,
+            func.coalesce(assessments_per_category.c.assessments, 0).label('assessments'),
+            attempts_per_category.c.attempts,
+            attempts_per_category.c.score_sum,
+        )
+        .join(attempts_per_category, attempts_per_category.c.category_id == Category.id)
+        .outerjoin(assessments_per_category, assessments_per_category.c.category_id == Category.id)
+        .where(Category.recruiter_id == recruiter_id)
+        .order_by(Category.id)
+    ).all()
+
+    # Recent activity
+    question_counts = (
+        select(AssessmentQuestion.assessment_id, func.count(AssessmentQuestion.id).label('questions'))
+        .group_by(AssessmentQuestion.assessment_id)
+        .subquery()
+    )
+    recent_assessments = db.session.execute(
+        select(
+            Assessment.id, Assessment.title, Assessment.created_at, Assessment.is_test,
+            func.coalesce(question_counts.c.questions, 0).label('questions'),
+        )
+        .outerjoin(question_counts, question_counts.c.assessment_id == Assessment.id)
+        .where(owned, *_within(Assessment.created_at, start, end))
+        .order_by(Assessment.id.desc())
+        .limit(5)
+    ).all()
+    recent_interviews = db.session.execute(
+        select(Interview.id, Interview.position, Interview.type, Interview.status, Interview.scheduled_at,
+               Interview.rating)
+        .where(Interview.recruiter_id == recruiter_id, *interview_window)
+        .order_by(Interview.id.desc())
+        .limit(5)
+    ).all()
+
+    return {
+        'overview': {
+            'total_assessments': total_assessments,
+            'total_attempts': attempts.total,
+            'completed_attempts': attempts.completed or 0,
+            'completion_rate': round(((attempts.completed or 0) / attempts.total * 100), 1) if attempts.total > 0 else 0,
+            'average_score': _average(attempts.score_sum, attempts.total),
+            'total_candidates': total_candidates,
+            'total_interviews': interviews.total,
+            'completed_interviews': interviews.completed or 0,
+            'interview_success_rate': round(((interviews.completed or 0) / interviews.total * 100), 1) if interviews.total > 0 else 0,
+            'total_practice_problems': total_practice_problems,
+            'total_practice_attempts': practice.total,
+            'completed_practice': practice.passed or 0,
+            'average_practice_score': _average(practice.score_sum, practice.total),
+            'total_messages': messages.total,
+            'unread_messages': messages.unread or 0
+        },
+        'trends': {
+            'months': months,
+            'assessment_trends': [assessment_buckets.get(i, 0) for i in range(TREND_BUCKETS)],
+            'interview_trends': [interview_buckets.get(i, 0) for i in range(TREND_BUCKETS)]
+        },
+        'top_assessments': [{
+            'id': row.id,
+            'title': row.title,
+            'total_attempts': row.total,
+            'completed_attempts': row.completed or 0,
+            'average_score': _average(row.score_sum, row.total),
+            'type': 'test' if row.is_test else 'regular'
+        } for row in top_rows],
+        'category_breakdown': [{
+            'name': row.name,
+            'total_assessments': row.assessments,
+            'total_attempts': row.attempts,
+            'average_score': _average(row.score_sum, row.attempts)
+        } for row in category_rows],
+        'recent_activity': {
+            'recent_assessments': [{
+                'id': row.id,
+                'title': row.title,
+                'created_at': row.created_at.isoformat(),
+                'total_questions': row.questions,
+                'is_test': row.is_test
+            } for row in reversed(recent_assessments)],
+            'recent_interviews': [{
+                'id': row.id,
+                'position': row.position,
+                'type': row.type,
+                'status': row.status,
+                'scheduled_at': row.scheduled_at.isoformat() + 'Z',
+                'rating': row.rating
+            } for row in reversed(recent_interviews)]
+        },
+        'window': {
+            'from': start.isoformat() if start else None,
+            'to': end.isoformat() if end else None
+        }
+    }
@@ -0,0 +1,237 @@
+"""
+Assessment listing queries for SmartRecruiter
+
+``GET /assessments`` shows attempt and invitation counters for every
+assessment of a recruiter. ``assessment_counters`` computes them for a whole
+set of assessments with one GROUP BY query per table, so the number of SQL
+statements does not grow with the number of assessments. With
+``fields=summary`` the listing leaves out question bodies and reports
+``question_count`` from ``question_counts`` instead.
+
+``delete_assessments`` removes assessments with everything that hangs off
+them (questions, attempts, answers, reviews, feedback, grading jobs and
+invitations) in a fixed number of set-based DELETE statements, however many
+attempts there are.
+
+``sync_questions`` applies the question list of ``PUT /assessments/<id>`` as
+a diff: each question is compared by a hash of its stored fields, only the
+fields that differ are written, and removed questions are checked for
+answers with a single query.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, select, update
+
+from . import dashboard_stats, leaderboard
+from .models import (
+    db, Assessment, AssessmentAttempt, AssessmentAttemptAnswer, AssessmentFeedback, AssessmentInvitation,
+    AssessmentQuestion, AssessmentReview, AssessmentReviewAnswer, CandidateFeedback, CodeEvaluationResult,
+    GradingJob, Interview,
+)
+from .question_cache import parsed_question
+
+# Largest id list POST /assessments/bulk-delete accepts in one request
+MAX_BULK_DELETE = 500
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def assessment_counters(assessment_ids: Iterable[int]) -> Dict[int, Dict]:
+    """Attempt and invitation counts per assessment id; missing ids count zero."""
+    assessment_ids = list(assessment_ids)
+    counters = defaultdict(lambda: {
+        'total_attempts': 0,
+        'completed_attempts': 0,
+        'total_invitations': 0,
+        'accepted_invitations': 0,
+        'pending_invitations': 0,
+    })
+    if not assessment_ids:
+        return counters
+    for assessment_id, total, completed in db.session.execute(
+        select(
+            AssessmentAttempt.assessment_id,
+            func.count(AssessmentAttempt.id),
+            _count_if(AssessmentAttempt.status == 'completed'),
+        )
+        .where(AssessmentAttempt.assessment_id.in_(assessment_ids))
+        .group_by(AssessmentAttempt.assessment_id)
+    ):
+        counters[assessment_id].update(total_attempts=total, completed_attempts=completed or 0)
+    now = datetime.utcnow()
+    for assessment_id, total, accepted, pending in db.session.execute(
+        select(
+            AssessmentInvitation.assessment_id,
+            func.count(AssessmentInvitation.id),
+            _count_if(AssessmentInvitation.status == 'accepted'),
+            _count_if((AssessmentInvitation.status == 'sent') & (AssessmentInvitation.expires_at > now)),
+        )
+        .where(AssessmentInvitation.assessment_id.in_(assessment_ids))
+        .group_by(AssessmentInvitation.assessment_id)
+    ):
+        counters[assessment_id].update(total_invitations=total, accepted_invitations=accepted or 0,
+                                       pending_invitations=pending or 0)
+    return counters
+
+
+def question_counts(assessment_ids: Iterable[int]) -> Dict[int, int]:
+    """Number of questions per assessment id."""
+    assessment_ids = list(assessment_ids)
+    if not assessment_ids:
+        return {}
+    return dict(db.session.execute(
+        select(AssessmentQuestion.assessment_id, func.count(AssessmentQuestion.id))
+        .where(AssessmentQuestion.assessment_id.in_(assessment_ids))
+        .group_by(AssessmentQuestion.assessment_id)
+    ).all())
+
+
+def question_to_dict(q: AssessmentQuestion) -> Dict:
+    parsed = parsed_question(q)
+    return {
+        'id': q.id,
+        'type': q.type,
+        'question': q.question,
+        'options': parsed.options,
+        'correct_answer': parsed.correct_answer,
+        'points': q.points,
+        'explanation': q.explanation,
+        'starter_code': q.starter_code,
+        'solution': q.solution,
+        'answer': q.answer,
+        'test_cases': q.test_cases,  # PATCH: include test_cases for coding questions
+    }
+
+
+QUESTION_FIELDS = (
+    'type', 'question', 'options', 'correct_answer', 'points', 'explanation',
+    'starter_code', 'solution', 'answer', 'test_cases',
+)
+
+
+def question_fields(data: Dict, current: Optional[AssessmentQuestion] = None) -> Dict:
+    """Column values for an incoming question, falling back to ``current`` for fields left out."""
+    def keep(field, key=None):
+        return data.get(key or field, getattr(current, field) if current is not None else None)
+    return {
+        'type': keep('type'),
+        'question': keep('question'),
+        'options': json.dumps(data.get('options')) if data.get('options') else None,
+        'correct_answer': json.dumps(data.get('correctAnswer')) if data.get('correctAnswer') is not None else None,
+        'points': keep('points'),
+        'explanation': keep('explanation'),
+        'starter_code': keep('starter_code'),
+        'solution': keep('solution'),
+        'answer': keep('answer'),
+        'test_cases': data.get('test_cases') if data.get('type') == 'coding' else None,
+    }
+
+
+def question_hash(fields: Dict) -> str:
+    payload = json.dumps([fields.get(name) for name in QUESTION_FIELDS], separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sync_questions(assessment: Assessment, incoming: List[Dict]) -> Dict[str, List[int]]:
+    """Bring ``assessment.questions`` in line with ``incoming``; returns the ids per outcome.
+
+    Incoming questions with the id of one of the assessment's questions
+    update it and the rest are added. Questions missing from ``incoming`` are
+    removed unless a candidate has answered them, in which case they are
+    kept so the submissions stay intact. Leaves committing to the caller.
+    """
+    existing = {q.id: q for q in assessment.questions}
+    summary = {'added': [], 'updated': [], 'unchanged': [], 'removed': [], 'kept': []}
+    added = []
+    seen = set()
+    for data in incoming:
+        question = existing.get(data.get('id'))
+        if question is None:
+            question = AssessmentQuestion(assessment_id=assessment.id, **question_fields(data))
+            db.session.add(question)
+            added.append(question)
+            continue
+        seen.add(question.id)
+        fields = question_fields(data, question)
+        current = {name: getattr(question, name) for name in QUESTION_FIELDS}
+        if question_hash(fields) == question_hash(current):
+            summary['unchanged'].append(question.id)
+            continue
+        for name, value in fields.items():
+            if value != current[name]:
+                setattr(question, name, value)
+        summary['updated'].append(question.id)
+
+    removed = [qid for qid in existing if qid not in seen]
+    answered = set()
+    if removed:
+        answered = set(db.session.execute(
+            select(AssessmentAttemptAnswer.question_id)
+            .where(AssessmentAttemptAnswer.question_id.in_(removed))
+            .distinct()
+        ).scalars())
+    for qid in removed:
+        if qid in answered:
+            summary['kept'].append(qid)
+        else:
+            db.session.delete(existing[qid])
+            summary['removed'].append(qid)
+
+    db.session.flush()
+    summary['added'] = [question.id for question in added]
+    return summary
+
+
+def delete_assessments(assessment_ids: Iterable[int]) -> int:
+    """Delete assessments and their dependent rows; returns the number of assessments removed.
+
+    Runs in the caller's transaction and leaves committing to the caller.
+    Interviews keep their row with ``assessment_id`` cleared. The bulk
+    statements bypass the flush hooks, so the dashboard stats of the owning
+    recruiters and the leaderboard entries of affected candidates are
+    recomputed here.
+    """
+    assessment_ids = list(assessment_ids)
+    if not assessment_ids:
+        return 0
+    session = db.session
+    recruiter_ids = session.execute(
+        select(Assessment.recruiter_id).where(Assessment.id.in_(assessment_ids)).distinct()
+    ).scalars().all()
+    interviewee_ids = session.execute(
+        select(AssessmentAttempt.interviewee_id).where(AssessmentAttempt.assessment_id.in_(assessment_ids)).distinct()
+    ).scalars().all()
+
+    attempts = select(AssessmentAttempt.id).where(AssessmentAttempt.assessment_id.in_(assessment_ids))
+    answers = select(AssessmentAttemptAnswer.id).where(AssessmentAttemptAnswer.attempt_id.in_(attempts))
+    reviews = select(AssessmentReview.id).where(AssessmentReview.attempt_id.in_(attempts))
+    # Children before parents, so foreign keys hold after every statement
+    for statement in (
+        delete(AssessmentReviewAnswer).where(AssessmentReviewAnswer.review_id.in_(reviews)),
+        delete(AssessmentReview).where(AssessmentReview.attempt_id.in_(attempts)),
+        delete(CandidateFeedback).where(CandidateFeedback.attempt_id.in_(attempts)),
+        delete(CodeEvaluationResult).where(CodeEvaluationResult.attempt_answer_id.in_(answers)),
+        delete(GradingJob).where(GradingJob.attempt_answer_id.in_(answers)),
+        delete(AssessmentAttemptAnswer).where(AssessmentAttemptAnswer.attempt_id.in_(attempts)),
+        delete(AssessmentAttempt).where(AssessmentAttempt.assessment_id.in_(assessment_ids)),
+        delete(AssessmentFeedback).where(AssessmentFeedback.assessment_id.in_(assessment_ids)),
+        delete(AssessmentInvitation).where(AssessmentInvitation.assessment_id.in_(assessment_ids)),
+        update(Interview).where(Interview.assessment_id.in_(assessment_ids)).values(assessment_id=None),
+        delete(AssessmentQuestion).where(AssessmentQuestion.assessment_id.in_(assessment_ids)),
+    ):
+        session.execute(statement.execution_options(synchronize_session=False))
+    deleted = session.execute(
+        delete(Assessment).where(Assessment.id.in_(assessment_ids)).execution_options(synchronize_session=False)
+    ).rowcount
+
+    connection = session.connection()
+    dashboard_stats.rebuild(connection, recruiter_ids)
+    leaderboard.refresh(connection, interviewee_ids)
+    return deleted
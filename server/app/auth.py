@@ -0,0 +1,74 @@
+"""
+Request-scoped authentication helpers for SmartRecruiter
+
+``current_user()`` loads the signed-in user once per request, together with
+their interviewee or recruiter profile, and keeps it on ``flask.g``. Routes
+and helpers can call it as often as they like without another query.
+
+``login_required`` and ``role_required`` replace the per-route preamble
+(session check, ``User.query.get``, role check) and keep its responses:
+401 without a session, 404 when the session's user no longer exists, and
+403 with the route's own message for the wrong role. CORS preflight
+(``OPTIONS``) requests pass straight through to the view.
+
+The cached user is dropped when the request ends, because ``g`` lives on the
+app context, and an app context that is already active (as in tests or CLI
+commands) is shared by the requests it serves.
+"""
+
+import functools
+from typing import Optional
+
+from flask import g, jsonify, request, session
+from sqlalchemy.orm import joinedload
+
+from .models import User
+
+
+def current_user() -> Optional[User]:
+    """The signed-in user with their role profile loaded, or None."""
+    if '_current_user' not in g:
+        user_id = session.get('user_id')
+        g._current_user = User.query.options(
+            joinedload(User.interviewee_profile),
+            joinedload(User.recruiter_profile),
+        ).filter_by(id=user_id).first() if user_id else None
+    return g._current_user
+
+
+def login_required(view):
+    """Require a signed-in user that still exists."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'OPTIONS':
+            if not session.get('user_id'):
+                return jsonify({'error': 'Not authenticated'}), 401
+            if current_user() is None:
+                return jsonify({'error': 'User not found'}), 404
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def role_required(role: str, error: str = 'Unauthorized'):
+    """Require a signed-in user with ``role``; others get a 403 carrying ``error``."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'OPTIONS':
+                if not session.get('user_id'):
+                    return jsonify({'error': 'Not authenticated'}), 401
+                user = current_user()
+                if user is None or user.role != role:
+                    return jsonify({'error': error}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _forget_current_user(exc=None):
+    g.pop('_current_user', None)
+
+
+def init_app(app):
+    """Drop the cached user at the end of every request."""
+    app.teardown_request(_forget_current_user)
@@ -0,0 +1,425 @@
+"""
+Candidate listing queries for SmartRecruiter
+
+``GET /candidates`` summarises every interviewee's assessments, test
+assessments, interviews and practice problems. Everything here works on a
+set of interviewee ids at once: one GROUP BY query per activity table for the
+summary numbers and one query per table for the detail rows, so the number of
+SQL statements does not grow with the number of candidates.
+
+``page_candidates`` serves the paged form of the listing: the same summary
+fields are expressed in SQL so filters and sorting run in the database, and
+keyset cursors keep each page as cheap as the first.
+"""
+
+import base64
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List
+
+from sqlalchemy import Float, Numeric, and_, case, cast, func, or_, select
+
+from .models import db, User, IntervieweeProfile, Assessment, AssessmentAttempt, Interview, PracticeProblemAttempt
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _sum_if(condition, column):
+    return func.sum(case((condition, func.coalesce(column, 0)), else_=0))
+
+
+def _average(total, count) -> float:
+    return round((total or 0) / count, 1) if count else 0
+
+
+def interviewee_ids():
+    """Subquery of every interviewee id, for scoping the aggregate queries."""
+    return select(User.id).where(User.role == 'interviewee')
+
+
+def candidate_rows(user_ids=None) -> List:
+    """``(User, IntervieweeProfile)`` pairs for interviewees that have a profile."""
+    query = db.session.query(User, IntervieweeProfile).join(
+        IntervieweeProfile, IntervieweeProfile.user_id == User.id
+    ).filter(User.role == 'interviewee')
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+    return query.order_by(User.id).all()
+
+
+def _attempt_stats_query():
+    completed = AssessmentAttempt.status == 'completed'
+    is_test = Assessment.is_test == True
+    test_completed = and_(is_test, completed)
+    return db.session.query(
+        AssessmentAttempt.interviewee_id.label('user_id'),
+        func.count(AssessmentAttempt.id).label('total'),
+        _count_if(completed).label('completed'),
+        _sum_if(completed, AssessmentAttempt.score).label('completed_score'),
+        _count_if(is_test).label('test_total'),
+        _count_if(test_completed).label('test_completed'),
+        _sum_if(test_completed, AssessmentAttempt.score).label('test_completed_score'),
+        func.max(AssessmentAttempt.started_at).label('last_started'),
+    ).outerjoin(
+        Assessment, Assessment.id == AssessmentAttempt.assessment_id
+    ).group_by(AssessmentAttempt.interviewee_id)
+
+
+def _interview_stats_query():
+    completed = Interview.status == 'completed'
+    return db.session.query(
+        Interview.interviewee_id.label('user_id'),
+        func.count(Interview.id).label('total'),
+        _count_if(completed).label('completed'),
+        _count_if(Interview.status == 'scheduled').label('scheduled'),
+        _count_if(Interview.status == 'cancelled').label('cancelled'),
+        _sum_if(completed, Interview.rating).label('completed_rating'),
+        func.max(Interview.created_at).label('last_created'),
+    ).group_by(Interview.interviewee_id)
+
+
+def _practice_stats_query():
+    passed = PracticeProblemAttempt.passed == True
+    return db.session.query(
+        PracticeProblemAttempt.user_id.label('user_id'),
+        func.count(PracticeProblemAttempt.id).label('total'),
+        _count_if(passed).label('completed'),
+        _sum_if(passed, PracticeProblemAttempt.score).label('completed_score'),
+    ).group_by(PracticeProblemAttempt.user_id)
+
+
+def attempt_stats(user_ids) -> Dict[int, object]:
+    rows = _attempt_stats_query().filter(AssessmentAttempt.interviewee_id.in_(user_ids)).all()
+    return {row.user_id: row for row in rows}
+
+
+def interview_stats(user_ids) -> Dict[int, object]:
+    rows = _interview_stats_query().filter(Interview.interviewee_id.in_(user_ids)).all()
+    return {row.user_id: row for row in rows}
+
+
+def practice_stats(user_ids) -> Dict[int, object]:
+    rows = _practice_stats_query().filter(PracticeProblemAttempt.user_id.in_(user_ids)).all()
+    return {row.user_id: row for row in rows}
+
+
+def attempt_details(user_ids) -> Dict[int, List[Dict]]:
+    rows = db.session.query(AssessmentAttempt, Assessment.title, Assessment.is_test).outerjoin(
+        Assessment, Assessment.id == AssessmentAttempt.assessment_id
+    ).filter(
+        AssessmentAttempt.interviewee_id.in_(user_ids)
+    ).order_by(AssessmentAttempt.id).all()
+    details = defaultdict(list)
+    for attempt, title, is_test in rows:
+        details[attempt.interviewee_id].append({
+            'id': attempt.id,
+            'assessment_title': title,
+            'score': attempt.score,
+            'status': attempt.status,
+            'completed_at': attempt.completed_at.isoformat() if attempt.completed_at else None,
+            'is_test': bool(is_test),
+        })
+    return details
+
+
+def interview_details(user_ids) -> Dict[int, List[Dict]]:
+    interviews = Interview.query.filter(Interview.interviewee_id.in_(user_ids)).order_by(Interview.id).all()
+    details = defaultdict(list)
+    for i in interviews:
+        details[i.interviewee_id].append({
+            'id': i.id,
+            'position': i.position,
+            'type': i.type,
+            'status': i.status,
+            'scheduled_at': i.scheduled_at.isoformat() + 'Z',
+            'rating': i.rating,
+            'feedback': i.feedback
+        })
+    return details
+
+
+def _split_details(attempts: List[Dict], interviews: List[Dict]) -> Dict[str, List[Dict]]:
+    return {
+        'assessments': [{k: v for k, v in d.items() if k != 'is_test'} for d in attempts],
+        'test_assessments': [{k: v for k, v in d.items() if k != 'is_test'} for d in attempts if d['is_test']],
+        'interviews': interviews,
+    }
+
+
+def build_candidates(rows, include_details: bool = True, scope=None) -> List[Dict]:
+    """Serialize ``candidate_rows()`` output in the ``GET /candidates`` shape.
+
+    ``scope`` limits the aggregate queries; it defaults to the ids in ``rows``.
+    Pass ``interviewee_ids()`` when ``rows`` is every candidate, to avoid a
+    huge ``IN`` list.
+    """
+    if not rows:
+        return []
+    user_ids = scope if scope is not None else [user.id for user, _ in rows]
+    attempts = attempt_stats(user_ids)
+    interviews = interview_stats(user_ids)
+    practice = practice_stats(user_ids)
+    if include_details:
+        attempt_rows = attempt_details(user_ids)
+        interview_rows = interview_details(user_ids)
+    candidates = []
+    for interviewee, profile in rows:
+        a = attempts.get(interviewee.id)
+        i = interviews.get(interviewee.id)
+        p = practice.get(interviewee.id)
+        assessment_avg = _average(a.completed_score, a.completed) if a else 0
+        test_avg = _average(a.test_completed_score, a.test_completed) if a else 0
+        practice_avg = _average(p.completed_score, p.completed) if p else 0
+        completed_interviews = i.completed if i else 0
+
+        # Determine candidate status
+        status = 'applied'
+        if completed_interviews:
+            status = 'interviewed'
+        elif a and (a.completed or a.test_completed):
+            status = 'in-review'
+        if assessment_avg >= 80 or test_avg >= 80:
+            status = 'shortlisted'
+
+        last_activity = interviewee.created_at
+        for candidate_time in (a.last_started if a else None, i.last_created if i else None):
+            if candidate_time and candidate_time > last_activity:
+                last_activity = candidate_time
+
+        candidate = {
+            'id': interviewee.id,
+            'email': interviewee.email,
+            'first_name': profile.first_name,
+            'last_name': profile.last_name,
+            'full_name': f"{profile.first_name} {profile.last_name}",
+            'position': profile.position,
+            'company': profile.company,
+            'location': profile.location,
+            'phone': profile.phone,
+            'skills': profile.skills.split(',') if profile.skills else [],
+            'avatar': profile.avatar,
+            'bio': profile.bio,
+            'linkedin_url': profile.linkedin,
+            'github_url': profile.github,
+            'portfolio_url': profile.website,
+            'created_at': interviewee.created_at.isoformat(),
+            'last_activity': last_activity.isoformat(),
+            'status': status,
+            'assessments': {
+                'completed': a.completed if a else 0,
+                'total': a.total if a else 0,
+                'average_score': assessment_avg,
+            },
+            'test_assessments': {
+                'completed': a.test_completed if a else 0,
+                'total': a.test_total if a else 0,
+                'average_score': test_avg,
+            },
+            'interviews': {
+                'total': i.total if i else 0,
+                'completed': completed_interviews,
+                'scheduled': i.scheduled if i else 0,
+                'cancelled': i.cancelled if i else 0,
+            },
+            'practice_problems': {
+                'completed': p.completed if p else 0,
+                'total': p.total if p else 0,
+                'average_score': practice_avg
+            },
+            'overall_score': round((assessment_avg + test_avg + practice_avg) / 3, 0) if (assessment_avg + test_avg + practice_avg) > 0 else 0,
+            'rating': (i.completed_rating or 0) / completed_interviews if completed_interviews else 0
+        }
+        if include_details:
+            details = _split_details(attempt_rows.get(interviewee.id, []), interview_rows.get(interviewee.id, []))
+            for key, rows_for_key in details.items():
+                candidate[key]['details'] = rows_for_key
+        candidates.append(candidate)
+    return candidates
+
+
+# --- Paged listing ---
+
+SORT_KEYS = ('last_activity', 'score', 'name', 'created_at')
+STATUSES = ('applied', 'in-review', 'interviewed', 'shortlisted')
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+# Any of these switches GET /candidates from the full list to a page
+CANDIDATE_LIST_PARAMS = (
+    'limit', 'cursor', 'sort', 'order', 'status', 'min_score', 'max_score',
+    'skills', 'active_since', 'active_before', 'q', 'include',
+)
+
+
+class InvalidCandidateQuery(ValueError):
+    """A filter, sort or cursor parameter could not be used."""
+
+
+def _rounded_average(total, count, digits: int = 1):
+    average = case((func.coalesce(count, 0) > 0, cast(total, Float) / count), else_=0)
+    return func.round(cast(average, Numeric), digits)
+
+
+def _later(first, second):
+    return case((first > second, first), else_=second)
+
+
+def candidate_columns():
+    """SQL expressions for the computed fields the listing filters and sorts on.
+
+    They mirror ``build_candidates``: rounded averages, the derived status and
+    the latest of sign-up, attempt start and interview creation.
+    """
+    a = _attempt_stats_query().subquery()
+    i = _interview_stats_query().subquery()
+    p = _practice_stats_query().subquery()
+    assessment_avg = _rounded_average(a.c.completed_score, a.c.completed)
+    test_avg = _rounded_average(a.c.test_completed_score, a.c.test_completed)
+    practice_avg = _rounded_average(p.c.completed_score, p.c.completed)
+    overall = func.round(cast((assessment_avg + test_avg + practice_avg) / 3, Numeric), 0)
+    status = case(
+        (or_(assessment_avg >= 80, test_avg >= 80), 'shortlisted'),
+        (func.coalesce(i.c.completed, 0) > 0, 'interviewed'),
+        (or_(func.coalesce(a.c.completed, 0) > 0, func.coalesce(a.c.test_completed, 0) > 0), 'in-review'),
+        else_='applied',
+    )
+    last_activity = _later(
+        func.coalesce(i.c.last_created, User.created_at),
+        _later(func.coalesce(a.c.last_started, User.created_at), User.created_at),
+    )
+    return {
+        'subqueries': (a, i, p),
+        'score': overall,
+        'status': status,
+        'last_activity': last_activity,
+        'name': func.lower(IntervieweeProfile.first_name + ' ' + IntervieweeProfile.last_name),
+        'created_at': User.created_at,
+    }
+
+
+def _parse_datetime(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise InvalidCandidateQuery(f'Invalid {name}')
+    # Timestamps are stored as naive UTC
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def _parse_float(value: str, name: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise InvalidCandidateQuery(f'Invalid {name}')
+
+
+def encode_cursor(sort: str, order: str, value, user_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = float(value)
+    payload = json.dumps({'s': sort, 'o': order, 'v': value, 'id': user_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str, order: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, user_id = payload['v'], int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCandidateQuery('Invalid cursor')
+    if payload.get('s') != sort or payload.get('o') != order:
+        raise InvalidCandidateQuery('Cursor does not match sort order')
+    if sort in ('last_activity', 'created_at'):
+        value = _parse_datetime(value, 'cursor')
+    return value, user_id
+
+
+def page_candidates(args) -> Dict:
+    """One page of candidates for the query-string ``args`` of ``GET /candidates``.
+
+    Supports ``status`` (comma separated), ``min_score``/``max_score`` (overall
+    score), ``skills`` (comma separated, all must match), ``active_since``/
+    ``active_before`` (ISO timestamps on last activity), ``q`` (name, email or
+    position), ``sort`` (``last_activity``, ``score``, ``name``, ``created_at``),
+    ``order``, ``limit`` and an opaque ``cursor`` from the previous page.
+    Detail arrays are only included with ``include=details``.
+    """
+    sort = args.get('sort', 'last_activity')
+    if sort not in SORT_KEYS:
+        raise InvalidCandidateQuery(f'sort must be one of: {", ".join(SORT_KEYS)}')
+    order = args.get('order', 'asc' if sort == 'name' else 'desc')
+    if order not in ('asc', 'desc'):
+        raise InvalidCandidateQuery('order must be asc or desc')
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise InvalidCandidateQuery('Invalid limit')
+
+    columns = candidate_columns()
+    a, i, p = columns['subqueries']
+    sort_column = columns[sort].label('sort_value')
+    query = db.session.query(User, IntervieweeProfile, sort_column).join(
+        IntervieweeProfile, IntervieweeProfile.user_id == User.id
+    ).outerjoin(a, a.c.user_id == User.id).outerjoin(
+        i, i.c.user_id == User.id
+    ).outerjoin(p, p.c.user_id == User.id).filter(User.role == 'interviewee')
+
+    if args.get('status'):
+        statuses = [s.strip() for s in args['status'].split(',') if s.strip()]
+        unknown = set(statuses) - set(STATUSES)
+        if unknown:
+            raise InvalidCandidateQuery(f'Unknown status: {", ".join(sorted(unknown))}')
+        query = query.filter(columns['status'].in_(statuses))
+    if args.get('min_score') is not None:
+        query = query.filter(columns['score'] >= _parse_float(args['min_score'], 'min_score'))
+    if args.get('max_score') is not None:
+        query = query.filter(columns['score'] <= _parse_float(args['max_score'], 'max_score'))
+    for skill in (args.get('skills') or '').split(','):
+        if skill.strip():
+            query = query.filter(IntervieweeProfile.skills.ilike(f'%{skill.strip()}%'))
+    if args.get('active_since'):
+        query = query.filter(columns['last_activity'] >= _parse_datetime(args['active_since'], 'active_since'))
+    if args.get('active_before'):
+        query = query.filter(columns['last_activity'] < _parse_datetime(args['active_before'], 'active_before'))
+    if args.get('q'):
+        term = f"%{args['q'].strip()}%"
+        query = query.filter(or_(
+            (IntervieweeProfile.first_name + ' ' + IntervieweeProfile.last_name).ilike(term),
+            User.email.ilike(term),
+            IntervieweeProfile.position.ilike(term),
+        ))
+
+    sort_expr = columns[sort]
+    if args.get('cursor'):
+        value, last_id = decode_cursor(args['cursor'], sort, order)
+        if order == 'desc':
+            query = query.filter(or_(sort_expr < value, and_(sort_expr == value, User.id < last_id)))
+        else:
+            query = query.filter(or_(sort_expr > value, and_(sort_expr == value, User.id > last_id)))
+    if order == 'desc':
+        query = query.order_by(sort_expr.desc(), User.id.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), User.id.asc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last_user, _, last_value = rows[-1]
+        next_cursor = encode_cursor(sort, order, last_value, last_user.id)
+    include_details = 'details' in (args.get('include') or '').split(',')
+    return {
+        'candidates': build_candidates([(user, profile) for user, profile, _ in rows], include_details=include_details),
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
+
+
+def candidate_details(user_id: int) -> Dict:
+    """Detail arrays for one candidate, loaded on demand by the listing."""
+    return _split_details(attempt_details([user_id]).get(user_id, []), interview_details([user_id]).get(user_id, []))
@@ -51,12 +51,68 @@ class Config:
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
+    # Session storage: 'database' (session table) or 'signed' (signed cookie + revocation denylist)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'database')
+    SESSION_DENYLIST_REFRESH = int(os.environ.get('SESSION_DENYLIST_REFRESH', 5))  # seconds
+    # How far each denylist refresh reaches back, and how often the whole list is reloaded
+    SESSION_DENYLIST_OVERLAP = int(os.environ.get('SESSION_DENYLIST_OVERLAP', 60))  # seconds
+    SESSION_DENYLIST_FULL_SYNC = int(os.environ.get('SESSION_DENYLIST_FULL_SYNC', 300))  # seconds
+    # Write-through session cache for the session table (per process). Hits are
+    # re-checked against the row's expiry once they are CONFIRM_AFTER seconds
+    # old, so a logout in another process takes effect within that window
+    SESSION_CACHE_ENABLED = os.environ.get('SESSION_CACHE_ENABLED', 'false').lower() == 'true'
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 60))  # seconds
+    SESSION_CACHE_CONFIRM_AFTER = float(os.environ.get('SESSION_CACHE_CONFIRM_AFTER', 5))  # seconds; 0 = every hit
+    # An unchanged session's stored expiry is only pushed forward once it is this stale
+    SESSION_REFRESH_INTERVAL = int(os.environ.get('SESSION_REFRESH_INTERVAL', 300))  # seconds
+    # Expired session cleanup: `flask purge-sessions`, or every N seconds in-process (0 = off)
+    SESSION_REAPER_INTERVAL = int(os.environ.get('SESSION_REAPER_INTERVAL', 0))
+    SESSION_REAPER_BATCH_SIZE = int(os.environ.get('SESSION_REAPER_BATCH_SIZE', 1000))
     
     # Frontend URL configuration
     FRONTEND_URL = os.environ.get('FRONTEND_URL') or 'http://localhost:5173'
     
     # CORS configuration
     CORS_ORIGINS = get_cors_origins()
+    
+    # Code execution sandbox (warm node/python3 worker pool for /run-code)
+    SANDBOX_POOL_ENABLED = os.environ.get('SANDBOX_POOL_ENABLED', 'true').lower() == 'true'
+    SANDBOX_WORKERS_PER_LANGUAGE = int(os.environ.get('SANDBOX_WORKERS_PER_LANGUAGE', 2))
+    SANDBOX_MAX_JOBS_PER_WORKER = int(os.environ.get('SANDBOX_MAX_JOBS_PER_WORKER', 200))
+    SANDBOX_TIMEOUT = 5  # seconds per test case
+    # Workers one submission's test cases are spread over (1 = a single batch)
+    SANDBOX_PARALLEL_CASES = int(os.environ.get('SANDBOX_PARALLEL_CASES', 1))
+    # Batches allowed to execute at once across all submissions and languages
+    SANDBOX_MAX_CONCURRENCY = int(os.environ.get('SANDBOX_MAX_CONCURRENCY', os.cpu_count() or 2))
+    
+    # Grading result cache: identical code + language + test cases skip the sandbox
+    GRADING_CACHE_ENABLED = os.environ.get('GRADING_CACHE_ENABLED', 'true').lower() == 'true'
+    GRADING_CACHE_SIZE = int(os.environ.get('GRADING_CACHE_SIZE', 1024))
+    GRADING_CACHE_TTL = int(os.environ.get('GRADING_CACHE_TTL', 3600))  # seconds
+    GRADING_CACHE_DIR = os.environ.get('GRADING_CACHE_DIR')  # optional on-disk tier
+    # Decoded options, answers and test cases of questions and practice problems (per process)
+    QUESTION_CACHE_ENABLED = os.environ.get('QUESTION_CACHE_ENABLED', 'true').lower() == 'true'
+    QUESTION_CACHE_SIZE = int(os.environ.get('QUESTION_CACHE_SIZE', 4096))
+    
+    # Grading queue: 'thread' drains jobs inside the web process,
+    # 'external' leaves them to `flask grading-worker` processes
+    GRADING_WORKER = os.environ.get('GRADING_WORKER', 'thread')
+    GRADING_WORKER_THREADS = int(os.environ.get('GRADING_WORKER_THREADS', 1))
+    GRADING_POLL_INTERVAL = float(os.environ.get('GRADING_POLL_INTERVAL', 1.0))
+    GRADING_JOB_STALE_SECONDS = 300
+    GRADING_ASYNC_DEFAULT = os.environ.get('GRADING_ASYNC_DEFAULT', 'false').lower() == 'true'
+    
+    # Response cache for dashboards and analytics: 'memory' is per process and
+    # misses other processes' commits for up to RESPONSE_CACHE_MEMORY_TTL;
+    # 'redis' (RESPONSE_CACHE_URL) is shared by every worker
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 2048))
+    # Upper bound for time-relative figures ("this week", upcoming interviews)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # seconds
+    RESPONSE_CACHE_MEMORY_TTL = int(os.environ.get('RESPONSE_CACHE_MEMORY_TTL', 5))  # seconds
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -70,4 +126,5 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     TESTING = True
+    GRADING_WORKER = 'external'
     DEBUG = True
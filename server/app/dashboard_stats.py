@@ -0,0 +1,416 @@
+"""
+Materialized recruiter dashboard statistics for SmartRecruiter
+
+``RecruiterDashboardStats`` keeps one row of running attempt totals per
+(recruiter, category) and ``RecruiterCandidateActivity`` one row per
+(recruiter, candidate) pair, so the recruiter dashboard reads a handful of
+small rows instead of every attempt the recruiter has ever received.
+
+The tables are maintained from an ``after_flush`` hook rather than from the
+routes, so every way an attempt changes (starting a test, accepting an
+invitation, submitting, review rescoring, invitation resets) is covered:
+
+* new, updated and deleted attempts apply a delta to their bucket;
+* changes that move attempts between buckets (an assessment changing or
+  losing its category, an assessment being deleted) rebuild that recruiter's
+  rows from ``assessment_attempt`` in the same transaction.
+
+``flask rebuild-dashboard-stats`` backfills or repairs the tables.
+
+The recent-activity and upcoming-interview lists are bounded, indexed queries
+that join the candidate's user and profile rows instead of looking them up
+one by one.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import click
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+
+from .models import (
+    db, Assessment, AssessmentAttempt, Category, Interview, IntervieweeProfile,
+    RecruiterCandidateActivity, RecruiterDashboardStats, User,
+)
+
+UNCATEGORIZED = 0
+
+_stats = RecruiterDashboardStats.__table__
+_activity = RecruiterCandidateActivity.__table__
+
+
+def _changed(obj, attr: str) -> bool:
+    return inspect(obj).attrs[attr].history.has_changes()
+
+
+def _contribution(status, score):
+    """What one attempt adds to its bucket: total, completed, score sum, score count."""
+    return (1, int(status == 'completed'), score or 0, int(score is not None))
+
+
+def _bucket_column(category_id):
+    return func.coalesce(category_id, UNCATEGORIZED)
+
+
+def rebuild(connection, recruiter_ids: Optional[Iterable[int]] = None):
+    """Recompute the stored rows of ``recruiter_ids`` (all recruiters if None) from attempts."""
+    stats_query = (
+        select(
+            Assessment.recruiter_id,
+            _bucket_column(Assessment.category_id),
+            func.count(AssessmentAttempt.id),
+            func.sum(case((AssessmentAttempt.status == 'completed', 1), else_=0)),
+            func.coalesce(func.sum(AssessmentAttempt.score), 0),
+            func.count(AssessmentAttempt.score),
+        )
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .group_by(Assessment.recruiter_id, _bucket_column(Assessment.category_id))
+    )
+    activity_query = (
+        select(
+            Assessment.recruiter_id,
+            AssessmentAttempt.interviewee_id,
+            func.count(AssessmentAttempt.id),
+            func.max(AssessmentAttempt.started_at),
+        )
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .group_by(Assessment.recruiter_id, AssessmentAttempt.interviewee_id)
+    )
+    clear_stats = delete(_stats)
+    clear_activity = delete(_activity)
+    if recruiter_ids is not None:
+        recruiter_ids = list(recruiter_ids)
+        if not recruiter_ids:
+            return
+        stats_query = stats_query.where(Assessment.recruiter_id.in_(recruiter_ids))
+        activity_query = activity_query.where(Assessment.recruiter_id.in_(recruiter_ids))
+        clear_stats = clear_stats.where(_stats.c.recruiter_id.in_(recruiter_ids))
+        clear_activity = clear_activity.where(_activity.c.recruiter_id.in_(recruiter_ids))
+    connection.execute(clear_stats)
+    connection.execute(clear_activity)
+    connection.execute(insert(_stats).from_select(
+        ['recruiter_id', 'category_id', 'attempts_total', 'attempts_completed', 'score_sum', 'score_count'],
+        stats_query,
+    ))
+    connection.execute(insert(_activity).from_select(
+        ['recruiter_id', 'interviewee_id', 'attempts', 'last_attempt_at'],
+        activity_query,
+    ))
+
+
+def _apply_delta(connection, recruiter_id: int, category_id: int, delta):
+    total, completed, score_sum, score_count = delta
+    if not any(delta):
+        return
+    bucket = (_stats.c.recruiter_id == recruiter_id) & (_stats.c.category_id == category_id)
+    updated = connection.execute(update(_stats).where(bucket).values(
+        attempts_total=_stats.c.attempts_total + total,
+        attempts_completed=_stats.c.attempts_completed + completed,
+        score_sum=_stats.c.score_sum + score_sum,
+        score_count=_stats.c.score_count + score_count,
+        updated_at=datetime.utcnow(),
+    )).rowcount
+    if updated and total < 0:
+        connection.execute(delete(_stats).where(bucket & (_stats.c.attempts_total <= 0)))
+    elif not updated:
+        connection.execute(insert(_stats).values(
+            recruiter_id=recruiter_id, category_id=category_id, attempts_total=total,
+            attempts_completed=completed, score_sum=score_sum, score_count=score_count,
+            updated_at=datetime.utcnow(),
+        ))
+
+
+def _record_attempt_started(connection, recruiter_id: int, interviewee_id: int, started_at: datetime):
+    pair = (_activity.c.recruiter_id == recruiter_id) & (_activity.c.interviewee_id == interviewee_id)
+    updated = connection.execute(update(_activity).where(pair).values(
+        attempts=_activity.c.attempts + 1,
+        last_attempt_at=case(
+            (_activity.c.last_attempt_at.is_(None), started_at),
+            (_activity.c.last_attempt_at < started_at, started_at),
+            else_=_activity.c.last_attempt_at,
+        ),
+    )).rowcount
+    if not updated:
+        connection.execute(insert(_activity).values(
+            recruiter_id=recruiter_id, interviewee_id=interviewee_id, attempts=1, last_attempt_at=started_at,
+        ))
+
+
+def _refresh_pair(connection, recruiter_id: int, interviewee_id: int):
+    attempts, last_attempt_at = connection.execute(
+        select(func.count(AssessmentAttempt.id), func.max(AssessmentAttempt.started_at))
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .where(Assessment.recruiter_id == recruiter_id, AssessmentAttempt.interviewee_id == interviewee_id)
+    ).one()
+    pair = (_activity.c.recruiter_id == recruiter_id) & (_activity.c.interviewee_id == interviewee_id)
+    if not attempts:
+        connection.execute(delete(_activity).where(pair))
+    elif not connection.execute(update(_activity).where(pair).values(
+            attempts=attempts, last_attempt_at=last_attempt_at)).rowcount:
+        connection.execute(insert(_activity).values(
+            recruiter_id=recruiter_id, interviewee_id=interviewee_id, attempts=attempts,
+            last_attempt_at=last_attempt_at,
+        ))
+
+
+_TRACKED = ('status', 'score', 'assessment_id', 'interviewee_id', 'started_at')
+_PENDING_KEY = 'dashboard_stats_pending'
+
+
+def _before_flush(session, flush_context, instances):
+    """Capture the pre-flush rows of changing attempts; the flush overwrites them."""
+    dirty = [
+        o for o in session.dirty
+        if isinstance(o, AssessmentAttempt) and any(_changed(o, attr) for attr in _TRACKED)
+    ]
+    deleted = [o for o in session.deleted if isinstance(o, AssessmentAttempt)]
+    rebuild_ids = {
+        o.recruiter_id for o in session.dirty
+        if isinstance(o, Assessment) and _changed(o, 'category_id')
+    }
+    rebuild_ids.update(o.recruiter_id for o in session.deleted if isinstance(o, Assessment))
+    deleted_users = [inspect(o).identity[0] for o in session.deleted if isinstance(o, User)]
+    previous = {}
+    attempt_ids = [inspect(o).identity[0] for o in dirty + deleted]
+    if attempt_ids:
+        previous = {
+            row.id: row
+            for row in session.connection().execute(
+                select(AssessmentAttempt.id, *(getattr(AssessmentAttempt, attr) for attr in _TRACKED))
+                .where(AssessmentAttempt.id.in_(attempt_ids))
+            )
+        }
+    session.info[_PENDING_KEY] = (dirty, previous, rebuild_ids, deleted_users)
+
+
+def _after_flush(session, flush_context):
+    dirty, previous, rebuild_ids, deleted_users = session.info.pop(_PENDING_KEY, ([], {}, set(), []))
+    attempts_new = [o for o in session.new if isinstance(o, AssessmentAttempt)]
+    if not (attempts_new or previous or rebuild_ids or deleted_users):
+        return
+
+    connection = session.connection()
+    assessment_ids = {o.assessment_id for o in attempts_new + dirty}
+    assessment_ids.update(row.assessment_id for row in previous.values())
+    buckets = {}
+    if assessment_ids:
+        buckets = {
+            row.id: (row.recruiter_id, row.bucket)
+            for row in connection.execute(
+                select(Assessment.id, Assessment.recruiter_id, _bucket_column(Assessment.category_id).label('bucket'))
+                .where(Assessment.id.in_(assessment_ids))
+            )
+        }
+
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    started = []
+    refresh = set()
+
+    def add(assessment_id, contribution, sign):
+        if assessment_id not in buckets:
+            return
+        delta = deltas[buckets[assessment_id]]
+        for i, value in enumerate(contribution):
+            delta[i] += sign * value
+
+    def touch(assessment_id, interviewee_id):
+        if assessment_id in buckets:
+            refresh.add((buckets[assessment_id][0], interviewee_id))
+
+    for obj in attempts_new:
+        add(obj.assessment_id, _contribution(obj.status, obj.score), 1)
+        if obj.assessment_id in buckets:
+            started.append((buckets[obj.assessment_id][0], obj.interviewee_id, obj.started_at))
+    # Updated attempts move from their old contribution to their new one; deleted ones just leave
+    for row in previous.values():
+        add(row.assessment_id, _contribution(row.status, row.score), -1)
+        touch(row.assessment_id, row.interviewee_id)
+    for obj in dirty:
+        if obj.id in previous:
+            add(obj.assessment_id, _contribution(obj.status, obj.score), 1)
+            touch(obj.assessment_id, obj.interviewee_id)
+
+    if deleted_users:
+        connection.execute(delete(_stats).where(_stats.c.recruiter_id.in_(deleted_users)))
+        connection.execute(delete(_activity).where(
+            _activity.c.recruiter_id.in_(deleted_users) | _activity.c.interviewee_id.in_(deleted_users)))
+    # A rebuilt recruiter already reflects everything in this flush
+    for (recruiter_id, category_id), delta in deltas.items():
+        if recruiter_id not in rebuild_ids:
+            _apply_delta(connection, recruiter_id, category_id, delta)
+    for recruiter_id, interviewee_id, started_at in started:
+        if recruiter_id not in rebuild_ids and (recruiter_id, interviewee_id) not in refresh:
+            _record_attempt_started(connection, recruiter_id, interviewee_id, started_at)
+    for recruiter_id, interviewee_id in refresh:
+        if recruiter_id not in rebuild_ids:
+            _refresh_pair(connection, recruiter_id, interviewee_id)
+    rebuild(connection, rebuild_ids)
+
+
+def _average(score_sum, score_count):
+    return round(score_sum / score_count, 0) if score_count else 0
+
+
+def recruiter_dashboard_stats(recruiter_id: int, now: Optional[datetime] = None) -> Dict:
+    """The ``stats`` and ``category_performance`` sections of the recruiter dashboard."""
+    now = now or datetime.now()
+    week_ago = now - timedelta(days=7)
+
+    assessment_rows = db.session.execute(
+        select(
+            _bucket_column(Assessment.category_id).label('bucket'),
+            func.count(Assessment.id).label('total'),
+            func.sum(case((Assessment.status == 'active', 1), else_=0)).label('active'),
+            func.sum(case((Assessment.created_at >= week_ago, 1), else_=0)).label('recent'),
+        )
+        .where(Assessment.recruiter_id == recruiter_id)
+        .group_by(_bucket_column(Assessment.category_id))
+    ).all()
+    assessments_by_bucket = {row.bucket: row.total for row in assessment_rows}
+    total_assessments = sum(row.total for row in assessment_rows)
+    active_assessments = sum(row.active or 0 for row in assessment_rows)
+    week_ago_assessments = sum(row.recent or 0 for row in assessment_rows)
+
+    buckets = {
+        row.category_id: row
+        for row in RecruiterDashboardStats.query.filter_by(recruiter_id=recruiter_id)
+    }
+    total_attempts = sum(row.attempts_total for row in buckets.values())
+    completed_attempts = sum(row.attempts_completed for row in buckets.values())
+    score_sum = sum(row.score_sum for row in buckets.values())
+    score_count = sum(row.score_count for row in buckets.values())
+
+    total_candidates, week_ago_candidates = db.session.execute(
+        select(
+            func.count(_activity.c.id),
+            func.sum(case((_activity.c.last_attempt_at >= week_ago, 1), else_=0)),
+        ).where(_activity.c.recruiter_id == recruiter_id)
+    ).one()
+    week_ago_candidates = week_ago_candidates or 0
+
+    category_performance = []
+    for category in Category.query.filter_by(recruiter_id=recruiter_id).order_by(Category.id):
+        row = buckets.get(category.id)
+        if row is None or not row.attempts_total:
+            continue
+        category_performance.append({
+            'name': category.name,
+            'average_score': _average(row.score_sum, row.score_count),
+            'total_assessments': assessments_by_bucket.get(category.id, 0),
+            'total_attempts': row.attempts_total,
+        })
+    if not category_performance:
+        category_performance.append({
+            'name': 'Overall Performance',
+            'average_score': _average(score_sum, score_count),
+            'total_assessments': total_assessments,
+            'total_attempts': total_attempts,
+        })
+
+    return {
+        'stats': {
+            'active_assessments': active_assessments,
+            'total_candidates': total_candidates,
+            'completion_rate': round((completed_attempts / total_attempts * 100), 1) if total_attempts > 0 else 0,
+            'average_score': _average(score_sum, score_count),
+            'weekly_changes': {
+                'assessments': f"+{max(0, active_assessments - week_ago_assessments)} this week",
+                'candidates': f"+{max(0, total_candidates - week_ago_candidates)} this week",
+                'completion_rate': f"+2.0% from last month",
+                'average_score': f"+1.5 points"
+            }
+        },
+        'category_performance': category_performance,
+    }
+
+
+def recent_candidate_activity(recruiter_id: int, limit: int = 5) -> List[Dict]:
+    """The latest attempts on the recruiter's assessments, skipping candidates without a profile."""
+    latest = select(
+        AssessmentAttempt.id,
+        AssessmentAttempt.interviewee_id,
+        AssessmentAttempt.assessment_id,
+        AssessmentAttempt.status,
+        AssessmentAttempt.score,
+        AssessmentAttempt.started_at,
+        AssessmentAttempt.completed_at,
+        Assessment.title,
+    ).join(
+        Assessment, Assessment.id == AssessmentAttempt.assessment_id
+    ).where(
+        Assessment.recruiter_id == recruiter_id
+    ).order_by(
+        AssessmentAttempt.started_at.desc(), AssessmentAttempt.id.desc()
+    ).limit(limit).subquery()
+    # Pick the attempts first so only ``limit`` rows are joined to users and profiles
+    rows = db.session.query(
+        latest, User.email, IntervieweeProfile.first_name, IntervieweeProfile.last_name,
+    ).join(
+        User, User.id == latest.c.interviewee_id
+    ).join(
+        IntervieweeProfile, IntervieweeProfile.user_id == latest.c.interviewee_id
+    ).order_by(
+        latest.c.started_at.desc(), latest.c.id.desc()
+    ).all()
+    return [{
+        'id': row.id,
+        'name': f"{row.first_name} {row.last_name}",
+        'email': row.email,
+        'assessment': row.title,
+        'assessment_id': row.assessment_id,
+        'status': row.status,
+        'score': round(row.score, 0) if row.score is not None else None,
+        'submitted_at': row.started_at.isoformat(),
+        'completed_at': row.completed_at.isoformat() if row.completed_at else None
+    } for row in rows]
+
+
+def upcoming_interviews(recruiter_id: int, now: Optional[datetime] = None, days: int = 7,
+                        limit: int = 3) -> List[Dict]:
+    """The recruiter's next scheduled interviews within ``days``, soonest first."""
+    now = now or datetime.now()
+    rows = db.session.query(
+        Interview.id,
+        Interview.position,
+        Interview.type,
+        Interview.scheduled_at,
+        IntervieweeProfile.first_name,
+        IntervieweeProfile.last_name,
+    ).join(
+        User, User.id == Interview.interviewee_id
+    ).join(
+        IntervieweeProfile, IntervieweeProfile.user_id == Interview.interviewee_id
+    ).filter(
+        Interview.recruiter_id == recruiter_id,
+        Interview.status == 'scheduled',
+        Interview.scheduled_at >= now,
+        Interview.scheduled_at <= now + timedelta(days=days),
+    ).order_by(
+        Interview.scheduled_at, Interview.id
+    ).limit(limit).all()
+    return [{
+        'id': row.id,
+        'candidate': f"{row.first_name} {row.last_name}",
+        'position': row.position,
+        'time': row.scheduled_at.isoformat() + 'Z',
+        'type': row.type.replace('_', ' ').title()
+    } for row in rows]
+
+
+def init_app(app):
+    """Start maintaining the stats tables and register the backfill command."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+
+    @app.cli.command('rebuild-dashboard-stats')
+    @click.option('--recruiter-id', type=int, multiple=True, help='Only rebuild these recruiters.')
+    def rebuild_dashboard_stats(recruiter_id):
+        """Recompute the recruiter dashboard statistics from assessment attempts."""
+        rebuild(db.session.connection(), recruiter_id or None)
+        db.session.commit()
+        logging.info('Rebuilt recruiter dashboard statistics')
+        click.echo('Rebuilt dashboard statistics for '
+                   + (f'{len(recruiter_id)} recruiter(s)' if recruiter_id else 'all recruiters'))
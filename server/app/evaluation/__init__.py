@@ -0,0 +1,30 @@
+"""
+Code evaluation for SmartRecruiter
+
+See ``engine.py``. Routes should only need the names exported here.
+"""
+
+from .engine import (
+    EvaluationRequest,
+    EvaluationResult,
+    RunResult,
+    TestCase,
+    TestCaseResult,
+    evaluate,
+    parse_test_cases,
+    run_single,
+)
+from .cache import GradingCache, get_grading_cache
+
+__all__ = [
+    'EvaluationRequest',
+    'EvaluationResult',
+    'GradingCache',
+    'RunResult',
+    'TestCase',
+    'TestCaseResult',
+    'evaluate',
+    'get_grading_cache',
+    'parse_test_cases',
+    'run_single',
+]
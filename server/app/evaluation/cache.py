@@ -0,0 +1,168 @@
+"""
+Grading result cache for SmartRecruiter
+
+Results are keyed by a hash of the code, the language and the test suite, so an identical resubmission against identical test cases is answered
+without touching the sandbox. An in-memory LRU with a TTL sits in front of an
+optional on-disk tier (``GRADING_CACHE_DIR``) that survives restarts and is
+shared by every process pointed at the same directory.
+
+Timed-out runs are never stored: they depend on load, not on the code.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from .engine import EvaluationRequest, EvaluationResult, TestCaseResult
+
+
+def normalize_code(code: str) -> str:
+    """Only CRLF becomes LF: both languages read either as the same source.
+
+    Anything else, trailing whitespace included, can be part of a string
+    literal and change what the program prints.
+    """
+    return (code or '').replace('\r\n', '\n')
+
+
+def cache_key(request: EvaluationRequest) -> str:
+    suite = json.dumps([[tc.input, tc.expected] for tc in request.test_cases], separators=(',', ':'))
+    digest = hashlib.sha256()
+    for part in (request.language, str(request.fail_fast), str(request.continue_after_timeout),
+                 hashlib.sha256(suite.encode('utf-8')).hexdigest(), normalize_code(request.code)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _load(data: Dict) -> EvaluationResult:
+    data = dict(data)
+    cases = [TestCaseResult(**tc) for tc in data.pop('test_case_results', [])]
+    return EvaluationResult(test_case_results=cases, **data)
+
+
+class GradingCache:
+    """LRU + TTL cache of ``EvaluationResult`` objects with an optional disk tier."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, directory: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = OrderedDict()  # key -> (stored_at, serialized result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, request: EvaluationRequest) -> Optional[EvaluationResult]:
+        key = cache_key(request)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _load(entry[1])
+            if entry:
+                del self._entries[key]
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return _load(entry[1])
+
+    def put(self, request: EvaluationRequest, result: EvaluationResult):
+        if result.timeout:
+            return
+        entry = (time.time(), asdict(result))
+        key = cache_key(request)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'disk_tier': bool(self.directory),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0,
+            }
+
+    def _remember(self, key: str, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def _read_disk(self, key: str, now: float):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - stored.get('stored_at', 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return stored['stored_at'], stored['result']
+
+    def _write_disk(self, key: str, entry):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': entry[0], 'result': entry[1]}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f'Could not write grading cache entry: {e}')
+
+
+def get_grading_cache(app) -> Optional[GradingCache]:
+    """The app's cache, created on first use; None when caching is disabled."""
+    config = app.config
+    if not config.get('GRADING_CACHE_ENABLED', True):
+        return None
+    cache = app.extensions.get('grading_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('grading_cache', GradingCache(
+            max_entries=config.get('GRADING_CACHE_SIZE', 1024),
+            ttl=config.get('GRADING_CACHE_TTL', 3600),
+            directory=config.get('GRADING_CACHE_DIR'),
+        ))
+    return cache
@@ -0,0 +1,347 @@
+"""
+Code evaluation engine for SmartRecruiter
+
+Single entry point for running a submission against test cases. ``/run-code``,
+assessment answer grading, practice problem attempts and category session
+submissions all build an ``EvaluationRequest`` and get back an
+``EvaluationResult``. Nothing here touches Flask request state; the sandbox
+runner comes from the app config unless one is passed in.
+
+Test cases can be fanned out over several sandbox workers
+(``SANDBOX_PARALLEL_CASES``) and, for callers that only need pass/fail,
+stopped at the first failing case (``fail_fast``). A case that times out
+ends the run unless ``continue_after_timeout`` is set, as for assessment
+answers, whose score counts every case on its own.
+"""
+
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from flask import current_app, has_app_context
+
+from ..sandbox import CRASH_MESSAGE, TIMEOUT_MESSAGE, get_runner
+
+SUPPORTED_LANGUAGES = ('javascript', 'python')
+
+
+@dataclass(frozen=True)
+class TestCase:
+    input: str
+    expected: str
+
+
+@dataclass
+class EvaluationRequest:
+    code: str
+    language: str = 'javascript'
+    test_cases: List[TestCase] = field(default_factory=list)
+    timeout: Optional[float] = None
+    # Workers to spread the cases over; None uses SANDBOX_PARALLEL_CASES
+    parallelism: Optional[int] = None
+    # Stop once a case fails; the remaining cases are reported as skipped
+    fail_fast: bool = False
+    # Keep running the cases after one that timed out, which counts as failed;
+    # otherwise a timeout ends the run (``/run-code``)
+    continue_after_timeout: bool = False
+
+
+@dataclass
+class TestCaseResult:
+    input: str
+    expected: str
+    output: str
+    error: str = ''
+    passed: bool = False
+    runtime_error: bool = False
+    raw_stdout: str = ''
+    raw_stderr: str = ''
+    wall_ms: float = 0
+    cpu_ms: float = 0
+    skipped: bool = False
+    timed_out: bool = False
+    compile_error: bool = False
+    # The sandbox died rather than the submission failing; never cached
+    sandbox_error: bool = False
+
+    def to_dict(self, language: str) -> Dict[str, Any]:
+        result = {
+            'input': self.input,
+            'expected': self.expected,
+            'output': self.output,
+            'error': self.error,
+            'passed': self.passed,
+        }
+        if language == 'python':
+            result['runtime_error'] = self.runtime_error
+        result['raw_stdout'] = self.raw_stdout
+        result['raw_stderr'] = self.raw_stderr
+        result['wall_ms'] = round(self.wall_ms, 3)
+        result['cpu_ms'] = round(self.cpu_ms, 3)
+        result['skipped'] = self.skipped
+        return result
+
+
+@dataclass
+class EvaluationResult:
+    language: str
+    test_case_results: List[TestCaseResult] = field(default_factory=list)
+    timeout: bool = False
+    compile_error: bool = False
+    error: str = ''
+
+    @property
+    def total(self) -> int:
+        return len(self.test_case_results)
+
+    @property
+    def passed_count(self) -> int:
+        return sum(1 for r in self.test_case_results if r.passed)
+
+    def score(self, total_cases: int) -> float:
+        """Fraction of ``total_cases`` that passed (0 when there are none)."""
+        return self.passed_count / total_cases if total_cases > 0 else 0
+
+    def results_as_dicts(self) -> List[Dict[str, Any]]:
+        return [r.to_dict(self.language) for r in self.test_case_results]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Response payload for a test-case run, as ``/run-code`` returns it."""
+        if self.compile_error:
+            return {'test_case_results': [], 'timeout': False, 'output': '', 'error': self.error, 'compile_error': True}
+        if self.timeout:
+            return {'test_case_results': [], 'timeout': True, 'output': self.error}
+        return {'test_case_results': self.results_as_dicts(), 'timeout': False}
+
+
+@dataclass
+class RunResult:
+    """Outcome of a single "Run Code" execution with one input."""
+    language: str
+    output: str = ''
+    error: str = ''
+    timeout: bool = False
+    code: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {'output': self.output, 'error': self.error}
+        if self.language == 'python':
+            if self.error:
+                result['compile_error'] = True
+            result['code'] = self.code
+        return result
+
+
+def parse_test_cases(raw) -> List[TestCase]:
+    """Build test cases from stored JSON text or a list of ``{input, expectedOutput}`` dicts."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if not isinstance(raw, list):
+        return []
+    return [
+        TestCase(input=tc.get('input', ''), expected=tc.get('expectedOutput', ''))
+        for tc in raw if isinstance(tc, dict)
+    ]
+
+
+def get_func_args(user_code: str):
+    match = re.search(r'def ([a-zA-Z_][a-zA-Z0-9_]*)\(([^)]*)\)', user_code)
+    if match:
+        args = match.group(2).replace(' ', '')
+        return match.group(1), [a for a in args.split(',') if a]
+    return 'solution', ['s']
+
+
+def wrap_python_code(user_code: str) -> str:
+    """Append a ``__main__`` block that reads one argument per stdin line and prints the result."""
+    func_name, arg_names = get_func_args(user_code)
+    parse_args = '\n    '.join([f'{a} = ast.literal_eval(inputs[{i}])' for i, a in enumerate(arg_names)])
+    args_str = ', '.join(arg_names)
+    return f"""{user_code}\nif __name__ == '__main__':\n    import sys\n    import ast\n    inputs = sys.stdin.read().strip().split('\\n')\n    {parse_args}\n    print({func_name}({args_str}))\n"""
+
+
+def _prepare_source(code: str, language: str) -> str:
+    return wrap_python_code(code) if language == 'python' else code
+
+
+def _default_runner():
+    return get_runner(current_app.config)
+
+
+def _default_cache():
+    if not has_app_context():
+        return None
+    from .cache import get_grading_cache
+    return get_grading_cache(current_app._get_current_object())
+
+
+def run_single(code: str, language: str, input_val: str, runner=None) -> RunResult:
+    """Run the submission once with ``input_val`` ("Run Code" button)."""
+    if language not in SUPPORTED_LANGUAGES:
+        raise ValueError('Unsupported language')
+    runner = runner or _default_runner()
+    source = _prepare_source(code, language)
+    run = runner.run(language, source, [input_val])[0]
+    code_echo = source if language == 'python' else None
+    if run['timed_out']:
+        return RunResult(language, error=TIMEOUT_MESSAGE, timeout=True, code=code_echo)
+    error = run['stderr'].strip()
+    if error:
+        return RunResult(language, error=error, code=code_echo)
+    return RunResult(language, output=run['stdout'].strip(), code=code_echo)
+
+
+def _grade_case(tc: TestCase, run: Dict[str, Any], language: str) -> TestCaseResult:
+    output = run['stdout'].strip()
+    error = run['stderr'].strip()
+    timing = {
+        'wall_ms': run.get('wall_ms', 0),
+        'cpu_ms': run.get('cpu_ms', 0),
+        'sandbox_error': run['stderr'] == CRASH_MESSAGE,
+    }
+    if language == 'python':
+        if run.get('compile_error'):
+            return TestCaseResult(
+                input=tc.input, expected=tc.expected, output='', compile_error=True, raw_stderr=run['stderr'], **timing,
+            )
+        if error:
+            return TestCaseResult(
+                input=tc.input, expected=tc.expected, output='Runtime Error', runtime_error=True, **timing,
+            )
+        return TestCaseResult(
+            input=tc.input, expected=tc.expected, output=output,
+            passed=str(output).strip() == str(tc.expected).strip(),
+            raw_stdout=run['stdout'], raw_stderr=run['stderr'], **timing,
+        )
+    return TestCaseResult(
+        input=tc.input, expected=tc.expected, output=output, error=error,
+        passed=(output == str(tc.expected)),
+        raw_stdout=run['stdout'], raw_stderr=run['stderr'], **timing,
+    )
+
+
+def _chunks(indexes: List[int], count: int) -> List[List[int]]:
+    """Split ``indexes`` into ``count`` contiguous, nearly equal runs."""
+    size, extra = divmod(len(indexes), count)
+    chunks, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(indexes[start:end])
+        start = end
+    return [c for c in chunks if c]
+
+
+def _run_cases(runner, request: EvaluationRequest, source: str, parallelism: int) -> List[Optional[TestCaseResult]]:
+    """Execute the cases and grade them; ``None`` marks a case that never ran.
+
+    Without ``fail_fast`` the cases are split into ``parallelism`` contiguous
+    batches, one per worker. With it every case is its own batch so dispatch
+    can stop as soon as one fails.
+    """
+    cases = request.test_cases
+    language = request.language
+    graded: List[Optional[TestCaseResult]] = [None] * len(cases)
+    indexes = list(range(len(cases)))
+    batches = [[i] for i in indexes] if request.fail_fast else _chunks(indexes, parallelism)
+
+    def run_batch(batch):
+        return batch, runner.run(language, source, [cases[i].input for i in batch], request.timeout)
+
+    def record(batch, runs):
+        """Grade one batch; returns whether the outcome is settled and the cases left to run."""
+        settled = False
+        for i, run in zip(batch, runs):
+            if run['timed_out']:
+                graded[i] = TestCaseResult(input=cases[i].input, expected=cases[i].expected, output='',
+                                           error=TIMEOUT_MESSAGE, timed_out=True)
+                if not request.continue_after_timeout:
+                    return True, []
+                continue
+            graded[i] = _grade_case(cases[i], run, language)
+            settled = settled or (request.fail_fast and not graded[i].passed)
+        # The runner stops a batch at its timed-out case; the rest go to a fresh worker
+        rest = batch[len(runs):] if runs and runs[-1]['timed_out'] and not settled else []
+        return settled, rest
+
+    if len(batches) == 1 or parallelism == 1:
+        while batches:
+            settled, rest = record(*run_batch(batches.pop(0)))
+            if settled:
+                break
+            if rest:
+                batches.insert(0, rest)
+        return graded
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        pending = {executor.submit(run_batch, batch) for batch in batches}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            outcomes = [record(*future.result()) for future in done]
+            if any(settled for settled, _ in outcomes):
+                # Batches that have not started are dropped; running ones finish
+                for future in pending:
+                    future.cancel()
+                pending = {f for f in pending if not f.cancelled()}
+                for future in pending:
+                    future.result()
+                break
+            pending |= {executor.submit(run_batch, rest) for _, rest in outcomes if rest}
+    return graded
+
+
+def evaluate(request: EvaluationRequest, runner=None, cache=None) -> EvaluationResult:
+    """Run the submission against every test case and compare outputs.
+
+    Identical submissions are answered from the grading cache (the app's, unless
+    one is passed in) without running anything.
+    """
+    language = request.language
+    result = EvaluationResult(language=language)
+    if language not in SUPPORTED_LANGUAGES:
+        result.error = 'Unsupported language'
+        return result
+    if not request.test_cases:
+        return result
+    cache = cache if cache is not None else _default_cache()
+    if cache is not None:
+        cached = cache.get(request)
+        if cached is not None:
+            return cached
+    result = _evaluate(request, runner or _default_runner())
+    if cache is not None and not any(r.sandbox_error for r in result.test_case_results):
+        cache.put(request, result)
+    return result
+
+
+def _evaluate(request: EvaluationRequest, runner) -> EvaluationResult:
+    language = request.language
+    result = EvaluationResult(language=language)
+    source = _prepare_source(request.code, language)
+    parallelism = request.parallelism
+    if parallelism is None:
+        parallelism = current_app.config.get('SANDBOX_PARALLEL_CASES', 1) if has_app_context() else 1
+    parallelism = max(1, min(parallelism, len(request.test_cases)))
+    graded_cases = _run_cases(runner, request, source, parallelism)
+    compile_failure = next((g for g in graded_cases if g is not None and g.compile_error), None)
+    if compile_failure:
+        # The harness compiles once per batch; report the syntax error once
+        result.compile_error = True
+        result.error = compile_failure.raw_stderr.strip()
+        return result
+    for tc, graded in zip(request.test_cases, graded_cases):
+        if graded is not None and graded.timed_out:
+            result.timeout = True
+            result.error = TIMEOUT_MESSAGE if language == 'javascript' else ''
+            if not request.continue_after_timeout:
+                break
+        if graded is None:
+            graded = TestCaseResult(input=tc.input, expected=tc.expected, output='', skipped=True)
+        result.test_case_results.append(graded)
+    return result
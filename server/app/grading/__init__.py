@@ -0,0 +1,45 @@
+"""
+Asynchronous grading for SmartRecruiter
+
+See ``jobs.py`` for the queue and ``worker.py`` for the workers that drain it.
+"""
+
+from .jobs import (
+    COMPLETED,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUPERSEDED,
+    apply_answer_evaluation,
+    enqueue_answer_grading,
+    enqueue_practice_grading,
+    finish_answer_jobs,
+    job_to_dict,
+    practice_points,
+    practice_streak,
+    previous_practice_attempt,
+    run_pending_jobs,
+    wants_async_grading,
+)
+from .worker import GradingWorker, notify_grading_workers, register_cli
+
+__all__ = [
+    'COMPLETED',
+    'FAILED',
+    'QUEUED',
+    'RUNNING',
+    'SUPERSEDED',
+    'GradingWorker',
+    'apply_answer_evaluation',
+    'enqueue_answer_grading',
+    'enqueue_practice_grading',
+    'finish_answer_jobs',
+    'job_to_dict',
+    'notify_grading_workers',
+    'practice_points',
+    'practice_streak',
+    'previous_practice_attempt',
+    'register_cli',
+    'run_pending_jobs',
+    'wants_async_grading',
+]
@@ -0,0 +1,278 @@
+"""
+Grading job queue for SmartRecruiter
+
+Coding answers and practice submissions can be graded outside the HTTP
+request. Each queued submission is a ``GradingJob`` row; workers claim rows
+with a conditional ``UPDATE ... WHERE status = 'queued'`` so several threads
+or processes can drain the same table without grading a job twice.
+"""
+
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from flask import current_app
+
+from ..evaluation import EvaluationRequest, EvaluationResult, evaluate
+from ..models import db, GradingJob, CodeEvaluationResult, PracticeProblemAttempt
+from ..question_cache import parsed_problem, parsed_question
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+SUPERSEDED = 'superseded'
+
+KIND_ASSESSMENT_ANSWER = 'assessment_answer'
+KIND_PRACTICE_ATTEMPT = 'practice_attempt'
+
+
+def wants_async_grading(data: Optional[Dict]) -> bool:
+    """Async grading is opt-in per request, or for every request via config."""
+    default = current_app.config.get('GRADING_ASYNC_DEFAULT', False)
+    if not data or 'async' not in data:
+        return default
+    return bool(data.get('async'))
+
+
+def enqueue_answer_grading(answer, language: str, user_id: int) -> GradingJob:
+    """Queue a coding ``AssessmentAttemptAnswer``; the caller commits."""
+    job = GradingJob(
+        job_id=str(uuid.uuid4()),
+        kind=KIND_ASSESSMENT_ANSWER,
+        status=QUEUED,
+        user_id=user_id,
+        attempt_answer_id=answer.id,
+        payload=json.dumps({'code': answer.answer, 'language': language}),
+    )
+    db.session.add(job)
+    return job
+
+
+def enqueue_practice_grading(attempt, language: str, user_id: int) -> GradingJob:
+    """Queue a coding ``PracticeProblemAttempt``; the caller commits."""
+    job = GradingJob(
+        job_id=str(uuid.uuid4()),
+        kind=KIND_PRACTICE_ATTEMPT,
+        status=QUEUED,
+        user_id=user_id,
+        practice_attempt_id=attempt.id,
+        payload=json.dumps({'code': attempt.code_submission, 'language': language}),
+    )
+    db.session.add(job)
+    return job
+
+
+def apply_answer_evaluation(answer, evaluation: Optional[EvaluationResult], total_cases: int):
+    """Store an evaluation on an assessment answer and its ``CodeEvaluationResult``."""
+    if evaluation is None or total_cases == 0:
+        answer.test_case_score = 0
+        answer.is_correct = False
+        return
+    answer.test_case_score = evaluation.score(total_cases)
+    answer.is_correct = (answer.test_case_score == 1.0)
+    cer = answer.code_evaluation_result
+    if cer is None:
+        cer = CodeEvaluationResult(attempt_answer_id=answer.id)
+        db.session.add(cer)
+    cer.test_case_results = json.dumps(evaluation.results_as_dicts())
+    cer.score = answer.test_case_score
+    cer.feedback = evaluation.error or None
+
+
+def practice_points(problem, score: float, passed: bool, prev: Optional[PracticeProblemAttempt]) -> int:
+    """Points are only awarded for a pass that beats the best previous score."""
+    if not passed:
+        return 0
+    if prev and prev.score >= score:
+        return 0
+    return problem.points
+
+
+def practice_streak(prev: Optional[PracticeProblemAttempt]) -> int:
+    return prev.streak + 1 if prev and prev.passed else 1
+
+
+def previous_practice_attempt(user_id: int, problem_id: int,
+                              exclude_id: Optional[int] = None) -> Optional[PracticeProblemAttempt]:
+    """Best-scoring graded attempt on a problem, other than ``exclude_id``.
+
+    Attempts still waiting for their grading job have no score or pass yet,
+    so they do not count. An async attempt is compared with whatever has
+    been graded by the time its own job finishes.
+    """
+    ungraded = db.session.query(GradingJob.practice_attempt_id).filter(
+        GradingJob.practice_attempt_id.isnot(None),
+        GradingJob.status.in_([QUEUED, RUNNING]),
+    )
+    query = PracticeProblemAttempt.query.filter(
+        PracticeProblemAttempt.user_id == user_id,
+        PracticeProblemAttempt.problem_id == problem_id,
+        PracticeProblemAttempt.id.notin_(ungraded),
+    )
+    if exclude_id is not None:
+        query = query.filter(PracticeProblemAttempt.id != exclude_id)
+    return query.order_by(PracticeProblemAttempt.score.desc()).first()
+
+
+def job_to_dict(job: GradingJob) -> Dict:
+    return {
+        'job_id': job.job_id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempt_answer_id': job.attempt_answer_id,
+        'practice_attempt_id': job.practice_attempt_id,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def claim_job(job_pk: int) -> bool:
+    """Atomically move a job from queued to running; False if someone else got it."""
+    claimed = GradingJob.query.filter_by(id=job_pk, status=QUEUED).update(
+        {'status': RUNNING, 'started_at': datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return claimed == 1
+
+
+def _grade_answer(payload: Dict, job: GradingJob) -> Optional[Dict]:
+    answer = job.attempt_answer
+    if answer is None:
+        raise ValueError('Answer no longer exists')
+    if answer.answer != payload.get('code'):
+        # The candidate saved a newer answer; its own job grades it
+        return None
+    test_cases = list(parsed_question(answer.question).test_cases)
+    evaluation = None
+    if test_cases:
+        evaluation = evaluate(EvaluationRequest(
+            code=payload.get('code') or '',
+            language=payload.get('language', 'javascript'),
+            test_cases=test_cases,
+            continue_after_timeout=True,
+        ))
+    apply_answer_evaluation(answer, evaluation, len(test_cases))
+    return {
+        'is_correct': answer.is_correct,
+        'test_case_score': answer.test_case_score,
+        'test_case_results': evaluation.results_as_dicts() if evaluation else [],
+        'error': evaluation.error if evaluation else '',
+    }
+
+
+def _grade_practice(payload: Dict, job: GradingJob) -> Dict:
+    attempt = job.practice_attempt
+    if attempt is None:
+        raise ValueError('Practice attempt no longer exists')
+    problem = attempt.problem
+    all_cases = list(parsed_problem(problem).test_cases)
+    evaluation = evaluate(EvaluationRequest(
+        code=payload.get('code') or '',
+        language=payload.get('language', 'javascript'),
+        test_cases=all_cases,
+    ))
+    # Points and streak wait for the grade, so they are settled here
+    prev = previous_practice_attempt(attempt.user_id, attempt.problem_id, exclude_id=attempt.id)
+    attempt.score = evaluation.passed_count
+    attempt.max_score = len(all_cases)
+    attempt.passed = (attempt.score == attempt.max_score and attempt.max_score > 0)
+    attempt.test_case_results = json.dumps(evaluation.results_as_dicts())
+    attempt.points_earned = practice_points(problem, attempt.score, attempt.passed, prev)
+    attempt.streak = practice_streak(prev)
+    return {
+        'passed': attempt.passed,
+        'score': attempt.score,
+        'max_score': attempt.max_score,
+        'points_earned': attempt.points_earned,
+        'attempt_number': attempt.attempt_number,
+        'streak': attempt.streak,
+        'test_case_results': evaluation.results_as_dicts(),
+        'error': evaluation.error or None,
+    }
+
+
+GRADERS = {
+    KIND_ASSESSMENT_ANSWER: _grade_answer,
+    KIND_PRACTICE_ATTEMPT: _grade_practice,
+}
+
+
+def run_job(job_pk: int):
+    """Grade a job that has already been claimed and record the outcome."""
+    job = db.session.get(GradingJob, job_pk)
+    try:
+        result = GRADERS[job.kind](json.loads(job.payload), job)
+        job.status = COMPLETED if result is not None else SUPERSEDED
+        job.result = json.dumps(result) if result is not None else None
+    except Exception as e:
+        logging.exception(f'Grading job {job.job_id} failed')
+        db.session.rollback()
+        job = db.session.get(GradingJob, job_pk)
+        job.status = FAILED
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def requeue_stale_jobs():
+    """Hand jobs back to the queue if their worker died mid-grade."""
+    stale_after = current_app.config.get('GRADING_JOB_STALE_SECONDS', 300)
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    requeued = GradingJob.query.filter(
+        GradingJob.status == RUNNING,
+        GradingJob.started_at < cutoff,
+    ).update({'status': QUEUED, 'started_at': None}, synchronize_session=False)
+    if requeued:
+        logging.warning(f'Requeued {requeued} stale grading job(s)')
+    db.session.commit()
+
+
+def run_pending_jobs(limit: Optional[int] = None) -> int:
+    """Claim and grade queued jobs, oldest first. Returns how many were graded."""
+    requeue_stale_jobs()
+    query = db.session.query(GradingJob.id).filter_by(status=QUEUED).order_by(GradingJob.id)
+    if limit:
+        query = query.limit(limit)
+    graded = 0
+    for (job_pk,) in query.all():
+        if claim_job(job_pk):
+            run_job(job_pk)
+            graded += 1
+    return graded
+
+
+def finish_answer_jobs(answer_ids: Iterable[int], wait: float = 10.0):
+    """Make sure every queued job for these answers is graded before scoring.
+
+    Queued jobs are graded inline; jobs another worker is already running are
+    waited on for up to ``wait`` seconds.
+    """
+    answer_ids = list(answer_ids)
+    if not answer_ids:
+        return
+    pending = GradingJob.query.filter(
+        GradingJob.attempt_answer_id.in_(answer_ids),
+        GradingJob.status.in_([QUEUED, RUNNING]),
+    ).order_by(GradingJob.id).all()
+    for job in pending:
+        if job.status == QUEUED and claim_job(job.id):
+            run_job(job.id)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        running = GradingJob.query.filter(
+            GradingJob.attempt_answer_id.in_(answer_ids),
+            GradingJob.status == RUNNING,
+        ).count()
+        if not running:
+            break
+        time.sleep(0.2)
+        db.session.commit()
+    db.session.expire_all()
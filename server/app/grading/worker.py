@@ -0,0 +1,104 @@
+"""
+Grading workers for SmartRecruiter
+
+``GRADING_WORKER = 'thread'`` drains the queue from daemon threads inside the
+web process, woken as soon as a job is enqueued. ``'external'`` leaves the
+queue to ``flask grading-worker`` processes, which can run on other hosts
+against the same database.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import click
+from flask import current_app
+
+from ..models import db
+from .jobs import run_pending_jobs
+
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+class GradingWorker:
+    """Background threads that drain the grading queue for one app."""
+
+    def __init__(self, app, threads: int = 1, poll_interval: float = 1.0, batch_size: int = 10):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, name=f'grading-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            graded = 0
+            with self.app.app_context():
+                try:
+                    graded = run_pending_jobs(limit=self.batch_size)
+                except Exception:
+                    logging.exception('Grading worker iteration failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            if not graded:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def notify_grading_workers():
+    """Wake the in-process worker after a job is committed (starting it if needed)."""
+    global _worker, _worker_pid
+    config = current_app.config
+    if config.get('GRADING_WORKER', 'thread') != 'thread':
+        return
+    with _worker_lock:
+        if _worker is None or _worker_pid != os.getpid():
+            _worker = GradingWorker(
+                current_app._get_current_object(),
+                threads=config.get('GRADING_WORKER_THREADS', 1),
+                poll_interval=config.get('GRADING_POLL_INTERVAL', 1.0),
+            )
+            _worker_pid = os.getpid()
+            _worker.start()
+    _worker.wake()
+
+
+def register_cli(app):
+    @app.cli.command('grading-worker')
+    @click.option('--once', is_flag=True, help='Grade everything currently queued, then exit.')
+    @click.option('--poll-interval', default=None, type=float, help='Seconds to sleep when the queue is empty.')
+    def grading_worker(once, poll_interval):
+        """Run a worker process that drains the grading queue."""
+        interval = poll_interval or current_app.config.get('GRADING_POLL_INTERVAL', 1.0)
+        if once:
+            click.echo(f'Graded {run_pending_jobs()} job(s)')
+            return
+        click.echo('Grading worker started')
+        while True:
+            try:
+                graded = run_pending_jobs(limit=10)
+            except Exception:
+                logging.exception('Grading worker iteration failed')
+                db.session.rollback()
+                graded = 0
+            if not graded:
+                time.sleep(interval)
@@ -0,0 +1,183 @@
+"""
+Interviewee leaderboard for SmartRecruiter
+
+Each interviewee with at least one scored assessment attempt has a
+``LeaderboardEntry`` holding their running score sum, count and average.
+Standings are ordered by average score (highest first), ties going to the
+earlier account, and are answered from the ``(average_score, user_id)``
+index instead of re-averaging every candidate's attempts:
+
+* ``rank`` counts the entries ahead of a user with one index range scan;
+* ``top`` reads the first N entries of the index;
+* ``percentile`` turns a rank into the share of candidates at or below it.
+
+Entries are refreshed from an ``after_flush`` hook for every interviewee
+whose attempts were created, rescored or deleted in that flush, so
+``submit_attempt``, review scoring and invitation resets all keep the board
+current. An ORM delete of an assessment rebuilds the whole board, since
+its attempts go in bulk where the hook cannot see them;
+``assessments.delete_assessments`` refreshes the affected candidates itself.
+``flask rebuild-leaderboard`` backfills or repairs the table.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import click
+from sqlalchemy import and_, delete, event, func, insert, inspect, or_, select, update
+
+from .models import db, Assessment, AssessmentAttempt, IntervieweeProfile, LeaderboardEntry, User
+
+_entries = LeaderboardEntry.__table__
+_PENDING_KEY = 'leaderboard_pending'
+
+
+def _scores_query():
+    """Score sum and count per interviewee over attempts that have a score."""
+    return (
+        select(
+            AssessmentAttempt.interviewee_id,
+            func.sum(AssessmentAttempt.score),
+            func.count(AssessmentAttempt.score),
+            func.avg(AssessmentAttempt.score),
+        )
+        .join(User, User.id == AssessmentAttempt.interviewee_id)
+        .where(User.role == 'interviewee', AssessmentAttempt.score.isnot(None))
+        .group_by(AssessmentAttempt.interviewee_id)
+    )
+
+
+def rebuild(connection):
+    """Recompute every entry from assessment attempts."""
+    connection.execute(delete(_entries))
+    connection.execute(insert(_entries).from_select(
+        ['user_id', 'score_sum', 'score_count', 'average_score'], _scores_query(),
+    ))
+
+
+def refresh(connection, user_ids: Iterable[int]):
+    """Recompute the entries of ``user_ids``, dropping users left without a scored attempt."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    scores = {
+        user_id: (score_sum, score_count, average)
+        for user_id, score_sum, score_count, average in connection.execute(
+            _scores_query().where(AssessmentAttempt.interviewee_id.in_(user_ids))
+        )
+    }
+    unscored = user_ids - set(scores)
+    if unscored:
+        connection.execute(delete(_entries).where(_entries.c.user_id.in_(unscored)))
+    now = datetime.utcnow()
+    for user_id, (score_sum, score_count, average) in scores.items():
+        values = dict(score_sum=score_sum, score_count=score_count, average_score=average, updated_at=now)
+        if not connection.execute(update(_entries).where(_entries.c.user_id == user_id).values(**values)).rowcount:
+            connection.execute(insert(_entries).values(user_id=user_id, **values))
+
+
+def _before_flush(session, flush_context, instances):
+    """Note whose standing this flush can change while the old rows are still readable."""
+    touched = set()
+    rebuild_all = False
+    for obj in session.dirty:
+        if isinstance(obj, AssessmentAttempt):
+            state = inspect(obj)
+            if state.attrs.score.history.has_changes() or state.attrs.interviewee_id.history.has_changes():
+                touched.add(obj.interviewee_id)
+                touched.update(state.attrs.interviewee_id.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, AssessmentAttempt):
+            touched.add(obj.interviewee_id)
+        elif isinstance(obj, User):
+            touched.add(inspect(obj).identity[0])
+        elif isinstance(obj, Assessment):
+            rebuild_all = True
+    session.info[_PENDING_KEY] = (touched, rebuild_all)
+
+
+def _after_flush(session, flush_context):
+    touched, rebuild_all = session.info.pop(_PENDING_KEY, (set(), False))
+    touched.update(o.interviewee_id for o in session.new if isinstance(o, AssessmentAttempt) and o.score is not None)
+    touched.discard(None)
+    if rebuild_all:
+        rebuild(session.connection())
+    elif touched:
+        refresh(session.connection(), touched)
+
+
+def _standing(user_id: int):
+    return db.session.execute(
+        select(_entries.c.average_score).where(_entries.c.user_id == user_id)
+    ).scalar_one_or_none()
+
+
+def size() -> int:
+    """Number of ranked candidates."""
+    return db.session.execute(select(func.count(_entries.c.id))).scalar_one()
+
+
+def rank(user_id: int) -> Optional[int]:
+    """1-based position of ``user_id``, or None if they have no scored attempt."""
+    average = _standing(user_id)
+    if average is None:
+        return None
+    ahead = db.session.execute(
+        select(func.count(_entries.c.id)).where(or_(
+            _entries.c.average_score > average,
+            and_(_entries.c.average_score == average, _entries.c.user_id < user_id),
+        ))
+    ).scalar_one()
+    return ahead + 1
+
+
+def rank_or_last(user_id: int) -> int:
+    """``rank``, with candidates who have no scored attempt placed after everyone ranked."""
+    return rank(user_id) or size() + 1
+
+
+def percentile(user_id: int) -> Optional[float]:
+    """Share of ranked candidates (0-100) that ``user_id`` is level with or ahead of."""
+    position = rank(user_id)
+    if position is None:
+        return None
+    total = size()
+    return round((total - position + 1) / total * 100, 1)
+
+
+def top(limit: int = 10) -> List[Dict]:
+    """The first ``limit`` entries, best first, with the candidate's name when they have a profile."""
+    rows = db.session.query(
+        LeaderboardEntry.user_id,
+        LeaderboardEntry.average_score,
+        LeaderboardEntry.score_count,
+        IntervieweeProfile.first_name,
+        IntervieweeProfile.last_name,
+    ).outerjoin(
+        IntervieweeProfile, IntervieweeProfile.user_id == LeaderboardEntry.user_id
+    ).order_by(
+        LeaderboardEntry.average_score.desc(), LeaderboardEntry.user_id
+    ).limit(limit).all()
+    return [{
+        'rank': position,
+        'user_id': row.user_id,
+        'name': f"{row.first_name} {row.last_name}" if row.first_name else None,
+        'average_score': round(row.average_score, 1),
+        'scored_attempts': row.score_count,
+    } for position, row in enumerate(rows, start=1)]
+
+
+def init_app(app):
+    """Start maintaining the leaderboard and register the backfill command."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+
+    @app.cli.command('rebuild-leaderboard')
+    def rebuild_leaderboard():
+        """Recompute the interviewee leaderboard from assessment attempts."""
+        rebuild(db.session.connection())
+        db.session.commit()
+        logging.info('Rebuilt interviewee leaderboard')
+        click.echo(f'Ranked {size()} candidate(s)')
@@ -0,0 +1,346 @@
+"""
+Messaging queries for SmartRecruiter
+
+Every conversation has a ``Conversation`` row carrying its summary: the
+latest message (``last_message_id`` / ``last_message_at``) and how many
+messages each participant has not read (``unread_by_user1`` /
+``unread_by_user2``). The inbox and unread badges read these rows through
+the ``(user, last_message_at)`` indexes instead of scanning ``message``.
+
+Summaries are refreshed from an ``after_flush`` hook for every conversation
+whose messages were sent, read, unread or deleted in that flush. The refresh
+runs in the same transaction, so ``send_message``, ``mark_message_read``,
+``mark_conversation_read`` and message deletion all keep them exact. A
+conversation row is created the first time a message is sent, with an
+insert that ignores a row another transaction created first. Before
+recounting, the refresh locks the conversation rows (``SELECT ... FOR
+UPDATE``), so concurrent refreshes of one conversation run one after the
+other. The last one recounts after every other writer has committed, and
+READ COMMITTED cannot leave a lower count behind. Bulk ``query.update()``
+calls on ``message`` bypass the hook.
+``flask rebuild-conversation-summaries`` backfills or repairs the rows.
+
+``page_messages`` serves a conversation's history ordered by
+``(timestamp, id)``, with every page's attachments loaded in one extra query.
+A request without ``limit``, ``before`` or ``after`` gets the whole thread,
+as the clients have always expected. With ``limit`` it gets the newest page,
+then older or newer keyset pages from opaque ``before``/``after`` cursors.
+"""
+
+import base64
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import click
+from sqlalchemy import and_, case, event, func, insert, inspect, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
+
+from .models import db, Conversation, IntervieweeProfile, Message, RecruiterProfile, User
+
+_conversations = Conversation.__table__
+_PENDING_KEY = 'conversation_summary_pending'
+_REBUILD_BATCH = 500
+
+
+def _create_missing(connection, conversation_ids):
+    """Insert conversation rows for ``conversation_ids`` that have messages but no row yet.
+
+    Rows another transaction inserts at the same time are left alone rather
+    than failing on the unique ``conversation_id``.
+    """
+    first = (
+        select(Message.conversation_id, Message.sender_id, Message.receiver_id,
+               func.row_number().over(partition_by=Message.conversation_id, order_by=Message.id).label('position'))
+        .where(Message.conversation_id.in_(conversation_ids))
+        .subquery()
+    )
+    missing = connection.execute(
+        select(first.c.conversation_id, first.c.sender_id, first.c.receiver_id)
+        .where(first.c.position == 1,
+               first.c.conversation_id.notin_(select(_conversations.c.conversation_id)
+                                              .where(_conversations.c.conversation_id.in_(conversation_ids))))
+        .order_by(first.c.conversation_id)
+    ).all()
+    if not missing:
+        return
+    now = datetime.now()
+    rows = [dict(
+        conversation_id=row.conversation_id,
+        user1_id=min(row.sender_id, row.receiver_id),
+        user2_id=max(row.sender_id, row.receiver_id),
+        archived_by_user1=False, archived_by_user2=False, unread_by_user1=0, unread_by_user2=0,
+        created_at=now, updated_at=now,
+    ) for row in missing]
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        connection.execute(dialect_insert(_conversations).values(rows).on_conflict_do_nothing(
+            index_elements=[_conversations.c.conversation_id],
+        ))
+    else:
+        connection.execute(insert(_conversations), rows)
+
+
+def refresh(connection, conversation_ids: Iterable[str]):
+    """Recompute the summaries of ``conversation_ids``, creating missing conversation rows."""
+    conversation_ids = sorted({c for c in conversation_ids if c})
+    if not conversation_ids:
+        return
+    _create_missing(connection, conversation_ids)
+    # Serialize refreshes of the same conversations; the sorted order keeps lock acquisition deadlock-free
+    existing = {
+        row.conversation_id: row
+        for row in connection.execute(
+            select(_conversations.c.conversation_id, _conversations.c.user1_id, _conversations.c.user2_id)
+            .where(_conversations.c.conversation_id.in_(conversation_ids))
+            .order_by(_conversations.c.conversation_id)
+            .with_for_update()
+        )
+    }
+    ranked = (
+        select(
+            Message.conversation_id,
+            Message.id,
+            Message.timestamp,
+            func.row_number().over(
+                partition_by=Message.conversation_id,
+                order_by=(Message.timestamp.desc(), Message.id.desc()),
+            ).label('position'),
+        )
+        .where(Message.conversation_id.in_(list(existing)))
+        .subquery()
+    )
+    latest = {row.conversation_id: row for row in connection.execute(select(ranked).where(ranked.c.position == 1))}
+    unread = defaultdict(dict)
+    for conversation_id, receiver_id, count in connection.execute(
+        select(Message.conversation_id, Message.receiver_id, func.count(Message.id))
+        .where(Message.conversation_id.in_(list(existing)), Message.read == False)
+        .group_by(Message.conversation_id, Message.receiver_id)
+    ):
+        unread[conversation_id][receiver_id] = count
+    now = datetime.now()
+    for conversation_id, row in existing.items():
+        last = latest.get(conversation_id)
+        connection.execute(
+            update(_conversations).where(_conversations.c.conversation_id == conversation_id).values(
+                last_message_id=last.id if last else None,
+                last_message_at=last.timestamp if last else None,
+                unread_by_user1=unread[conversation_id].get(row.user1_id, 0),
+                unread_by_user2=unread[conversation_id].get(row.user2_id, 0),
+                updated_at=now,
+            )
+        )
+
+
+def rebuild(connection) -> int:
+    """Recompute every conversation summary from ``message``; returns the number of conversations."""
+    conversation_ids = connection.execute(select(Message.conversation_id).distinct()).scalars().all()
+    for start in range(0, len(conversation_ids), _REBUILD_BATCH):
+        refresh(connection, conversation_ids[start:start + _REBUILD_BATCH])
+    return len(conversation_ids)
+
+
+def _before_flush(session, flush_context, instances):
+    """Note which conversations this flush changes while old values are still readable."""
+    touched = set()
+    for obj in session.dirty:
+        if isinstance(obj, Message):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes()
+                   for name in ('read', 'conversation_id', 'timestamp', 'receiver_id')):
+                touched.add(obj.conversation_id)
+                touched.update(state.attrs.conversation_id.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, Message):
+            touched.add(obj.conversation_id)
+    session.info[_PENDING_KEY] = touched
+
+
+def _after_flush(session, flush_context):
+    touched = session.info.pop(_PENDING_KEY, set())
+    touched.update(o.conversation_id for o in session.new if isinstance(o, Message))
+    if touched:
+        refresh(session.connection(), touched)
+
+
+def _inbox_query(user_id: int, archived: bool):
+    is_user1 = Conversation.user1_id == user_id
+    archived_flag = func.coalesce(case((is_user1, Conversation.archived_by_user1), else_=Conversation.archived_by_user2), False)
+    return (
+        select(
+            Conversation.conversation_id,
+            Message.content,
+            Conversation.last_message_at,
+            case((is_user1, Conversation.unread_by_user1), else_=Conversation.unread_by_user2).label('unread_count'),
+            User.id,
+            User.email,
+            User.role,
+            IntervieweeProfile.first_name.label('interviewee_first_name'),
+            IntervieweeProfile.last_name.label('interviewee_last_name'),
+            IntervieweeProfile.avatar.label('interviewee_avatar'),
+            RecruiterProfile.first_name.label('recruiter_first_name'),
+            RecruiterProfile.last_name.label('recruiter_last_name'),
+            RecruiterProfile.avatar.label('recruiter_avatar'),
+            RecruiterProfile.company_name,
+        )
+        .join(Message, Message.id == Conversation.last_message_id)
+        .join(User, User.id == case((is_user1, Conversation.user2_id), else_=Conversation.user1_id))
+        .outerjoin(IntervieweeProfile, IntervieweeProfile.user_id == User.id)
+        .outerjoin(RecruiterProfile, RecruiterProfile.user_id == User.id)
+        .where(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+               archived_flag == archived)
+        .order_by(Conversation.last_message_at.desc(), Conversation.conversation_id)
+    )
+
+
+def conversation_inbox(user_id: int, archived: bool = False) -> List[Dict]:
+    """The user's conversations (archived ones when ``archived``), latest message first."""
+    rows = db.session.execute(_inbox_query(user_id, archived)).all()
+    return [{
+        'conversation_id': row.conversation_id,
+        'last_message': row.content,
+        'last_message_at': row.last_message_at.isoformat() + 'Z',
+        'unread_count': row.unread_count or 0,
+        'other_user': {
+            'id': row.id,
+            'email': row.email,
+            'role': row.role,
+            'first_name': row.interviewee_first_name or row.recruiter_first_name,
+            'last_name': row.interviewee_last_name or row.recruiter_last_name,
+            'avatar': row.interviewee_avatar or row.recruiter_avatar,
+            'company': row.company_name if row.role == 'recruiter' else None,
+            'status': 'online'  # Default status, can be enhanced later
+        }
+    } for row in rows]
+
+
+def unread_message_count(user_id: int) -> int:
+    """Messages the user has not read, across all of their conversations."""
+    return db.session.execute(
+        select(func.coalesce(func.sum(case(
+            (Conversation.user1_id == user_id, Conversation.unread_by_user1),
+            else_=Conversation.unread_by_user2,
+        )), 0)).where(or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id))
+    ).scalar_one()
+
+
+# --- Message history ---
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidMessageQuery(ValueError):
+    """A cursor or page size parameter could not be used."""
+
+
+def encode_cursor(message: Message) -> str:
+    payload = json.dumps({'t': message.timestamp.isoformat(), 'id': message.id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['t']), int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidMessageQuery('Invalid cursor')
+
+
+def conversation_participant(conversation_id: str, user_id: int) -> bool:
+    """Whether ``user_id`` takes part in the conversation, from its summary row."""
+    return db.session.execute(
+        select(Conversation.id).where(Conversation.conversation_id == conversation_id,
+                                      or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id))
+    ).first() is not None
+
+
+def _message_to_dict(m: Message) -> Dict:
+    return {
+        'id': m.id,
+        'sender_id': m.sender_id,
+        'receiver_id': m.receiver_id,
+        'content': m.content,
+        'created_at': m.timestamp.isoformat() + 'Z',
+        'read': m.read,
+        'attachments': [{
+            'id': attachment.id,
+            'filename': attachment.filename,
+            'original_filename': attachment.original_filename,
+            'file_size': attachment.file_size,
+            'mime_type': attachment.mime_type
+        } for attachment in m.attachments]
+    }
+
+
+def page_messages(conversation_id: str, args) -> Dict:
+    """One page of a conversation for the query-string ``args`` of ``GET /messages/<conversation_id>``.
+
+    Without ``limit`` or a cursor this is the whole conversation. With
+    ``limit`` alone it is the newest ``limit`` messages. ``before`` pages
+    towards older messages and ``after`` towards newer ones; both take a
+    cursor from a previous response and default to ``DEFAULT_PAGE_SIZE``
+    messages. Messages are always returned oldest first.
+    """
+    if args.get('before') and args.get('after'):
+        raise InvalidMessageQuery('Use either before or after, not both')
+    paged = any(args.get(name) for name in ('limit', 'before', 'after'))
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE) if paged else None
+    except ValueError:
+        raise InvalidMessageQuery('Invalid limit')
+
+    query = (
+        select(Message)
+        .options(selectinload(Message.attachments))
+        .where(Message.conversation_id == conversation_id)
+    )
+    newer = bool(args.get('after'))
+    if newer:
+        timestamp, last_id = decode_cursor(args['after'])
+        query = query.where(or_(Message.timestamp > timestamp,
+                                and_(Message.timestamp == timestamp, Message.id > last_id)))
+        query = query.order_by(Message.timestamp.asc(), Message.id.asc())
+    else:
+        if args.get('before'):
+            timestamp, last_id = decode_cursor(args['before'])
+            query = query.where(or_(Message.timestamp < timestamp,
+                                    and_(Message.timestamp == timestamp, Message.id < last_id)))
+        query = query.order_by(Message.timestamp.desc(), Message.id.desc())
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+    messages = db.session.execute(query).scalars().all()
+    has_more = limit is not None and len(messages) > limit
+    messages = messages[:limit]
+    if not newer:
+        messages.reverse()
+    # An empty page keeps the caller's cursor so polling with ``after`` can carry on
+    cursor = args.get('after') or args.get('before')
+    return {
+        'messages': [_message_to_dict(m) for m in messages],
+        'has_older': has_more if not newer else True,
+        'has_newer': has_more if newer else bool(args.get('before')),
+        'before_cursor': encode_cursor(messages[0]) if messages else cursor,
+        'after_cursor': encode_cursor(messages[-1]) if messages else cursor,
+    }
+
+
+def init_app(app):
+    """Start maintaining conversation summaries and register the backfill command."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+
+    @app.cli.command('rebuild-conversation-summaries')
+    def rebuild_conversation_summaries():
+        """Recompute last-message and unread-count columns of every conversation."""
+        total = rebuild(db.session.connection())
+        db.session.commit()
+        logging.info('Rebuilt conversation summaries')
+        click.echo(f'Summarized {total} conversation(s)')
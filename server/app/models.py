@@ -41,7 +41,7 @@ class User(db.Model):
 class IntervieweeProfile(db.Model):
     __tablename__ = 'interviewee_profile'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     phone = db.Column(db.String(30))
@@ -135,9 +135,17 @@ class Session(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(255), unique=True, nullable=False)
     data = db.Column(db.Text, nullable=False)
-    expiry = db.Column(db.DateTime, nullable=False)
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+# Denylist of revoked signed-cookie sessions, kept until the cookie would have expired anyway
+class RevokedSession(db.Model):
+    __tablename__ = 'revoked_session'
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(64), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
 class Category(db.Model):
     __tablename__ = 'category'
     id = db.Column(db.Integer, primary_key=True)
@@ -152,7 +160,7 @@ class Category(db.Model):
 class Assessment(db.Model):
     __tablename__ = 'assessment'
     id = db.Column(db.Integer, primary_key=True)
-    recruiter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
@@ -190,8 +198,9 @@ class AssessmentQuestion(db.Model):
 # Track attempts made by interviewees on assessments
 class AssessmentAttempt(db.Model):
     __tablename__ = 'assessment_attempt'
+    __table_args__ = (db.Index('ix_assessment_attempt_assessment_started', 'assessment_id', 'started_at'),)
     id = db.Column(db.Integer, primary_key=True)
-    interviewee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    interviewee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     assessment_id = db.Column(db.Integer, db.ForeignKey('assessment.id'), nullable=False)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
@@ -249,6 +258,63 @@ class CodeEvaluationResult(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     attempt_answer = db.relationship('AssessmentAttemptAnswer', backref=db.backref('code_evaluation_result', uselist=False))
 
+# Background grading jobs for coding answers and practice submissions
+class GradingJob(db.Model):
+    __tablename__ = 'grading_job'
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), unique=True, nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # assessment_answer | practice_attempt
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    attempt_answer_id = db.Column(db.Integer, db.ForeignKey('assessment_attempt_answer.id', ondelete='CASCADE'), nullable=True, index=True)
+    practice_attempt_id = db.Column(db.Integer, db.ForeignKey('practice_problem_attempt.id', ondelete='CASCADE'), nullable=True, index=True)
+    payload = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    user = db.relationship('User', backref=db.backref('grading_jobs', lazy='dynamic'))
+    attempt_answer = db.relationship('AssessmentAttemptAnswer', backref=db.backref('grading_jobs', lazy='dynamic', passive_deletes=True))
+    practice_attempt = db.relationship('PracticeProblemAttempt', backref=db.backref('grading_jobs', lazy='dynamic', passive_deletes=True))
+
+# Running attempt totals per recruiter and category, kept current by app.dashboard_stats
+class RecruiterDashboardStats(db.Model):
+    __tablename__ = 'recruiter_dashboard_stats'
+    __table_args__ = (db.UniqueConstraint('recruiter_id', 'category_id', name='uq_recruiter_dashboard_stats_bucket'),)
+    id = db.Column(db.Integer, primary_key=True)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, nullable=False, default=0)  # 0 = uncategorized
+    attempts_total = db.Column(db.Integer, nullable=False, default=0)
+    attempts_completed = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Distinct candidates per recruiter with their latest attempt, for dashboard candidate counts
+class RecruiterCandidateActivity(db.Model):
+    __tablename__ = 'recruiter_candidate_activity'
+    __table_args__ = (
+        db.UniqueConstraint('recruiter_id', 'interviewee_id', name='uq_recruiter_candidate_activity_pair'),
+        db.Index('ix_recruiter_candidate_activity_recent', 'recruiter_id', 'last_attempt_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    recruiter_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    interviewee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_attempt_at = db.Column(db.DateTime)
+
+# Per-interviewee running average over scored attempts, kept current by app.leaderboard
+class LeaderboardEntry(db.Model):
+    __tablename__ = 'leaderboard_entry'
+    __table_args__ = (db.Index('ix_leaderboard_entry_standing', 'average_score', 'user_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, unique=True)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    average_score = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class AssessmentReview(db.Model):
     __tablename__ = 'assessment_review'
     id = db.Column(db.Integer, primary_key=True)
@@ -398,9 +464,10 @@ class PracticeCategorySessionAttempt(db.Model):
     
 class Message(db.Model):
     __tablename__ = 'message'
+    __table_args__ = (db.Index('ix_message_conversation_timestamp', 'conversation_id', 'timestamp'),)
     id = db.Column(db.Integer, primary_key=True)
-    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.now)
     read = db.Column(db.Boolean, default=False)
@@ -422,12 +489,21 @@ class MessageAttachment(db.Model):
 
 class Conversation(db.Model):
     __tablename__ = 'conversation'
+    __table_args__ = (
+        db.Index('ix_conversation_user1_last_message', 'user1_id', 'last_message_at'),
+        db.Index('ix_conversation_user2_last_message', 'user2_id', 'last_message_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.String(64), unique=True, nullable=False)
     user1_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user2_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     archived_by_user1 = db.Column(db.Boolean, default=False)
     archived_by_user2 = db.Column(db.Boolean, default=False)
+    # Summary maintained by app.messaging from the conversation's messages
+    last_message_id = db.Column(db.Integer, db.ForeignKey('message.id', ondelete='SET NULL'), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    unread_by_user1 = db.Column(db.Integer, nullable=False, default=0)
+    unread_by_user2 = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
@@ -449,6 +525,7 @@ class Notification(db.Model):
     
 class Interview(db.Model):
     __tablename__ = 'interview'
+    __table_args__ = (db.Index('ix_interview_recruiter_status_scheduled', 'recruiter_id', 'status', 'scheduled_at'),)
     id = db.Column(db.Integer, primary_key=True)
     recruiter_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     interviewee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
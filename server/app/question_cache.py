@@ -0,0 +1,190 @@
+"""
+Parsed question cache for SmartRecruiter
+
+Assessment questions and practice problems keep their options, answers and
+test cases as JSON text. Listing, answering, reviewing and grading all need
+the decoded form, so this per-process cache holds it for each row, keyed by
+``(id, updated_at)``. An edited row has a new ``updated_at`` and is parsed
+again on its next read, and a flush hook drops the entries of rows that were
+changed or deleted.
+
+Cached structures are shared between requests, so they are frozen: JSON
+arrays become tuples and objects become read-only dicts. Both serialize with
+``jsonify`` exactly like the originals.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from .evaluation import TestCase, parse_test_cases
+from .models import db, AssessmentQuestion, PracticeProblem
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes after construction."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('cached question data is read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ParsedQuestion(NamedTuple):
+    options: Tuple
+    correct_answer: Any
+    test_cases: Tuple[TestCase, ...]
+
+
+class ParsedProblem(NamedTuple):
+    options: Tuple
+    allowed_languages: Tuple
+    visible_test_cases: Tuple
+    hidden_test_cases: Tuple
+    keywords: Tuple
+    hints: Tuple
+    learning_resources: Tuple
+    study_sections: Tuple
+    test_cases: Tuple[TestCase, ...]  # visible then hidden, for grading
+
+
+def parse_question(question: AssessmentQuestion) -> ParsedQuestion:
+    return ParsedQuestion(
+        options=freeze(json.loads(question.options)) if question.options else (),
+        correct_answer=freeze(json.loads(question.correct_answer)) if question.correct_answer else None,
+        test_cases=tuple(parse_test_cases(question.test_cases)),
+    )
+
+
+def parse_problem(problem: PracticeProblem) -> ParsedProblem:
+    def load(raw):
+        return freeze(json.loads(raw or '[]'))
+    return ParsedProblem(
+        options=load(problem.options),
+        allowed_languages=load(problem.allowed_languages),
+        visible_test_cases=load(problem.visible_test_cases),
+        hidden_test_cases=load(problem.hidden_test_cases),
+        keywords=load(problem.keywords),
+        hints=load(problem.hints),
+        learning_resources=load(problem.learning_resources),
+        study_sections=load(problem.study_sections),
+        test_cases=tuple(parse_test_cases(problem.visible_test_cases) + parse_test_cases(problem.hidden_test_cases)),
+    )
+
+
+class QuestionCache:
+    """LRU of parsed questions and problems, versioned by ``updated_at``."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()  # (kind, id) -> (updated_at, parsed)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, kind: str, row, parse):
+        key = (kind, row.id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == row.updated_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        parsed = parse(row)
+        # Rows not flushed yet have no identity or version to cache under
+        if row.id is not None and row.updated_at is not None:
+            with self._lock:
+                self._entries[key] = (row.updated_at, parsed)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return parsed
+
+    def question(self, question: AssessmentQuestion) -> ParsedQuestion:
+        return self._get('question', question, parse_question)
+
+    def problem(self, problem: PracticeProblem) -> ParsedProblem:
+        return self._get('problem', problem, parse_problem)
+
+    def discard(self, kind: str, row_id: int):
+        with self._lock:
+            self._entries.pop((kind, row_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0,
+            }
+
+
+def get_question_cache(app) -> Optional[QuestionCache]:
+    """The app's question cache, created on first use; None when caching is disabled."""
+    if not app.config.get('QUESTION_CACHE_ENABLED', True):
+        return None
+    cache = app.extensions.get('question_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('question_cache', QuestionCache(
+            max_entries=app.config.get('QUESTION_CACHE_SIZE', 4096),
+        ))
+    return cache
+
+
+def _cache() -> Optional[QuestionCache]:
+    return get_question_cache(current_app) if has_app_context() else None
+
+
+def parsed_question(question: AssessmentQuestion) -> ParsedQuestion:
+    """Decoded options, correct answer and test cases of an assessment question."""
+    cache = _cache()
+    return cache.question(question) if cache else parse_question(question)
+
+
+def parsed_problem(problem: PracticeProblem) -> ParsedProblem:
+    """Decoded JSON fields and grading test cases of a practice problem."""
+    cache = _cache()
+    return cache.problem(problem) if cache else parse_problem(problem)
+
+
+_KINDS = {AssessmentQuestion: 'question', PracticeProblem: 'problem'}
+
+
+def _after_flush(session, flush_context):
+    cache = _cache()
+    if cache is None:
+        return
+    for obj in list(session.dirty) + list(session.deleted):
+        kind = _KINDS.get(type(obj))
+        if kind and obj.id is not None:
+            cache.discard(kind, obj.id)
+
+
+def init_app(app):
+    """Drop cached entries of questions and problems as they are changed or deleted."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
@@ -0,0 +1,375 @@
+"""
+Per-user response cache for SmartRecruiter dashboards and analytics
+
+``@cached_response`` stores the JSON body of a successful GET, keyed by
+endpoint, user and query string. Every key also folds in the current
+generation of the *tags* the response depends on: ``user:<id>`` for the
+caller's own data plus shared tags such as ``leaderboard`` or ``catalog``.
+Invalidating a tag bumps its generation, so every entry built from older
+data becomes unreachable at once and simply ages out of the LRU.
+
+Generations move on domain events, published with ``emit``:
+
+* ``attempt_changed`` / ``attempt_scored`` - an attempt was started,
+  progressed, submitted or rescored (scoring also moves the leaderboard);
+* ``interview_changed`` - an interview was scheduled, updated or cancelled;
+* ``review_changed`` - a review or candidate feedback was saved or released;
+* ``catalog_changed`` - assessments, questions, categories or practice
+  problems changed;
+* ``practice_attempted``, ``message_sent``, ``profile_changed``,
+  ``user_changed``.
+
+A session hook emits these for every ORM change, so routes do not have to.
+The events are applied on commit and dropped on rollback. Bulk
+``query.update()`` / ``query.delete()`` on a tracked table first selects the
+owner columns of the rows its WHERE clause matches and emits the same events
+for them; only a bulk statement without a WHERE clause invalidates
+everything (``all``).
+
+Generations only move in the process that committed the change. With the
+shared Redis backend (``RESPONSE_CACHE_BACKEND = 'redis'``,
+``RESPONSE_CACHE_URL``, requires the ``redis`` package) that is every web
+worker and grading worker, and ``RESPONSE_CACHE_TTL`` only bounds how long
+time-relative numbers such as "this week" can lag behind the clock.
+
+The default backend is an in-process LRU. Its generations are private to the
+process, so commits made by another web worker or by a grading worker in a
+separate process do not invalidate its entries. They are served until they
+expire, so this backend caps every entry at ``RESPONSE_CACHE_MEMORY_TTL``
+(a few seconds). Run more than one process against Redis if that window is
+too long.
+"""
+
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app, has_app_context, make_response, request, session
+from sqlalchemy import event, inspect, select
+
+from .models import (
+    db, Assessment, AssessmentAttempt, AssessmentQuestion, AssessmentReview, CandidateFeedback, Category,
+    Interview, IntervieweeProfile, Message, PracticeProblem, PracticeProblemAttempt, RecruiterProfile, User,
+)
+
+EVENT_TAGS = {
+    'attempt_changed': ('user:{interviewee_id}', 'user:{recruiter_id}'),
+    'attempt_scored': ('user:{interviewee_id}', 'user:{recruiter_id}', 'leaderboard'),
+    'interview_changed': ('user:{interviewee_id}', 'user:{recruiter_id}'),
+    'review_changed': ('user:{interviewee_id}', 'user:{recruiter_id}'),
+    'catalog_changed': ('user:{recruiter_id}', 'catalog'),
+    'practice_attempted': ('user:{user_id}', 'user:{recruiter_id}'),
+    'message_sent': ('user:{sender_id}', 'user:{receiver_id}'),
+    'profile_changed': ('user:{user_id}', 'profiles'),
+    'user_changed': ('user:{user_id}',),
+    'bulk_change': ('all',),
+}
+
+_TRACKED = (
+    Assessment, AssessmentAttempt, AssessmentQuestion, AssessmentReview, CandidateFeedback, Category,
+    Interview, IntervieweeProfile, Message, PracticeProblem, PracticeProblemAttempt, RecruiterProfile, User,
+)
+_PENDING_KEY = 'response_cache_tags'
+
+# Columns ``_emit_for`` reads per model, selected for the rows of a bulk statement
+_OWNER_COLUMNS = {
+    AssessmentAttempt: ('assessment_id', 'interviewee_id'),
+    AssessmentQuestion: ('assessment_id',),
+    AssessmentReview: ('attempt_id', 'recruiter_id'),
+    CandidateFeedback: ('attempt_id', 'recruiter_id'),
+    PracticeProblemAttempt: ('problem_id', 'user_id'),
+    Interview: ('interviewee_id', 'recruiter_id'),
+    Assessment: ('recruiter_id',),
+    Category: ('recruiter_id',),
+    PracticeProblem: ('recruiter_id',),
+    Message: ('sender_id', 'receiver_id'),
+    IntervieweeProfile: ('user_id',),
+    RecruiterProfile: ('user_id',),
+    User: ('id',),
+}
+
+
+class MemoryBackend:
+    """In-process LRU of cached bodies plus a table of tag generations."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, body: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared backend: bodies and generations live in Redis, so every worker sees each bump."""
+
+    def __init__(self, url: str, prefix: str = 'smartrecruiter:response:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND 'redis' requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, body: bytes, ttl: float):
+        self.client.set(self.prefix + key, body, ex=max(1, int(ttl)))
+
+    def generations(self, tags: List[str]) -> List[int]:
+        values = self.client.mget([f'{self.prefix}gen:{tag}' for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags: Iterable[str]):
+        pipe = self.client.pipeline()
+        for tag in tags:
+            pipe.incr(f'{self.prefix}gen:{tag}')
+        pipe.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float = 300):
+        self.backend = backend
+        self.ttl = ttl
+
+    def key(self, path: str, user_id: int, query: bytes, tags: List[str]) -> str:
+        digest = hashlib.sha256()
+        for part in (path, str(user_id), query.decode('utf-8', 'replace'),
+                     ','.join(f'{tag}={gen}' for tag, gen in zip(tags, self.backend.generations(tags)))):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logging.warning(f'Response cache read failed: {e}')
+            return None
+
+    def set(self, key: str, body: bytes):
+        try:
+            self.backend.set(key, body, self.ttl)
+        except Exception as e:
+            logging.warning(f'Response cache write failed: {e}')
+
+    def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        if tags:
+            self.backend.bump(tags)
+
+
+def get_response_cache(app) -> Optional[ResponseCache]:
+    """The app's response cache, created on first use; None when caching is disabled."""
+    config = app.config
+    if not config.get('RESPONSE_CACHE_ENABLED', True):
+        return None
+    cache = app.extensions.get('response_cache')
+    if cache is None:
+        ttl = config.get('RESPONSE_CACHE_TTL', 300)
+        if config.get('RESPONSE_CACHE_BACKEND', 'memory') == 'redis':
+            backend = RedisBackend(config['RESPONSE_CACHE_URL'])
+        else:
+            backend = MemoryBackend(config.get('RESPONSE_CACHE_SIZE', 2048))
+            # Other processes' commits never reach this backend, so only the TTL bounds staleness
+            ttl = min(ttl, config.get('RESPONSE_CACHE_MEMORY_TTL', 5))
+        cache = app.extensions.setdefault('response_cache', ResponseCache(backend, ttl))
+    return cache
+
+
+def cached_response(*shared_tags: str):
+    """Cache a GET view's 200 JSON body per user, invalidated through ``user:<id>``, ``shared_tags`` and ``all``."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = session.get('user_id')
+            cache = get_response_cache(current_app) if user_id and request.method == 'GET' else None
+            if cache is None:
+                return view(*args, **kwargs)
+            key = cache.key(request.path, user_id, request.query_string, [f'user:{user_id}', *shared_tags, 'all'])
+            body = cache.get(key)
+            if body is not None:
+                response = current_app.response_class(body, status=200, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.is_json:
+                cache.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def emit(session_, event_name: str, **ids):
+    """Queue the tags of a domain event; they are invalidated when the session commits."""
+    pending = session_.info.setdefault(_PENDING_KEY, set())
+    for template in EVENT_TAGS[event_name]:
+        try:
+            tag = template.format(**ids)
+        except KeyError:
+            continue
+        if not tag.endswith(':None'):
+            pending.add(tag)
+
+
+def _scored(session_, obj) -> bool:
+    if obj in session_.new:
+        return obj.score is not None
+    return obj in session_.deleted or inspect(obj).attrs.score.history.has_changes()
+
+
+def _lookup(connection, query, ids) -> Dict:
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return {}
+    return {row[0]: row[1:] for row in connection.execute(query(ids))}
+
+
+def _emit_for(session_, rows):
+    """Translate changed rows, given as ``(model, row, scored)``, into domain events.
+
+    ``row`` is an ORM object from a flush or a result row with the same
+    attribute names from a bulk statement.
+    """
+    by_assessment, by_attempt, by_problem = [], [], []
+    for model, row, scored in rows:
+        if issubclass(model, AssessmentAttempt):
+            name = 'attempt_scored' if scored else 'attempt_changed'
+            by_assessment.append((row.assessment_id, name, {'interviewee_id': row.interviewee_id}))
+        elif issubclass(model, AssessmentQuestion):
+            by_assessment.append((row.assessment_id, 'catalog_changed', {}))
+        elif issubclass(model, (AssessmentReview, CandidateFeedback)):
+            by_attempt.append((row.attempt_id, 'review_changed', {'recruiter_id': row.recruiter_id}))
+        elif issubclass(model, PracticeProblemAttempt):
+            by_problem.append((row.problem_id, 'practice_attempted', {'user_id': row.user_id}))
+        elif issubclass(model, Interview):
+            emit(session_, 'interview_changed', interviewee_id=row.interviewee_id, recruiter_id=row.recruiter_id)
+        elif issubclass(model, (Assessment, Category, PracticeProblem)):
+            emit(session_, 'catalog_changed', recruiter_id=row.recruiter_id)
+        elif issubclass(model, Message):
+            emit(session_, 'message_sent', sender_id=row.sender_id, receiver_id=row.receiver_id)
+        elif issubclass(model, (IntervieweeProfile, RecruiterProfile)):
+            emit(session_, 'profile_changed', user_id=row.user_id)
+        elif issubclass(model, User):
+            state = inspect(row, raiseerr=False)
+            emit(session_, 'user_changed', user_id=state.identity[0] if state is not None and state.identity else row.id)
+    if not (by_assessment or by_attempt or by_problem):
+        return
+    connection = session_.connection()
+    assessments = _lookup(connection, lambda ids: select(Assessment.id, Assessment.recruiter_id)
+                          .where(Assessment.id.in_(ids)), [a for a, _, _ in by_assessment])
+    attempts = _lookup(connection, lambda ids: select(AssessmentAttempt.id, AssessmentAttempt.interviewee_id,
+                                                      Assessment.recruiter_id)
+                       .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+                       .where(AssessmentAttempt.id.in_(ids)), [a for a, _, _ in by_attempt])
+    problems = _lookup(connection, lambda ids: select(PracticeProblem.id, PracticeProblem.recruiter_id)
+                       .where(PracticeProblem.id.in_(ids)), [p for p, _, _ in by_problem])
+    for assessment_id, name, ids in by_assessment:
+        emit(session_, name, recruiter_id=assessments.get(assessment_id, (None,))[0], **ids)
+    for attempt_id, name, ids in by_attempt:
+        interviewee_id, recruiter_id = attempts.get(attempt_id, (None, None))
+        emit(session_, name, interviewee_id=interviewee_id, **{'recruiter_id': recruiter_id, **ids})
+    for problem_id, name, ids in by_problem:
+        emit(session_, name, recruiter_id=problems.get(problem_id, (None,))[0], **ids)
+
+
+def _flushed(session_, objects):
+    return [(type(o), o, isinstance(o, AssessmentAttempt) and _scored(session_, o)) for o in objects]
+
+
+def _before_flush(session_, flush_context, instances):
+    # Changed and deleted rows are still readable here; new rows get their keys during the flush
+    changed = [o for o in session_.dirty if isinstance(o, _TRACKED) and session_.is_modified(o)]
+    changed.extend(o for o in session_.deleted if isinstance(o, _TRACKED))
+    if changed:
+        _emit_for(session_, _flushed(session_, changed))
+
+
+def _after_flush(session_, flush_context):
+    created = [o for o in session_.new if isinstance(o, _TRACKED)]
+    if created:
+        _emit_for(session_, _flushed(session_, created))
+
+
+def _on_execute(state):
+    """Bulk UPDATE/DELETE: read the owners of the rows it is about to touch and emit their events."""
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    model = state.bind_mapper.class_
+    if not issubclass(model, _TRACKED):
+        return
+    whereclause = state.statement.whereclause
+    columns = next((columns for base, columns in _OWNER_COLUMNS.items() if issubclass(model, base)), None)
+    if whereclause is None or columns is None:
+        emit(state.session, 'bulk_change')
+        return
+    rows = state.session.connection().execute(
+        select(*(getattr(model, name) for name in columns)).where(whereclause)
+    ).all()
+    # Bulk statements do not say whether a score moved, so attempts count as rescored
+    _emit_for(state.session, [(model, row, True) for row in rows])
+
+
+def _after_commit(session_):
+    tags = session_.info.pop(_PENDING_KEY, None)
+    if tags and has_app_context():
+        cache = get_response_cache(current_app)
+        if cache is not None:
+            try:
+                cache.invalidate(tags)
+            except Exception as e:
+                logging.error(f'Response cache invalidation failed: {e}')
+
+
+def _after_rollback(session_):
+    session_.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    """Publish domain events from ORM changes so cached responses are invalidated on commit."""
+    if not event.contains(db.session, 'after_commit', _after_commit):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'do_orm_execute', _on_execute)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -1,22 +1,34 @@
 import os
 from flask import Blueprint, request, jsonify, session, current_app, g
-from .models import db, User, IntervieweeProfile, RecruiterProfile, Assessment, AssessmentQuestion, AssessmentAttempt, AssessmentAttemptAnswer, AssessmentFeedback, CandidateFeedback, CodeEvaluationResult, AssessmentReview, AssessmentReviewAnswer, Category, PracticeProblem, PracticeProblemAttempt, PracticeCategorySession, PracticeCategorySessionAttempt, Message, MessageAttachment, Conversation, Notification, RecruiterNotificationSettings, IntervieweeNotificationSettings, Interview, Feedback, AssessmentInvitation
+from .models import db, User, IntervieweeProfile, RecruiterProfile, Assessment, AssessmentQuestion, AssessmentAttempt, AssessmentAttemptAnswer, AssessmentFeedback, CandidateFeedback, CodeEvaluationResult, AssessmentReview, AssessmentReviewAnswer, Category, PracticeProblem, PracticeProblemAttempt, PracticeCategorySession, PracticeCategorySessionAttempt, Message, MessageAttachment, Conversation, Notification, RecruiterNotificationSettings, IntervieweeNotificationSettings, Interview, Feedback, AssessmentInvitation, GradingJob
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
 import uuid
 import json
 import smtplib
 from email.mime.text import MIMEText
-from sqlalchemy import func
-import subprocess
-import tempfile
+from sqlalchemy import func, select
 from datetime import datetime, timezone, timedelta
 import time
 import logging
 import secrets
 
 from .codewars_integration import import_codewars_challenge, search_codewars_challenges
+from .analytics import InvalidAnalyticsQuery, parse_window, recruiter_analytics
+from .assessments import MAX_BULK_DELETE, assessment_counters, delete_assessments, question_counts, question_to_dict, sync_questions
+from .auth import current_user, login_required, role_required
+from .candidates import CANDIDATE_LIST_PARAMS, InvalidCandidateQuery, build_candidates, candidate_details, candidate_rows, interviewee_ids, page_candidates
+from .dashboard_stats import recent_candidate_activity, recruiter_dashboard_stats, upcoming_interviews
+from .evaluation import EvaluationRequest, evaluate, get_grading_cache, parse_test_cases, run_single
+from .grading import apply_answer_evaluation, enqueue_answer_grading, enqueue_practice_grading, finish_answer_jobs, job_to_dict, notify_grading_workers, practice_points, practice_streak, previous_practice_attempt, wants_async_grading
+from .messaging import InvalidMessageQuery, conversation_inbox, conversation_participant, page_messages, unread_message_count
+from .question_cache import get_question_cache, parsed_problem, parsed_question
+from .response_cache import cached_response
+from .scoring import auto_points, final_points, question_answers, review_auto_scores, score_attempt, score_review
+from .session_cache import get_session_cache
+from . import leaderboard
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -287,13 +299,9 @@ def reset_password():
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
-    session_id = request.cookies.get('session')
-    if session_id:
-        from .models import db
-        db.session.execute(
-            db.text("DELETE FROM session WHERE session_id = :sid"),
-            {"sid": session_id}
-        )
+    end_session = getattr(current_app.session_interface, 'end_session', None)
+    if request.cookies.get('session') and end_session:
+        end_session(session)
         db.session.commit()
     session.clear()
     response = jsonify({'message': 'Logged out successfully'})
@@ -301,16 +309,12 @@ def logout():
     return response, 200
 
 @auth_bp.route('/onboarding', methods=['POST'])
+@role_required('interviewee')
 def onboarding():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     data = request.get_json()
     # Create or update interviewee profile
-    profile = IntervieweeProfile.query.filter_by(user_id=user.id).first()
+    profile = user.interviewee_profile
     if not profile:
         return jsonify({'error': 'Profile not found'}), 404
     # Only update skills and onboarding_completed
@@ -419,27 +423,23 @@ def debug_session():
     }), 200
 
 @auth_bp.route('/me', methods=['GET'])
+@login_required
 def get_current_user():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     result = {
         'id': user.id,
         'email': user.email,
         'role': user.role,
     }
     if user.role == 'interviewee':
-        profile = IntervieweeProfile.query.filter_by(user_id=user.id).first()
+        profile = user.interviewee_profile
         if profile:
             result['first_name'] = profile.first_name
             result['last_name'] = profile.last_name
             result['onboarding_completed'] = profile.onboarding_completed  # Add this line
             result['avatar'] = profile.avatar  # Add avatar field
     elif user.role == 'recruiter':
-        profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+        profile = user.recruiter_profile
         if profile:
             result['first_name'] = profile.first_name
             result['last_name'] = profile.last_name
@@ -448,16 +448,12 @@ def get_current_user():
     return jsonify(result), 200
 
 @auth_bp.route('/profile', methods=['GET', 'POST'])
+@login_required
 def profile():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     if request.method == 'GET':
         if user.role == 'interviewee':
-            profile = IntervieweeProfile.query.filter_by(user_id=user.id).first()
+            profile = user.interviewee_profile
             if not profile:
                 return jsonify({'error': 'Profile not found'}), 404
             return jsonify({
@@ -481,7 +477,7 @@ def profile():
                 'work_type': profile.work_type,
             }), 200
         elif user.role == 'recruiter':
-            profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+            profile = user.recruiter_profile
             if not profile:
                 return jsonify({'error': 'Profile not found'}), 404
             return jsonify({
@@ -505,7 +501,7 @@ def profile():
     elif request.method == 'POST':
         data = request.get_json()
         if user.role == 'interviewee':
-            profile = IntervieweeProfile.query.filter_by(user_id=user.id).first()
+            profile = user.interviewee_profile
             if not profile:
                 return jsonify({'error': 'Profile not found'}), 404
             profile.first_name = data.get('first_name', profile.first_name)
@@ -527,7 +523,7 @@ def profile():
             db.session.commit()
             return jsonify({'message': 'Profile updated successfully'}), 200
         elif user.role == 'recruiter':
-            profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+            profile = user.recruiter_profile
             if not profile:
                 return jsonify({'error': 'Profile not found'}), 404
             profile.first_name = data.get('first_name', profile.first_name)
@@ -549,13 +545,9 @@ def profile():
 
 # --- Interviewee Notification Settings ---
 @auth_bp.route('/settings/notifications', methods=['GET', 'POST'])
+@login_required
 def notifications_settings():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     if user.role == 'interviewee':
         from .models import IntervieweeNotificationSettings
         if request.method == 'GET':
@@ -652,13 +644,9 @@ def notifications_settings():
 
 # --- Interviewee Privacy Settings ---
 @auth_bp.route('/settings/privacy', methods=['GET', 'POST'])
+@role_required('interviewee')
 def interviewee_privacy():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     from .models import IntervieweePrivacySettings
     if request.method == 'GET':
         settings = IntervieweePrivacySettings.query.filter_by(user_id=user.id).first()
@@ -693,13 +681,9 @@ def interviewee_privacy():
 
 # --- Interviewee Security: Password Change and 2FA ---
 @auth_bp.route('/settings/security', methods=['POST'])
+@role_required('interviewee')
 def interviewee_security():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     data = request.get_json()
     # Password change
     if 'current_password' in data and 'new_password' in data:
@@ -721,13 +705,10 @@ def interviewee_security():
 
 # --- Company Logo Upload Endpoint ---
 @auth_bp.route('/profile/company_logo', methods=['POST'])
+@role_required('recruiter')
 def upload_company_logo():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
+    user_id = user.id
     if 'logo' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     file = request.files['logo']
@@ -743,7 +724,7 @@ def upload_company_logo():
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     filepath = os.path.join(UPLOAD_FOLDER, filename)
     file.save(filepath)
-    profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+    profile = user.recruiter_profile
     if profile and profile.company_logo:
         old_path = os.path.join(UPLOAD_FOLDER, profile.company_logo)
         if os.path.exists(old_path):
@@ -755,13 +736,9 @@ def upload_company_logo():
 
 # --- Security: Password Change and 2FA ---
 @auth_bp.route('/settings/security', methods=['POST'])
+@role_required('recruiter')
 def recruiter_security():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     data = request.get_json()
     # Password change
     if 'current_password' in data and 'new_password' in data:
@@ -782,13 +759,10 @@ def recruiter_security():
     return jsonify({'message': 'Security settings updated successfully'}), 200
 
 @auth_bp.route('/profile/avatar', methods=['POST'])
+@login_required
 def upload_avatar():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
+    user_id = user.id
     if 'avatar' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     file = request.files['avatar']
@@ -806,9 +780,9 @@ def upload_avatar():
     file.save(filepath)
     # Remove old avatar if exists
     if user.role == 'interviewee':
-        profile = IntervieweeProfile.query.filter_by(user_id=user.id).first()
+        profile = user.interviewee_profile
     else:
-        profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+        profile = user.recruiter_profile
     if profile and profile.avatar:
         old_path = os.path.join(UPLOAD_FOLDER, profile.avatar)
         if os.path.exists(old_path):
@@ -820,15 +794,11 @@ def upload_avatar():
     return jsonify({'message': 'Avatar updated successfully', 'avatar': filename}), 200
 
 @auth_bp.route('/assessments', methods=['POST', 'OPTIONS'])
+@role_required('recruiter')
 def create_assessment():
     if request.method == 'OPTIONS':
         return '', 200
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     data = request.get_json()
     try:
         assessment = Assessment(
@@ -871,15 +841,11 @@ def create_assessment():
         return jsonify({'error': 'Failed to create assessment', 'details': str(e)}), 400
 
 @auth_bp.route('/assessments/<int:assessment_id>', methods=['GET', 'PUT', 'DELETE', 'OPTIONS'], strict_slashes=False)
+@role_required('recruiter')
 def assessment_operations(assessment_id):
     if request.method == 'OPTIONS':
         return '', 200
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     
     assessment = Assessment.query.filter_by(id=assessment_id, recruiter_id=user.id).first()
     if not assessment:
@@ -905,15 +871,15 @@ def assessment_operations(assessment_id):
                     'id': q.id,
                     'type': q.type,
                     'question': q.question,
-                    'options': json.loads(q.options) if q.options else [],
-                    'correct_answer': json.loads(q.correct_answer) if q.correct_answer else None,
+                    'options': parsed.options,
+                    'correct_answer': parsed.correct_answer,
                     'points': q.points,
                     'explanation': q.explanation,
                     'starter_code': q.starter_code,
                     'solution': q.solution,
                     'answer': q.answer,  # New: return answer for short-answer
                     'test_cases': q.test_cases if q.type == 'coding' else None,
-                } for q in assessment.questions
+                } for q, parsed in ((q, parsed_question(q)) for q in assessment.questions)
             ],
             'category_id': assessment.category_id # Add category_id to response
         }), 200
@@ -933,95 +899,16 @@ def assessment_operations(assessment_id):
         assessment.deadline = data.get('deadline', assessment.deadline)
         assessment.category_id = data.get('category_id', assessment.category_id) # Update category_id
 
-        # --- PATCH: Safe update logic for questions ---
-        incoming_questions = data.get('questions', [])
-        incoming_ids = set(q.get('id') for q in incoming_questions if q.get('id'))
-        existing_questions = {q.id: q for q in assessment.questions}
-
-        # 1. Update existing questions and add new ones
-        for q in incoming_questions:
-            if q.get('id') and q.get('id') in existing_questions:
-                # Update existing
-                question = existing_questions[q['id']]
-                question.type = q.get('type', question.type)
-                question.question = q.get('question', question.question)
-                question.options = json.dumps(q.get('options')) if q.get('options') else None
-                question.correct_answer = json.dumps(q.get('correctAnswer')) if q.get('correctAnswer') is not None else None
-                question.points = q.get('points', question.points)
-                question.explanation = q.get('explanation', question.explanation)
-                question.starter_code = q.get('starter_code', question.starter_code)
-                question.solution = q.get('solution', question.solution)
-                question.answer = q.get('answer', question.answer)
-                question.test_cases = q.get('test_cases') if q.get('type') == 'coding' else None
-            else:
-                # Add new
-                question = AssessmentQuestion(
-                    assessment_id=assessment.id,
-                    type=q.get('type'),
-                    question=q.get('question'),
-                    options=json.dumps(q.get('options')) if q.get('options') else None,
-                    correct_answer=json.dumps(q.get('correctAnswer')) if q.get('correctAnswer') is not None else None,
-                    points=q.get('points'),
-                    explanation=q.get('explanation'),
-                    starter_code=q.get('starter_code'),
-                    solution=q.get('solution'),
-                    answer=q.get('answer'),
-                    test_cases=q.get('test_cases') if q.get('type') == 'coding' else None,
-                )
-                db.session.add(question)
-
-        # 2. Delete questions that are not in the incoming list and have no answers
-        for qid, question in existing_questions.items():
-            if qid not in incoming_ids:
-                has_answers = AssessmentAttemptAnswer.query.filter_by(question_id=qid).first()
-                if not has_answers:
-                    db.session.delete(question)
-                # else: skip deletion to preserve submissions
+        # Only questions whose content changed are written; answered questions are never deleted
+        questions = sync_questions(assessment, data.get('questions', []))
 
         db.session.commit()
-        return jsonify({'message': 'Assessment updated', 'assessment_id': assessment.id}), 200
+        return jsonify({'message': 'Assessment updated', 'assessment_id': assessment.id, 'questions': questions}), 200
     
     elif request.method == 'DELETE':
-        # DELETE method - handle foreign key constraints properly
+        # DELETE method - dependent rows go first, in set-based statements
         try:
-            # Get all attempts for this assessment
-            attempts = AssessmentAttempt.query.filter_by(assessment_id=assessment.id).all()
-            
-            for attempt in attempts:
-                # Delete review answers first (they reference reviews)
-                for review in attempt.reviews:
-                    AssessmentReviewAnswer.query.filter_by(review_id=review.id).delete()
-                
-                # Delete reviews (they reference attempts)
-                for review in attempt.reviews:
-                    db.session.delete(review)
-                
-                # Delete candidate feedback (they reference attempts)
-                for feedback in attempt.candidate_feedbacks:
-                    db.session.delete(feedback)
-                
-                # Delete code evaluation results (they reference attempt answers)
-                for answer in attempt.answers:
-                    CodeEvaluationResult.query.filter_by(attempt_answer_id=answer.id).delete()
-                
-                # Delete attempt answers (they reference attempts)
-                for answer in attempt.answers:
-                    db.session.delete(answer)
-            
-            # Now delete all attempts
-            AssessmentAttempt.query.filter_by(assessment_id=assessment.id).delete()
-            
-            # Delete assessment feedback
-            AssessmentFeedback.query.filter_by(assessment_id=assessment.id).delete()
-            
-            # Update interviews that reference this assessment (set assessment_id to NULL)
-            Interview.query.filter_by(assessment_id=assessment.id).update({Interview.assessment_id: None})
-            
-            # Delete assessment invitations
-            AssessmentInvitation.query.filter_by(assessment_id=assessment.id).delete()
-            
-            # Finally delete the assessment
-            db.session.delete(assessment)
+            delete_assessments([assessment.id])
             db.session.commit()
             return jsonify({'message': 'Assessment deleted'}), 200
             
@@ -1029,48 +916,59 @@ def assessment_operations(assessment_id):
             db.session.rollback()
             return jsonify({'error': f'Failed to delete assessment: {str(e)}'}), 500
 
+@auth_bp.route('/assessments/bulk-delete', methods=['POST', 'OPTIONS'])
+@role_required('recruiter')
+def bulk_delete_assessments():
+    if request.method == 'OPTIONS':
+        return '', 200
+    ids = (request.get_json(silent=True) or {}).get('assessment_ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return jsonify({'error': 'assessment_ids must be a non-empty list of ids'}), 400
+    if len(ids) > MAX_BULK_DELETE:
+        return jsonify({'error': f'At most {MAX_BULK_DELETE} assessments can be deleted at once'}), 400
+    ids = set(ids)
+    owned = set(db.session.execute(
+        select(Assessment.id).where(Assessment.id.in_(ids), Assessment.recruiter_id == current_user().id)
+    ).scalars())
+    if owned != ids:
+        # All or nothing: one foreign or missing id rejects the whole request
+        return jsonify({'error': 'Assessment not found', 'missing_ids': sorted(ids - owned)}), 404
+    try:
+        deleted = delete_assessments(owned)
+        db.session.commit()
+        return jsonify({'message': 'Assessments deleted', 'deleted': deleted}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to delete assessments: {str(e)}'}), 500
+
 @auth_bp.route('/assessments', methods=['GET', 'OPTIONS'])
+@role_required('recruiter')
 def list_assessments():
     if request.method == 'OPTIONS':
         return '', 200
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     # Support filtering for test assessments
     is_test = request.args.get('is_test')
     query = Assessment.query.filter_by(recruiter_id=user.id)
     if is_test is not None:
         query = query.filter_by(is_test=(is_test.lower() == 'true'))
+    summary = request.args.get('fields') == 'summary'
+    if not summary:
+        query = query.options(selectinload(Assessment.questions))
     assessments = query.order_by(Assessment.created_at.desc()).all()
+    ids = [a.id for a in assessments]
+    counters = assessment_counters(ids)
+    counts = question_counts(ids) if summary else {}
     result = []
     for a in assessments:
-        # Get attempt statistics
-        total_attempts = AssessmentAttempt.query.filter_by(assessment_id=a.id).count()
-        completed_attempts = AssessmentAttempt.query.filter_by(assessment_id=a.id, status='completed').count()
-        
-        # Get invitation statistics (only for regular assessments)
-        invitation_stats = {}
-        if not a.is_test:
-            total_invitations = AssessmentInvitation.query.filter_by(assessment_id=a.id).count()
-            accepted_invitations = AssessmentInvitation.query.filter_by(
-                assessment_id=a.id, 
-                status='accepted'
-            ).count()
-            pending_invitations = AssessmentInvitation.query.filter_by(
-                assessment_id=a.id, 
-                status='sent'
-            ).filter(AssessmentInvitation.expires_at > datetime.utcnow()).count()
-            
-            invitation_stats = {
-                'total_invitations': total_invitations,
-                'accepted_invitations': accepted_invitations,
-                'pending_invitations': pending_invitations
-            }
-        
-        result.append({
+        stats = counters[a.id]
+        # Invitation statistics only apply to regular assessments
+        invitation_stats = {} if a.is_test else {
+            'total_invitations': stats['total_invitations'],
+            'accepted_invitations': stats['accepted_invitations'],
+            'pending_invitations': stats['pending_invitations']
+        }
+        item = {
             'id': a.id,
             'title': a.title,
             'description': a.description,
@@ -1085,32 +983,22 @@ def list_assessments():
             'deadline': a.deadline if hasattr(a, 'deadline') else None,
             'updated_at': a.updated_at.isoformat(),
             'is_test': a.is_test,
-            'total_attempts': total_attempts,
-            'completed_attempts': completed_attempts,
+            'total_attempts': stats['total_attempts'],
+            'completed_attempts': stats['completed_attempts'],
             'invitation_stats': invitation_stats,
-            'questions': [
-                {
-                    'id': q.id,
-                    'type': q.type,
-                    'question': q.question,
-                    'options': json.loads(q.options) if q.options else [],
-                    'correct_answer': json.loads(q.correct_answer) if q.correct_answer else None,
-                    'points': q.points,
-                    'explanation': q.explanation,
-                    'starter_code': q.starter_code,
-                    'solution': q.solution,
-                    'answer': q.answer,
-                    'test_cases': q.test_cases,  # PATCH: include test_cases for coding questions
-                } for q in a.questions
-            ],
             'category_id': a.category_id # Add category_id to response
-        })
+        }
+        if summary:
+            item['question_count'] = counts.get(a.id, 0)
+        else:
+            item['questions'] = [question_to_dict(q) for q in a.questions]
+        result.append(item)
     return jsonify(result), 200
 
 # Add a public endpoint for interviewees to list all test assessments
 @auth_bp.route('/public/test-assessments', methods=['GET'])
 def public_test_assessments():
-    tests = Assessment.query.filter_by(is_test=True, status='active').order_by(Assessment.created_at.desc()).all()
+    tests = Assessment.query.options(selectinload(Assessment.questions)).filter_by(is_test=True, status='active').order_by(Assessment.created_at.desc()).all()
     result = []
     for a in tests:
         result.append({
@@ -1128,26 +1016,13 @@ def public_test_assessments():
             'deadline': a.deadline if hasattr(a, 'deadline') else None,
             'updated_at': a.updated_at.isoformat(),
             'is_test': a.is_test,
-            'questions': [
-                {
-                    'id': q.id,
-                    'type': q.type,
-                    'question': q.question,
-                    'options': json.loads(q.options) if q.options else [],
-                    'correct_answer': json.loads(q.correct_answer) if q.correct_answer else None,
-                    'points': q.points,
-                    'explanation': q.explanation,
-                    'starter_code': q.starter_code,
-                    'solution': q.solution,
-                    'answer': q.answer,
-                    'test_cases': q.test_cases,  # PATCH: include test_cases for coding questions
-                } for q in a.questions
-            ],
+            'questions': [question_to_dict(q) for q in a.questions],
             'category_id': a.category_id # Add category_id to response
         })
     return jsonify(result), 200
 
 @auth_bp.route('/send-invite', methods=['POST'])
+@role_required('recruiter')
 def send_invite():
     data = request.get_json()
     recipients = data.get('email')
@@ -1162,13 +1037,8 @@ def send_invite():
     if isinstance(recipients, str):
         recipients = [recipients]
 
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
+    user_id = user.id
 
     # Verify assessment exists and belongs to recruiter
     assessment = Assessment.query.filter_by(id=assessment_id, recruiter_id=user_id).first()
@@ -1237,13 +1107,9 @@ def send_invite():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/settings/delete-account', methods=['POST'])
+@login_required
 def delete_account():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     try:
         # Delete related data based on role
         if user.role == 'interviewee':
@@ -1274,6 +1140,9 @@ def delete_account():
             # TODO: Delete recruiter's messages, invites, etc. if applicable
         # Delete user
         db.session.delete(user)
+        end_session = getattr(current_app.session_interface, 'end_session', None)
+        if end_session:
+            end_session(session)
         db.session.commit()
         session.clear()
         response = jsonify({'message': 'Account deleted successfully'})
@@ -1286,13 +1155,9 @@ def delete_account():
 # --- INTERVIEWEE TEST ATTEMPT ENDPOINTS ---
 
 @auth_bp.route('/interviewee/assessments/<int:assessment_id>/start', methods=['POST'])
+@role_required('interviewee')
 def start_assessment_attempt(assessment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     assessment = Assessment.query.filter_by(id=assessment_id, is_test=True, status='active').first()
     if not assessment:
         return jsonify({'error': 'Assessment not found'}), 404
@@ -1327,13 +1192,9 @@ def start_assessment_attempt(assessment_id):
     return jsonify({'attempt_id': attempt.id, 'num_attempt': attempt.num_attempt}), 201
 
 @auth_bp.route('/interviewee/assessments/<int:assessment_id>/attempt', methods=['GET'])
+@role_required('interviewee')
 def get_current_attempt(assessment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     attempt = AssessmentAttempt.query.filter_by(interviewee_id=user.id, assessment_id=assessment_id).order_by(AssessmentAttempt.num_attempt.desc()).first()
     if not attempt:
         return jsonify({'error': 'No attempt found'}), 404
@@ -1352,13 +1213,9 @@ def get_current_attempt(assessment_id):
     }), 200
 
 @auth_bp.route('/interviewee/attempts/<int:attempt_id>/answer', methods=['POST'])
+@role_required('interviewee')
 def submit_answer(attempt_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     attempt = AssessmentAttempt.query.get(attempt_id)
     if not attempt or attempt.interviewee_id != user.id:
         return jsonify({'error': 'Attempt not found'}), 404
@@ -1380,8 +1237,9 @@ def submit_answer(attempt_id):
     test_case_score = None
     if question.type == 'multiple-choice':
         try:
-            correct_index = json.loads(question.correct_answer)
-            options = json.loads(question.options) if question.options else []
+            parsed = parsed_question(question)
+            correct_index = parsed.correct_answer
+            options = parsed.options
             
             # Convert user answer to index if it's a text option
             user_answer_index = None
@@ -1416,86 +1274,67 @@ def submit_answer(attempt_id):
             is_correct = None
     elif question.type == 'essay':
         is_correct = None
-    elif question.type == 'coding':
-        # Evaluate code against test cases
-        try:
-            test_cases = json.loads(question.test_cases) if question.test_cases else []
-        except Exception:
-            test_cases = []
-        code = answer
-        language = 'javascript'
-        passed_count = 0
-        total_count = len(test_cases)
-        if total_count > 0:
-            for tc in test_cases:
-                input_val = tc.get('input', '')
-                expected = tc.get('expectedOutput', '')
-                js_code = f"""
-const readline = () => {json.dumps(input_val)};
-{code}
-"""
-                with tempfile.NamedTemporaryFile(suffix='.js', delete=False, mode='w') as f:
-                    f.write(js_code)
-                    temp_path = f.name
-                try:
-                    proc = subprocess.run(['node', temp_path], capture_output=True, text=True, timeout=5)
-                    output = proc.stdout.strip()
-                    if output == str(expected):
-                        passed_count += 1
-                except subprocess.TimeoutExpired:
-                    pass
-                finally:
-                    os.remove(temp_path)
-            test_case_score = passed_count / total_count if total_count > 0 else 0
-            is_correct = (test_case_score == 1.0)
-        else:
-            test_case_score = 0
-            is_correct = False
+    evaluation = None
+    test_cases = []
+    grade_async = False
+    language = data.get('language', 'javascript')
+    if question.type == 'coding':
+        # Evaluate code against test cases, now or on a grading worker
+        test_cases = list(parsed_question(question).test_cases)
+        grade_async = bool(test_cases) and wants_async_grading(data)
+        if test_cases and not grade_async:
+            evaluation = evaluate(EvaluationRequest(code=answer, language=language, test_cases=test_cases,
+                                                    continue_after_timeout=True))
     if existing:
         existing.answer = answer
         existing.is_correct = is_correct
         existing.test_case_score = test_case_score
         existing.answered_at = func.now()
+        answer_row = existing
     else:
-        db.session.add(AssessmentAttemptAnswer(
+        answer_row = AssessmentAttemptAnswer(
             attempt_id=attempt.id,
             question_id=question_id,
             answer=answer,
             is_correct=is_correct,
             test_case_score=test_case_score
-        ))
+        )
+        db.session.add(answer_row)
     attempt.current_question = data.get('next_question', attempt.current_question)
+    job = None
+    if question.type == 'coding':
+        db.session.flush()
+        if grade_async:
+            job = enqueue_answer_grading(answer_row, language, user.id)
+        else:
+            apply_answer_evaluation(answer_row, evaluation, len(test_cases))
+            is_correct = answer_row.is_correct
+            test_case_score = answer_row.test_case_score
     db.session.commit()
+    if job:
+        notify_grading_workers()
+        return jsonify({
+            'message': 'Answer saved, grading queued',
+            'job_id': job.job_id,
+            'status': job.status,
+            'is_correct': None,
+            'test_case_score': None
+        }), 202
     return jsonify({'message': 'Answer saved', 'is_correct': is_correct, 'test_case_score': test_case_score}), 200
 
 @auth_bp.route('/interviewee/attempts/<int:attempt_id>/submit', methods=['POST'])
+@role_required('interviewee')
 def submit_attempt(attempt_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     attempt = AssessmentAttempt.query.get(attempt_id)
     if not attempt or attempt.interviewee_id != user.id:
         return jsonify({'error': 'Attempt not found'}), 404
     if attempt.status != 'in_progress':
         return jsonify({'error': 'Attempt not in progress'}), 400
+    # Coding answers may still be waiting on a grading worker
+    finish_answer_jobs(a.id for a in attempt.answers)
     assessment = Assessment.query.get(attempt.assessment_id)
-    total_points = 0
-    earned_points = 0
-    for q in assessment.questions:
-        total_points += q.points
-        ans = next((a for a in attempt.answers if a.question_id == q.id), None)
-        if q.type == 'coding':
-            if ans and ans.test_case_score is not None:
-                earned_points += q.points * ans.test_case_score
-        elif q.type == 'essay':
-            pass
-        else:
-            if ans and ans.is_correct:
-                earned_points += q.points
-    score = (earned_points / total_points * 100) if total_points > 0 else 0
+    score = score_attempt(attempt).score
     passed = score >= assessment.passing_score
     attempt.score = score
     attempt.passed = passed
@@ -1514,13 +1353,9 @@ def submit_attempt(attempt_id):
 
 
 @auth_bp.route('/interviewee/assessments/<int:assessment_id>/attempts', methods=['GET'])
+@role_required('interviewee')
 def get_attempts_for_assessment(assessment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     attempts = AssessmentAttempt.query.filter_by(interviewee_id=user.id, assessment_id=assessment_id).order_by(AssessmentAttempt.num_attempt.desc()).all()
     result = []
     for a in attempts:
@@ -1537,13 +1372,9 @@ def get_attempts_for_assessment(assessment_id):
     return jsonify(result), 200
 
 @auth_bp.route('/interviewee/attempts/summary', methods=['GET'])
+@role_required('interviewee')
 def get_attempts_summary():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     attempts = AssessmentAttempt.query.filter_by(interviewee_id=user.id).order_by(AssessmentAttempt.started_at.desc()).all()
     result = []
     for a in attempts:
@@ -1602,7 +1433,7 @@ def assessment_feedback(assessment_id):
 def candidate_feedback(attempt_id):
     user_id = session.get('user_id')
     if request.method == 'POST':
-        user = User.query.get(user_id)
+        user = current_user()
         if not user or user.role != 'recruiter':
             return jsonify({'error': 'Unauthorized'}), 403
         data = request.get_json()
@@ -1661,13 +1492,20 @@ def code_evaluation(attempt_answer_id):
             'created_at': cer.created_at
         }), 200
 
+@auth_bp.route('/grading/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_grading_job(job_id):
+    user_id = current_user().id
+    job = GradingJob.query.filter_by(job_id=job_id).first()
+    if not job or job.user_id != user_id:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_to_dict(job)), 200
+
 # --- ANALYTICS ENDPOINTS ---
 @auth_bp.route('/analytics/interviewee/summary', methods=['GET'])
+@role_required('interviewee')
 def interviewee_analytics():
-    user_id = session.get('user_id')
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     attempts = AssessmentAttempt.query.filter_by(interviewee_id=user_id).all()
     total = len(attempts)
     completed = [a for a in attempts if a.status == 'completed']
@@ -1682,12 +1520,8 @@ def interviewee_analytics():
 
 
 @auth_bp.route('/analytics/recruiter/assessment/<int:assessment_id>', methods=['GET'])
+@role_required('recruiter')
 def recruiter_assessment_analytics(assessment_id):
-    user_id = session.get('user_id')
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     attempts = AssessmentAttempt.query.filter_by(assessment_id=assessment_id).all()
     total = len(attempts)
     completed = [a for a in attempts if a.status == 'completed']
@@ -1711,195 +1545,50 @@ def run_code():
         code = data.get('code', '')
         language = data.get('language', 'javascript')
         test_cases = data.get('test_cases', [])
-        results = []
-        if language == 'javascript':
-            if not test_cases:  # Run Code (single input)
-                input_val = data.get('input', '')
-                js_code = f"""
-const readline = () => {json.dumps(input_val)};
-{code}
-"""
-                with tempfile.NamedTemporaryFile(suffix='.js', delete=False, mode='w') as f:
-                    f.write(js_code)
-                    temp_path = f.name
-                try:
-                    proc = subprocess.run(['node', temp_path], capture_output=True, text=True, timeout=5)
-                    output = proc.stdout.strip()
-                    error = proc.stderr.strip()
-                    if error:
-                        return jsonify({'output': '', 'error': error}), 200
-                    return jsonify({'output': output, 'error': ''}), 200
-                except subprocess.TimeoutExpired:
-                    return jsonify({'output': '', 'error': 'Error: Code execution timed out (possible infinite loop)'}), 200
-                finally:
-                    os.remove(temp_path)
-            else:
-                timeout_occurred = False
-                timeout_error_result = None
-                for tc in test_cases:
-                    input_val = tc.get('input', '')
-                    expected = tc.get('expectedOutput', '')
-                    js_code = f"""
-const readline = () => {json.dumps(input_val)};
-{code}
-"""
-                    with tempfile.NamedTemporaryFile(suffix='.js', delete=False, mode='w') as f:
-                        f.write(js_code)
-                        temp_path = f.name
-                    try:
-                        proc = subprocess.run(['node', temp_path], capture_output=True, text=True, timeout=5)
-                        output = proc.stdout.strip()
-                        error = proc.stderr.strip()
-                        passed = (output == str(expected))
-                        results.append({
-                            'input': input_val,
-                            'expected': expected,
-                            'output': output,
-                            'error': error,
-                            'passed': passed,
-                            'raw_stdout': proc.stdout,
-                            'raw_stderr': proc.stderr,
-                        })
-                    except subprocess.TimeoutExpired:
-                        timeout_occurred = True
-                        timeout_error_result = {
-                            'input': input_val,
-                            'expected': expected,
-                            'output': '',
-                            'error': 'Error: Code execution timed out (possible infinite loop)',
-                            'passed': False,
-                            'raw_stdout': '',
-                            'raw_stderr': '',
-                        }
-                        break
-                    finally:
-                        os.remove(temp_path)
-                if timeout_occurred:
-                    return jsonify({'test_case_results': [], 'timeout': True, 'output': timeout_error_result['error']}), 200
-                # If all test cases failed due to a compile/runtime error, show a single error
-                if all(r['error'] and not r['output'] for r in results):
-                    return jsonify({'test_case_results': results, 'timeout': False}), 200
-                return jsonify({'test_case_results': results, 'timeout': False}), 200
-        # --- Python support ---
-        elif language == 'python':
-            import sys
-            import ast
-            def get_func_args(user_code):
-                import re
-                match = re.search(r'def ([a-zA-Z_][a-zA-Z0-9_]*)\(([^)]*)\)', user_code)
-                if match:
-                    args = match.group(2).replace(' ', '')
-                    return match.group(1), [a for a in args.split(',') if a]
-                return 'solution', ['s']
-            def wrap_python_code(user_code, func_name, arg_names):
-                parse_args = '\n    '.join([f'{a} = ast.literal_eval(inputs[{i}])' for i, a in enumerate(arg_names)])
-                args_str = ', '.join(arg_names)
-                return f"""{user_code}\nif __name__ == '__main__':\n    import sys\n    import ast\n    inputs = sys.stdin.read().strip().split('\\n')\n    {parse_args}\n    print({func_name}({args_str}))\n"""
-            func_name, arg_names = get_func_args(code)
-            if not test_cases:  # Run Code (single input)
-                input_val = data.get('input', '')
-                py_code = wrap_python_code(code, func_name, arg_names)
-                with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as f:
-                    f.write(py_code)
-                    temp_path = f.name
-                try:
-                    proc = subprocess.run(['python3', temp_path], input=input_val, capture_output=True, text=True, timeout=5)
-                    output = proc.stdout.strip()
-                    error = proc.stderr.strip()
-                    if error:
-                        return jsonify({'output': '', 'error': error, 'compile_error': True, 'code': py_code}), 200
-                    return jsonify({'output': output, 'error': '', 'code': py_code}), 200
-                except subprocess.TimeoutExpired:
-                    return jsonify({'output': '', 'error': 'Error: Code execution timed out (possible infinite loop)', 'compile_error': True, 'code': py_code}), 200
-                finally:
-                    os.remove(temp_path)
-            else:
-                # First, check for compile errors before running test cases
-                py_code = wrap_python_code(code, func_name, arg_names)
-                with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as f:
-                    f.write(py_code)
-                    temp_path = f.name
-                try:
-                    # Try to compile the code
-                    compile(open(temp_path).read(), temp_path, 'exec')
-                except Exception as e:
-                    error_msg = str(e)
-                    os.remove(temp_path)
-                    return jsonify({'test_case_results': [], 'timeout': False, 'output': '', 'error': error_msg, 'compile_error': True}), 200
-                os.remove(temp_path)
-                # If no compile error, run test cases
-                timeout_occurred = False
-                timeout_error_result = None
-                results = []
-                for tc in test_cases:
-                    input_val = tc.get('input', '')
-                    expected = tc.get('expectedOutput', '')
-                    py_code = wrap_python_code(code, func_name, arg_names)
-                    with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as f:
-                        f.write(py_code)
-                        temp_path = f.name
-                    try:
-                        proc = subprocess.run(['python3', temp_path], input=input_val, capture_output=True, text=True, timeout=5)
-                        output = proc.stdout.strip()
-                        error = proc.stderr.strip()
-                        if error:
-                            results.append({
-                                'input': input_val,
-                                'expected': expected,
-                                'output': 'Runtime Error',
-                                'error': '',
-                                'passed': False,
-                                'runtime_error': True,
-                                'raw_stdout': '',
-                                'raw_stderr': '',
-                            })
-                        else:
-                            # Ensure both are strings and strip whitespace for comparison
-                            output_str = str(output).strip()
-                            expected_str = str(expected).strip()
-                            passed = (output_str == expected_str)
-                            results.append({
-                                'input': input_val,
-                                'expected': expected,
-                                'output': output,
-                                'error': '',
-                                'passed': passed,
-                                'runtime_error': False,
-                                'raw_stdout': proc.stdout,
-                                'raw_stderr': proc.stderr,
-                            })
-                    except subprocess.TimeoutExpired:
-                        timeout_occurred = True
-                        timeout_error_result = {
-                            'input': input_val,
-                            'expected': expected,
-                            'output': 'Runtime Error',
-                            'error': '',
-                            'passed': False,
-                            'runtime_error': True,
-                            'raw_stdout': '',
-                            'raw_stderr': '',
-                        }
-                        break
-                    finally:
-                        os.remove(temp_path)
-                if timeout_occurred:
-                    return jsonify({'test_case_results': [], 'timeout': True, 'output': timeout_error_result['error']}), 200
-                if all(r['runtime_error'] for r in results):
-                    return jsonify({'test_case_results': results, 'timeout': False}), 200
-                return jsonify({'test_case_results': results, 'timeout': False}), 200
-        return jsonify({'output': '', 'error': 'Unsupported language'}), 400
+        if language not in ('javascript', 'python'):
+            return jsonify({'output': '', 'error': 'Unsupported language'}), 400
+        if not test_cases:  # Run Code (single input)
+            run = run_single(code, language, data.get('input', ''))
+            return jsonify(run.to_dict()), 200
+        started = time.perf_counter()
+        result = evaluate(EvaluationRequest(
+            code=code,
+            language=language,
+            test_cases=parse_test_cases(test_cases),
+            fail_fast=bool(data.get('fail_fast'))
+        ))
+        logging.debug(f"run-code: {len(test_cases)} {language} case(s) in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return jsonify(result.to_dict()), 200
     except Exception as e:
         return jsonify({'output': '', 'error': str(e)}), 200
 
+@auth_bp.route('/run-code/cache-stats', methods=['GET'])
+@role_required('recruiter')
+def grading_cache_stats():
+    cache = get_grading_cache(current_app._get_current_object())
+    if cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(cache.stats(), enabled=True)), 200
+
+@auth_bp.route('/session-cache/stats', methods=['GET'])
+@role_required('recruiter')
+def session_cache_stats():
+    cache = get_session_cache(current_app._get_current_object())
+    if cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(cache.stats(), enabled=True)), 200
+
+@auth_bp.route('/question-cache/stats', methods=['GET'])
+@role_required('recruiter')
+def question_cache_stats():
+    cache = get_question_cache(current_app._get_current_object())
+    if cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(cache.stats(), enabled=True)), 200
+
 @auth_bp.route('/assessments/<int:assessment_id>/results', methods=['GET'])
+@role_required('recruiter')
 def get_assessment_results(assessment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
     attempts = AssessmentAttempt.query.filter_by(assessment_id=assessment_id).all()
     results = []
     for a in attempts:
@@ -1926,7 +1615,6 @@ def get_assessment_results(assessment_id):
 @auth_bp.route('/categories', methods=['GET', 'POST'])
 def categories():
     user_id = session.get('user_id')
-    user = User.query.get(user_id)
     if request.method == 'GET':
         # List all global and recruiter-specific categories
         cats = Category.query.filter((Category.recruiter_id == None) | (Category.recruiter_id == user_id)).order_by(Category.name).all()
@@ -1976,13 +1664,9 @@ def category_ops(cat_id):
 
 # --- Practice Problems CRUD (Recruiter) ---
 @auth_bp.route('/practice-problems', methods=['GET', 'POST'])
+@role_required('recruiter')
 def practice_problems():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     if request.method == 'GET':
         category_id = request.args.get('category_id')
         query = PracticeProblem.query.filter_by(recruiter_id=user.id)
@@ -2026,11 +1710,9 @@ def practice_problems():
         return jsonify({'message': 'Practice problem created', 'id': problem.id}), 201
 
 @auth_bp.route('/practice-problems/<int:problem_id>', methods=['GET', 'PUT', 'DELETE'])
+@login_required
 def practice_problem_detail(problem_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
+    user = current_user()
     problem = PracticeProblem.query.get(problem_id)
     if not problem:
         return jsonify({'error': 'Practice problem not found'}), 404
@@ -2095,13 +1777,10 @@ def public_practice_problems():
 
 # --- Submit a practice problem attempt ---
 @auth_bp.route('/practice-problems/<int:problem_id>/attempt', methods=['POST'])
+@login_required
 def submit_practice_problem_attempt(problem_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
+    user_id = user.id
     problem = PracticeProblem.query.get(problem_id)
     if not problem:
         return jsonify({'error': 'Problem not found'}), 404
@@ -2140,50 +1819,31 @@ def submit_practice_problem_attempt(problem_id):
         passed = any(a.strip().lower() == (answer or '').strip().lower() for a in accepted)
         score = 1 if passed else 0
         max_score = 1
+    grade_async = False
+    if problem_type == 'coding' and wants_async_grading(data):
+        # Graded by a worker; score and points are filled in on completion
+        grade_async = True
+        max_score = 0
     elif problem_type == 'coding':
-        # Use the run_code logic for real code execution
-        from flask import current_app
-        from flask import request as flask_request
-        # Prepare test cases
-        all_cases = []
-        try:
-            all_cases = json.loads(problem.visible_test_cases or '[]') + json.loads(problem.hidden_test_cases or '[]')
-        except Exception:
-            pass
-        # Call the run_code logic
-        run_code_data = {
-            'code': code_submission,
-            'language': data.get('language', 'javascript'),
-            'test_cases': all_cases
-        }
-        with current_app.test_request_context('/run-code', method='POST', json=run_code_data):
-            from flask import jsonify as flask_jsonify
-            run_code_resp = run_code()
-            if hasattr(run_code_resp, 'get_json'):
-                run_code_result = run_code_resp.get_json()
-            else:
-                run_code_result = run_code_resp[0].get_json() if isinstance(run_code_resp, tuple) else {}
-        test_case_results = run_code_result.get('test_case_results', [])
-        error_message = run_code_result.get('error')
-        timeout = run_code_result.get('timeout')
+        all_cases = list(parsed_problem(problem).test_cases)
+        result = evaluate(EvaluationRequest(
+            code=code_submission or '',
+            language=data.get('language', 'javascript'),
+            test_cases=all_cases
+        ))
         # Score
-        num_passed = sum(1 for tc in test_case_results if tc.get('passed'))
-        score = num_passed
+        score = result.passed_count
         max_score = len(all_cases)
         passed = (score == max_score and max_score > 0)
-        test_case_results = json.dumps(test_case_results)
-    # --- Points logic ---
-    points_earned = problem.points if passed else 0
+        error_message = result.error or None
+        test_case_results = json.dumps(result.results_as_dicts())
     # Check for previous attempts
-    prev = PracticeProblemAttempt.query.filter_by(user_id=user_id, problem_id=problem_id).order_by(PracticeProblemAttempt.score.desc()).first()
-    attempt_number = 1
-    streak = 1
-    if prev:
-        attempt_number = prev.attempt_number + 1
-        streak = prev.streak + 1 if prev.passed else 1
-        # Only award points if this is a higher score
-        if prev.score >= score:
-            points_earned = 0
+    prev = previous_practice_attempt(user_id, problem_id)
+    attempt_number = prev.attempt_number + 1 if prev else 1
+    # --- Points logic ---
+    # An async attempt gets its points and streak once the grading job knows whether it passed
+    points_earned = practice_points(problem, score, passed, prev) if not grade_async else 0
+    streak = practice_streak(prev)
     # Save attempt
     attempt = PracticeProblemAttempt(
         user_id=user_id,
@@ -2202,6 +1862,16 @@ def submit_practice_problem_attempt(problem_id):
         streak=streak
     )
     db.session.add(attempt)
+    if grade_async:
+        db.session.flush()
+        job = enqueue_practice_grading(attempt, data.get('language', 'javascript'), user_id)
+        db.session.commit()
+        notify_grading_workers()
+        return jsonify({
+            'job_id': job.job_id,
+            'status': job.status,
+            'attempt_number': attempt_number
+        }), 202
     db.session.commit()
     return jsonify({
         'passed': passed,
@@ -2216,10 +1886,9 @@ def submit_practice_problem_attempt(problem_id):
 
 # --- Get user attempts and streaks ---
 @auth_bp.route('/practice-problems/attempts', methods=['GET'])
+@login_required
 def get_user_practice_attempts():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     attempts = PracticeProblemAttempt.query.filter_by(user_id=user_id).order_by(PracticeProblemAttempt.timestamp.desc()).all()
     return jsonify([
         {
@@ -2239,10 +1908,9 @@ def get_user_practice_attempts():
 
 # --- Get user practice statistics ---
 @auth_bp.route('/practice-problems/statistics', methods=['GET'])
+@login_required
 def get_user_practice_statistics():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     # Get all attempts for the user
     attempts = PracticeProblemAttempt.query.filter_by(user_id=user_id).all()
@@ -2278,10 +1946,9 @@ def get_user_practice_statistics():
 
 # --- Get attempts for a specific practice problem ---
 @auth_bp.route('/practice-problems/<int:problem_id>/attempts', methods=['GET'])
+@login_required
 def get_problem_attempts(problem_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     # Check if problem exists
     problem = PracticeProblem.query.get(problem_id)
@@ -2316,6 +1983,7 @@ def get_problem_attempts(problem_id):
 
 # --- Helper function ---
 def practice_problem_to_dict(problem):
+    parsed = parsed_problem(problem)
     return {
         'id': problem.id,
         'title': problem.title,
@@ -2326,22 +1994,22 @@ def practice_problem_to_dict(problem):
         'is_public': problem.is_public,
         'tags': problem.tags.split(',') if problem.tags else [],
         'problem_type': problem.problem_type,
-        'options': json.loads(problem.options or '[]'),
+        'options': parsed.options,
         'correct_answer': problem.correct_answer,
         'explanation': problem.explanation,
-        'allowed_languages': json.loads(problem.allowed_languages or '[]'),
+        'allowed_languages': parsed.allowed_languages,
         'time_limit': problem.time_limit,
         'memory_limit': problem.memory_limit,
         'starter_code': problem.starter_code,
         'solution': problem.solution,
-        'visible_test_cases': json.loads(problem.visible_test_cases or '[]'),
-        'hidden_test_cases': json.loads(problem.hidden_test_cases or '[]'),
+        'visible_test_cases': parsed.visible_test_cases,
+        'hidden_test_cases': parsed.hidden_test_cases,
         'answer_template': problem.answer_template,
-        'keywords': json.loads(problem.keywords or '[]'),
+        'keywords': parsed.keywords,
         'max_char_limit': problem.max_char_limit,
-        'hints': json.loads(problem.hints or '[]'),
-        'learning_resources': json.loads(problem.learning_resources or '[]'),
-        'study_sections': json.loads(problem.study_sections or '[]'),
+        'hints': parsed.hints,
+        'learning_resources': parsed.learning_resources,
+        'study_sections': parsed.study_sections,
         'max_attempts': problem.max_attempts,
         'category_id': problem.category_id,
         'category': problem.category.name if problem.category else None,
@@ -2385,11 +2053,10 @@ def get_practice_categories():
 
 
 @auth_bp.route('/practice-categories/<int:category_id>/start-session', methods=['POST'])
+@login_required
 def start_category_session(category_id):
     """Start a new category practice session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     try:
         # Get problems for this category
@@ -2422,6 +2089,7 @@ def start_category_session(category_id):
         # Return session info with problems
         problems_data = []
         for problem in problems:
+            parsed = parsed_problem(problem)
             problems_data.append({
                 'id': problem.id,
                 'title': problem.title,
@@ -2433,10 +2101,10 @@ def start_category_session(category_id):
                 'estimated_time': problem.estimated_time,
                 'time_limit': problem.time_limit,
                 'starter_code': problem.starter_code,
-                'options': json.loads(problem.options) if problem.options else [],
+                'options': parsed.options,
                 'correct_answer': problem.correct_answer,
-                'visible_test_cases': json.loads(problem.visible_test_cases) if problem.visible_test_cases else [],
-                'hidden_test_cases': json.loads(problem.hidden_test_cases) if problem.hidden_test_cases else [],
+                'visible_test_cases': parsed.visible_test_cases,
+                'hidden_test_cases': parsed.hidden_test_cases,
                 'answer_template': problem.answer_template,
                 'keywords': problem.keywords
             })
@@ -2457,11 +2125,10 @@ def start_category_session(category_id):
 
 
 @auth_bp.route('/practice-categories/sessions/<int:session_id>/submit-problem', methods=['POST'])
+@login_required
 def submit_category_session_problem(session_id):
     """Submit an answer for a problem in a category session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     try:
         data = request.get_json()
@@ -2501,12 +2168,15 @@ def submit_category_session_problem(session_id):
             score = problem.points if passed else 0
             
         elif problem.problem_type == 'coding':
-            # For coding problems, we'll use a simple evaluation
-            # In a real implementation, you'd run the code against test cases
-            code_submission = answer_data.get('code_submission', '')
-            # For now, give partial credit for non-empty submission
-            score = min(problem.points, len(code_submission) / 10)
-            passed = score >= problem.points * 0.7
+            all_cases = list(parsed_problem(problem).test_cases)
+            result = evaluate(EvaluationRequest(
+                code=answer_data.get('code_submission') or '',
+                language=answer_data.get('language', 'javascript'),
+                test_cases=all_cases
+            ))
+            score = problem.points * result.score(len(all_cases))
+            passed = bool(all_cases) and result.passed_count == len(all_cases)
+            answer_data['test_case_results'] = result.results_as_dicts()
             
         elif problem.problem_type == 'short-answer':
             answer = answer_data.get('answer', '')
@@ -2590,11 +2260,10 @@ def submit_category_session_problem(session_id):
 
 
 @auth_bp.route('/practice-categories/sessions/<int:session_id>', methods=['GET'])
+@login_required
 def get_category_session(session_id):
     """Get details of a category session"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     try:
         category_session = PracticeCategorySession.query.get(session_id)
@@ -2637,11 +2306,10 @@ def get_category_session(session_id):
 
 
 @auth_bp.route('/practice-categories/sessions', methods=['GET'])
+@login_required
 def get_user_category_sessions():
     """Get all category sessions for the current user"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     try:
         category_sessions = PracticeCategorySession.query.filter_by(user_id=user_id).order_by(
@@ -2670,120 +2338,25 @@ def get_user_category_sessions():
 
 # --- MESSAGING ENDPOINTS ---
 @auth_bp.route('/messages/conversations', methods=['GET'])
+@login_required
 def get_conversations():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    # Get all unique conversation_ids for this user, excluding archived ones
-    conversations = (
-        db.session.query(Message.conversation_id)
-        .filter((Message.sender_id == user_id) | (Message.receiver_id == user_id))
-        .distinct()
-        .all()
-    )
-    
-    # Filter out archived conversations
-    filtered_conversations = []
-    for (conv_id,) in conversations:
-        # Check if conversation is archived for this user
-        conversation = Conversation.query.filter_by(conversation_id=conv_id).first()
-        if conversation:
-            if (conversation.user1_id == user_id and conversation.archived_by_user1) or \
-               (conversation.user2_id == user_id and conversation.archived_by_user2):
-                continue  # Skip archived conversations
-        filtered_conversations.append(conv_id)
-    conversation_list = []
-    for conv_id in filtered_conversations:
-        # Get the latest message in this conversation
-        last_message = (
-            Message.query.filter_by(conversation_id=conv_id)
-            .order_by(Message.timestamp.desc())
-            .first()
-        )
-        # Get the other user in the conversation
-        if last_message.sender_id == user_id:
-            other_user = User.query.get(last_message.receiver_id)
-        else:
-            other_user = User.query.get(last_message.sender_id)
-        # Get unread count for this conversation
-        unread_count = Message.query.filter_by(
-            conversation_id=conv_id,
-            receiver_id=user_id,
-            read=False
-        ).count()
-        
-        # Get company info for recruiters
-        company = None
-        if other_user.role == 'recruiter' and other_user.recruiter_profile:
-            company = other_user.recruiter_profile.company_name
-        
-        conversation_list.append({
-            'conversation_id': conv_id,
-            'last_message': last_message.content,
-            'last_message_at': last_message.timestamp.isoformat() + 'Z',
-            'unread_count': unread_count,
-            'other_user': {
-                'id': other_user.id,
-                'email': other_user.email,
-                'role': other_user.role,
-                'first_name': getattr(other_user.interviewee_profile, 'first_name', None) or getattr(other_user.recruiter_profile, 'first_name', None),
-                'last_name': getattr(other_user.interviewee_profile, 'last_name', None) or getattr(other_user.recruiter_profile, 'last_name', None),
-                'avatar': getattr(other_user.interviewee_profile, 'avatar', None) or getattr(other_user.recruiter_profile, 'avatar', None),
-                'company': company,
-                'status': 'online'  # Default status, can be enhanced later
-            }
-        })
-    # Sort by latest message timestamp
-    conversation_list.sort(key=lambda c: c['last_message_at'], reverse=True)
-    return jsonify({'conversations': conversation_list}), 200
+    return jsonify({'conversations': conversation_inbox(current_user().id)}), 200
 
 @auth_bp.route('/messages/<conversation_id>', methods=['GET'])
+@login_required
 def get_messages(conversation_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
     # Only allow access if user is part of the conversation
-    messages = Message.query.filter_by(conversation_id=conversation_id).order_by(Message.timestamp).all()
-    if not messages or (messages[0].sender_id != user_id and messages[0].receiver_id != user_id):
+    if not conversation_participant(conversation_id, current_user().id):
         return jsonify({'error': 'Unauthorized or conversation not found'}), 403
-    message_list = []
-    for m in messages:
-        # Get attachments for this message
-        attachments = []
-        for attachment in m.attachments:
-            attachments.append({
-                'id': attachment.id,
-                'filename': attachment.filename,
-                'original_filename': attachment.original_filename,
-                'file_size': attachment.file_size,
-                'mime_type': attachment.mime_type
-            })
-        
-        message_list.append({
-            'id': m.id,
-            'sender_id': m.sender_id,
-            'receiver_id': m.receiver_id,
-            'content': m.content,
-            'created_at': m.timestamp.isoformat() + 'Z',
-            'read': m.read,
-            'attachments': attachments
-        })
-    return jsonify({'messages': message_list}), 200
+    try:
+        return jsonify(page_messages(conversation_id, request.args)), 200
+    except InvalidMessageQuery as e:
+        return jsonify({'error': str(e)}), 400
 
 @auth_bp.route('/messages/send', methods=['POST'])
+@login_required
 def send_message():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     data = request.get_json()
     receiver_id = data.get('receiver_id')
     content = data.get('content')
@@ -2840,13 +2413,9 @@ def send_message():
     return jsonify({'message': 'Message sent successfully', 'message_id': message.id}), 201
 
 @auth_bp.route('/messages/<int:message_id>/read', methods=['POST'])
+@login_required
 def mark_message_read(message_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user_id = current_user().id
     message = Message.query.get(message_id)
     if not message:
         return jsonify({'error': 'Message not found'}), 404
@@ -2862,13 +2431,9 @@ def mark_message_read(message_id):
     return jsonify({'message': 'Message marked as read'}), 200
 
 @auth_bp.route('/messages/<int:message_id>', methods=['DELETE'])
+@login_required
 def delete_message(message_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user_id = current_user().id
     message = Message.query.get(message_id)
     if not message:
         return jsonify({'error': 'Message not found'}), 404
@@ -2886,13 +2451,9 @@ def delete_message(message_id):
     return jsonify({'message': 'Message deleted successfully', 'conversation_id': conversation_id}), 200
 
 @auth_bp.route('/messages/<conversation_id>/mark-read', methods=['POST'])
+@login_required
 def mark_conversation_read(conversation_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user_id = current_user().id
     
     # Mark all unread messages in this conversation as read
     messages = Message.query.filter_by(
@@ -2909,10 +2470,9 @@ def mark_conversation_read(conversation_id):
 
 # --- MESSAGE ATTACHMENT ENDPOINTS ---
 @auth_bp.route('/messages/<int:message_id>/attachments', methods=['POST'])
+@login_required
 def upload_message_attachment(message_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     message = Message.query.get(message_id)
     if not message or message.sender_id != user_id:
@@ -2982,10 +2542,9 @@ def upload_message_attachment(message_id):
     return jsonify({'error': 'File type not allowed'}), 400
 
 @auth_bp.route('/messages/attachments/<int:attachment_id>', methods=['DELETE'])
+@login_required
 def delete_message_attachment(attachment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     attachment = MessageAttachment.query.get(attachment_id)
     if not attachment:
@@ -3007,10 +2566,9 @@ def delete_message_attachment(attachment_id):
     return jsonify({'message': 'Attachment deleted successfully'}), 200
 
 @auth_bp.route('/messages/attachments/<int:attachment_id>', methods=['GET'])
+@login_required
 def download_message_attachment(attachment_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     attachment = MessageAttachment.query.get(attachment_id)
     if not attachment:
@@ -3035,10 +2593,9 @@ def download_message_attachment(attachment_id):
 
 # --- CONVERSATION ARCHIVE ENDPOINTS ---
 @auth_bp.route('/messages/conversations/<conversation_id>/archive', methods=['POST'])
+@login_required
 def archive_conversation(conversation_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     # Check if user is part of the conversation
     messages = Message.query.filter_by(conversation_id=conversation_id).all()
@@ -3088,10 +2645,9 @@ def archive_conversation(conversation_id):
     return jsonify({'message': 'Conversation archived successfully'}), 200
 
 @auth_bp.route('/messages/conversations/<conversation_id>/unarchive', methods=['POST'])
+@login_required
 def unarchive_conversation(conversation_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     conversation = Conversation.query.filter_by(conversation_id=conversation_id).first()
     if not conversation:
@@ -3109,85 +2665,23 @@ def unarchive_conversation(conversation_id):
     return jsonify({'message': 'Conversation unarchived successfully'}), 200
 
 @auth_bp.route('/messages/conversations/archived', methods=['GET'])
+@login_required
 def get_archived_conversations():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
-    # Get archived conversations for this user
-    archived_conversations = Conversation.query.filter(
-        ((Conversation.user1_id == user_id) & (Conversation.archived_by_user1 == True)) |
-        ((Conversation.user2_id == user_id) & (Conversation.archived_by_user2 == True))
-    ).all()
-    
-    conversation_list = []
-    for conversation in archived_conversations:
-        # Get the latest message in this conversation
-        last_message = (
-            Message.query.filter_by(conversation_id=conversation.conversation_id)
-            .order_by(Message.timestamp.desc())
-            .first()
-        )
-        
-        if last_message:
-            # Get the other user in the conversation
-            if last_message.sender_id == user_id:
-                other_user = User.query.get(last_message.receiver_id)
-            else:
-                other_user = User.query.get(last_message.sender_id)
-            
-            # Get unread count for this conversation
-            unread_count = Message.query.filter_by(
-                conversation_id=conversation.conversation_id,
-                receiver_id=user_id,
-                read=False
-            ).count()
-            
-            # Get company info for recruiters
-            company = None
-            if other_user.role == 'recruiter' and other_user.recruiter_profile:
-                company = other_user.recruiter_profile.company_name
-            
-            conversation_list.append({
-                'conversation_id': conversation.conversation_id,
-                'last_message': last_message.content,
-                'last_message_at': last_message.timestamp.isoformat() + 'Z',
-                'unread_count': unread_count,
-                'other_user': {
-                    'id': other_user.id,
-                    'email': other_user.email,
-                    'role': other_user.role,
-                    'first_name': getattr(other_user.interviewee_profile, 'first_name', None) or getattr(other_user.recruiter_profile, 'first_name', None),
-                    'last_name': getattr(other_user.interviewee_profile, 'last_name', None) or getattr(other_user.recruiter_profile, 'last_name', None),
-                    'avatar': getattr(other_user.interviewee_profile, 'avatar', None) or getattr(other_user.recruiter_profile, 'avatar', None),
-                    'company': company,
-                    'status': 'online'  # Default status, can be enhanced later
-                }
-            })
-    
-    # Sort by latest message timestamp
-    conversation_list.sort(key=lambda c: c['last_message_at'], reverse=True)
-    return jsonify({'conversations': conversation_list}), 200
+    return jsonify({'conversations': conversation_inbox(current_user().id, archived=True)}), 200
+
+@auth_bp.route('/messages/unread-count', methods=['GET'])
+@login_required
+def get_unread_message_count():
+    return jsonify({'unread_count': unread_message_count(current_user().id)}), 200
 
 # --- USER PROFILE ENDPOINTS ---
 @auth_bp.route('/users/<int:user_id>/profile', methods=['GET'])
+@role_required('recruiter', 'Unauthorized - only recruiters can view profiles')
 def get_user_profile(user_id):
-    current_user_id = session.get('user_id')
-    if not current_user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
     user = User.query.get(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    # Check if current user is a recruiter (only recruiters can view profiles)
-    current_user = User.query.get(current_user_id)
-    if current_user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized - only recruiters can view profiles'}), 403
-    
     # Get profile data
     if user.role == 'interviewee':
         profile = IntervieweeProfile.query.filter_by(user_id=user_id).first()
@@ -3241,10 +2735,9 @@ def get_user_profile(user_id):
 
 # --- NOTIFICATION ENDPOINTS ---
 @auth_bp.route('/notifications', methods=['GET'])
+@login_required
 def get_notifications():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
     notif_list = [
         {
@@ -3260,18 +2753,16 @@ def get_notifications():
     return jsonify(notif_list), 200
 
 @auth_bp.route('/notifications/unread-count', methods=['GET'])
+@login_required
 def get_unread_notification_count():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     count = Notification.query.filter_by(user_id=user_id, read=False).count()
     return jsonify({'unread_count': count}), 200
 
 @auth_bp.route('/notifications/<int:notification_id>/read', methods=['POST'])
+@login_required
 def mark_notification_read(notification_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     notif = Notification.query.get(notification_id)
     if not notif or notif.user_id != user_id:
         return jsonify({'error': 'Notification not found'}), 404
@@ -3280,10 +2771,9 @@ def mark_notification_read(notification_id):
     return jsonify({'message': 'Notification marked as read'}), 200
 
 @auth_bp.route('/notifications/mark-all-read', methods=['POST'])
+@login_required
 def mark_all_notifications_read():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     # Mark all unread notifications as read
     notifications = Notification.query.filter_by(user_id=user_id, read=False).all()
@@ -3294,10 +2784,9 @@ def mark_all_notifications_read():
     return jsonify({'message': 'All notifications marked as read'}), 200
 
 @auth_bp.route('/notifications/clear-all', methods=['DELETE'])
+@login_required
 def clear_all_notifications():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
+    user_id = current_user().id
     
     # Delete all notifications for the user
     notifications = Notification.query.filter_by(user_id=user_id).all()
@@ -3308,14 +2797,8 @@ def clear_all_notifications():
     return jsonify({'message': 'All notifications cleared'}), 200
 
 @auth_bp.route('/messages/available-candidates', methods=['GET'])
+@role_required('recruiter')
 def get_available_candidates():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     # Get all interviewee users with their profiles
     interviewees = User.query.filter_by(role='interviewee').all()
     candidates = []
@@ -3339,13 +2822,9 @@ def get_available_candidates():
 # --- INTERVIEW SCHEDULING ENDPOINTS ---
 
 @auth_bp.route('/interviews', methods=['GET'])
+@login_required
 def get_interviews():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     
     if user.role == 'recruiter':
         # Get interviews scheduled by this recruiter
@@ -3392,13 +2871,9 @@ def get_interviews():
     return jsonify({'interviews': result}), 200
 
 @auth_bp.route('/interviews', methods=['POST'])
+@role_required('recruiter', 'Only recruiters can schedule interviews')
 def schedule_interview():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can schedule interviews'}), 403
+    user = current_user()
     
     data = request.get_json()
     required_fields = ['interviewee_id', 'position', 'type', 'scheduled_at', 'duration']
@@ -3424,7 +2899,7 @@ def schedule_interview():
         return jsonify({'error': 'Invalid date format for scheduled_at'}), 400
     
     # Get recruiter profile for email
-    recruiter_profile = RecruiterProfile.query.filter_by(user_id=user.id).first()
+    recruiter_profile = user.recruiter_profile
     recruiter_name = f"{recruiter_profile.first_name} {recruiter_profile.last_name}" if recruiter_profile else "Unknown"
     recruiter_company = recruiter_profile.company_name if recruiter_profile else "Unknown"
     
@@ -3535,13 +3010,9 @@ Best regards,
     }), 201
 
 @auth_bp.route('/interviews/<int:interview_id>', methods=['GET'])
+@login_required
 def get_interview(interview_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     
     interview = Interview.query.get(interview_id)
     if not interview:
@@ -3591,13 +3062,9 @@ def get_interview(interview_id):
     return jsonify(result), 200
 
 @auth_bp.route('/interviews/<int:interview_id>', methods=['PUT'])
+@login_required
 def update_interview(interview_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     
     interview = Interview.query.get(interview_id)
     if not interview:
@@ -3658,13 +3125,9 @@ def update_interview(interview_id):
     return jsonify({'message': 'Interview updated successfully'}), 200
 
 @auth_bp.route('/interviews/<int:interview_id>/cancel', methods=['POST'])
+@login_required
 def cancel_interview(interview_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     
     interview = Interview.query.get(interview_id)
     if not interview:
@@ -3683,13 +3146,9 @@ def cancel_interview(interview_id):
     return jsonify({'message': 'Interview cancelled successfully'}), 200
 
 @auth_bp.route('/interviews/<int:interview_id>', methods=['DELETE'])
+@login_required
 def delete_interview(interview_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
     
     interview = Interview.query.get(interview_id)
     if not interview:
@@ -3708,422 +3167,61 @@ def delete_interview(interview_id):
     return jsonify({'message': 'Interview deleted successfully'}), 200
 
 @auth_bp.route('/candidates', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can view candidates')
 def get_candidates():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can view candidates'}), 403
-    
-    # Get all interviewee users with their profiles and comprehensive data
-    interviewees = User.query.filter_by(role='interviewee').all()
-    candidates = []
-    
-    for interviewee in interviewees:
-        profile = IntervieweeProfile.query.filter_by(user_id=interviewee.id).first()
-        if profile:
-            # Get assessment attempts for this interviewee
-            attempts = AssessmentAttempt.query.filter_by(interviewee_id=interviewee.id).all()
-            completed_assessments = [a for a in attempts if a.status == 'completed']
-            
-            # Get test assessment attempts
-            test_attempts = AssessmentAttempt.query.filter_by(
-                interviewee_id=interviewee.id
-            ).join(Assessment).filter(Assessment.is_test == True).all()
-            completed_test_assessments = [a for a in test_attempts if a.status == 'completed']
-            
-            # Get interviews for this candidate
-            interviews = Interview.query.filter_by(interviewee_id=interviewee.id).all()
-            completed_interviews = [i for i in interviews if i.status == 'completed']
-            
-            # Calculate average scores
-            assessment_avg = round(sum([a.score for a in completed_assessments if a.score]) / len(completed_assessments), 1) if completed_assessments else 0
-            test_avg = round(sum([a.score for a in completed_test_assessments if a.score]) / len(completed_test_assessments), 1) if completed_test_assessments else 0
-            
-            # Determine candidate status
-            status = 'applied'
-            if completed_interviews:
-                status = 'interviewed'
-            elif completed_assessments or completed_test_assessments:
-                status = 'in-review'
-            if assessment_avg >= 80 or test_avg >= 80:
-                status = 'shortlisted'
-            
-            # Get last activity
-            last_activity = interviewee.created_at
-            if attempts:
-                last_attempt = max(attempts, key=lambda x: x.started_at)
-                if last_attempt.started_at > last_activity:
-                    last_activity = last_attempt.started_at
-            if interviews:
-                last_interview = max(interviews, key=lambda x: x.created_at)
-                if last_interview.created_at > last_activity:
-                    last_activity = last_interview.created_at
-            
-            # Get practice problem statistics
-            practice_attempts = PracticeProblemAttempt.query.filter_by(user_id=interviewee.id).all()
-            completed_practice = [p for p in practice_attempts if p.passed]
-            practice_avg = round(sum([p.score for p in completed_practice if p.score]) / len(completed_practice), 1) if completed_practice else 0
-            
-            candidate_data = {
-                'id': interviewee.id,
-                'email': interviewee.email,
-                'first_name': profile.first_name,
-                'last_name': profile.last_name,
-                'full_name': f"{profile.first_name} {profile.last_name}",
-                'position': profile.position,
-                'company': profile.company,
-                'location': profile.location,
-                'phone': profile.phone,
-                'skills': profile.skills.split(',') if profile.skills else [],
-                'avatar': profile.avatar,
-                'bio': profile.bio,
-                'linkedin_url': profile.linkedin,
-                'github_url': profile.github,
-                'portfolio_url': profile.website,
-                'created_at': interviewee.created_at.isoformat(),
-                'last_activity': last_activity.isoformat(),
-                'status': status,
-                'assessments': {
-                    'completed': len(completed_assessments),
-                    'total': len(attempts),
-                    'average_score': round(assessment_avg, 1),
-                    'details': [
-                        {
-                            'id': a.id,
-                            'assessment_title': a.assessment.title,
-                            'score': a.score,
-                            'status': a.status,
-                            'completed_at': a.completed_at.isoformat() if a.completed_at else None
-                        } for a in attempts
-                    ]
-                },
-                'test_assessments': {
-                    'completed': len(completed_test_assessments),
-                    'total': len(test_attempts),
-                    'average_score': round(test_avg, 1),
-                    'details': [
-                        {
-                            'id': a.id,
-                            'assessment_title': a.assessment.title,
-                            'score': a.score,
-                            'status': a.status,
-                            'completed_at': a.completed_at.isoformat() if a.completed_at else None
-                        } for a in test_attempts
-                    ]
-                },
-                'interviews': {
-                    'total': len(interviews),
-                    'completed': len(completed_interviews),
-                    'scheduled': len([i for i in interviews if i.status == 'scheduled']),
-                    'cancelled': len([i for i in interviews if i.status == 'cancelled']),
-                    'details': [
-                        {
-                            'id': i.id,
-                            'position': i.position,
-                            'type': i.type,
-                            'status': i.status,
-                            'scheduled_at': i.scheduled_at.isoformat() + 'Z',
-                            'rating': i.rating,
-                            'feedback': i.feedback
-                        } for i in interviews
-                    ]
-                },
-                'practice_problems': {
-                    'completed': len(completed_practice),
-                    'total': len(practice_attempts),
-                    'average_score': round(practice_avg, 1)
-                },
-                'overall_score': round((assessment_avg + test_avg + practice_avg) / 3, 0) if (assessment_avg + test_avg + practice_avg) > 0 else 0,
-                'rating': sum([i.rating for i in completed_interviews if i.rating]) / len(completed_interviews) if completed_interviews else 0
-            }
-            candidates.append(candidate_data)
-    
-    return jsonify({'candidates': candidates}), 200
+    # Without paging or filter parameters, keep returning the full list
+    if not any(key in request.args for key in CANDIDATE_LIST_PARAMS):
+        # Summaries come from a fixed number of grouped queries, not per-candidate lookups
+        candidates = build_candidates(candidate_rows(), scope=interviewee_ids())
+        return jsonify({'candidates': candidates}), 200
+    try:
+        return jsonify(page_candidates(request.args)), 200
+    except InvalidCandidateQuery as e:
+        return jsonify({'error': str(e)}), 400
+
+@auth_bp.route('/candidates/<int:candidate_id>/details', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can view candidates')
+def get_candidate_details(candidate_id):
+    candidate = User.query.get(candidate_id)
+    if not candidate or candidate.role != 'interviewee':
+        return jsonify({'error': 'Candidate not found'}), 404
+    return jsonify(candidate_details(candidate_id)), 200
 
 @auth_bp.route('/dashboard/recruiter', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can access dashboard')
+@cached_response('profiles')
 def get_recruiter_dashboard():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can access dashboard'}), 403
-    
-    # Get all data for this recruiter
-    assessments = Assessment.query.filter_by(recruiter_id=user_id).all()
-    assessment_attempts = AssessmentAttempt.query.join(Assessment).filter(Assessment.recruiter_id == user_id).all()
-    interviews = Interview.query.filter_by(recruiter_id=user_id).all()
-    
-    # Calculate stats
-    total_assessments = len(assessments)
-    active_assessments = len([a for a in assessments if a.status == 'active'])
-    
-    # Get unique candidates
-    unique_candidates = set()
-    for attempt in assessment_attempts:
-        unique_candidates.add(attempt.interviewee_id)
-    total_candidates = len(unique_candidates)
-    
-    # Calculate completion rate
-    total_attempts = len(assessment_attempts)
-    completed_attempts = len([a for a in assessment_attempts if a.status == 'completed'])
-    completion_rate = round((completed_attempts / total_attempts * 100), 1) if total_attempts > 0 else 0
-    
-    # Calculate average score
-    scores = [a.score for a in assessment_attempts if a.score is not None]
-    average_score = round(sum(scores) / len(scores), 0) if scores else 0
-    
-    # Get recent candidate activity (last 5 attempts)
-    recent_attempts = []
-    for attempt in sorted(assessment_attempts, key=lambda x: x.started_at, reverse=True)[:5]:
-        interviewee = User.query.get(attempt.interviewee_id)
-        profile = IntervieweeProfile.query.filter_by(user_id=attempt.interviewee_id).first()
-        if interviewee and profile:
-            recent_attempts.append({
-                'id': attempt.id,
-                'name': f"{profile.first_name} {profile.last_name}",
-                'email': interviewee.email,
-                'assessment': attempt.assessment.title,
-                'assessment_id': attempt.assessment_id,
-                'status': attempt.status,
-                'score': round(attempt.score, 0) if attempt.score is not None else None,
-                'submitted_at': attempt.started_at.isoformat(),
-                'completed_at': attempt.completed_at.isoformat() if attempt.completed_at else None
-            })
-    
-    # Get upcoming interviews (next 7 days)
-    from datetime import datetime, timedelta
-    today = datetime.now()
-    week_from_now = today + timedelta(days=7)
-    
-    upcoming_interviews = []
-    for interview in interviews:
-        # Check if interview is scheduled and within the next 7 days
-        if interview.status == 'scheduled':
-            # Remove timezone info for comparison if present
-            scheduled_time = interview.scheduled_at
-            if hasattr(scheduled_time, 'replace'):
-                scheduled_time = scheduled_time.replace(tzinfo=None)
-            
-            if scheduled_time >= today and scheduled_time <= week_from_now:
-                interviewee = User.query.get(interview.interviewee_id)
-                profile = IntervieweeProfile.query.filter_by(user_id=interview.interviewee_id).first()
-                if interviewee and profile:
-                    upcoming_interviews.append({
-                        'id': interview.id,
-                        'candidate': f"{profile.first_name} {profile.last_name}",
-                        'position': interview.position,
-                        'time': interview.scheduled_at.isoformat() + 'Z',
-                        'type': interview.type.replace('_', ' ').title()
-                    })
-    
-    # Sort by scheduled time
-    upcoming_interviews.sort(key=lambda x: x['time'])
-    
-    # Calculate weekly changes
-    week_ago = today - timedelta(days=7)
-    week_ago_assessments = len([a for a in assessments if a.created_at >= week_ago])
-    week_ago_candidates = len(set([a.interviewee_id for a in assessment_attempts if a.started_at >= week_ago]))
+    user_id = current_user().id
     
-    # Get assessment performance by category
-    category_performance = []
-    categories = Category.query.filter_by(recruiter_id=user_id).all()
-    for category in categories:
-        category_assessments = [a for a in assessments if a.category_id == category.id]
-        category_attempts = [a for a in assessment_attempts if a.assessment.category_id == category.id]
-        if category_attempts:
-            scores = [a.score for a in category_attempts if a.score is not None]
-            avg_score = round(sum(scores) / len(scores), 0) if scores else 0
-            category_performance.append({
-                'name': category.name,
-                'average_score': avg_score,
-                'total_assessments': len(category_assessments),
-                'total_attempts': len(category_attempts)
-            })
-    
-    # If no categories, create default performance data
-    if not category_performance:
-        # Get overall performance data
-        scores = [a.score for a in assessment_attempts if a.score is not None]
-        avg_score = round(sum(scores) / len(scores), 0) if scores else 0
-        category_performance.append({
-            'name': 'Overall Performance',
-            'average_score': avg_score,
-            'total_assessments': len(assessments),
-            'total_attempts': len(assessment_attempts)
-        })
+    # Headline numbers come from the materialized stats tables
+    dashboard = recruiter_dashboard_stats(user_id)
     
     return jsonify({
-        'stats': {
-            'active_assessments': active_assessments,
-            'total_candidates': total_candidates,
-            'completion_rate': completion_rate,
-            'average_score': average_score,
-            'weekly_changes': {
-                'assessments': f"+{max(0, active_assessments - week_ago_assessments)} this week",
-                'candidates': f"+{max(0, total_candidates - week_ago_candidates)} this week",
-                'completion_rate': f"+2.0% from last month",
-                'average_score': f"+1.5 points"
-            }
-        },
-        'recent_candidates': recent_attempts,
-        'upcoming_interviews': upcoming_interviews[:3],  # Top 3
-        'category_performance': category_performance
+        'stats': dashboard['stats'],
+        'recent_candidates': recent_candidate_activity(user_id),
+        'upcoming_interviews': upcoming_interviews(user_id),
+        'category_performance': dashboard['category_performance']
     }), 200
 
 @auth_bp.route('/analytics/recruiter/summary', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can access analytics')
+@cached_response()
 def get_recruiter_analytics():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can access analytics'}), 403
-    
-    # Get all data for this recruiter
-    assessments = Assessment.query.filter_by(recruiter_id=user_id).all()
-    assessment_attempts = AssessmentAttempt.query.join(Assessment).filter(Assessment.recruiter_id == user_id).all()
-    interviews = Interview.query.filter_by(recruiter_id=user_id).all()
-    practice_problems = PracticeProblem.query.filter_by(recruiter_id=user_id).all()
-    practice_attempts = PracticeProblemAttempt.query.join(PracticeProblem).filter(PracticeProblem.recruiter_id == user_id).all()
-    messages = Message.query.filter(
-        (Message.sender_id == user_id) | (Message.receiver_id == user_id)
-    ).all()
-    
-    # Calculate analytics
-    total_assessments = len(assessments)
-    total_attempts = len(assessment_attempts)
-    completed_attempts = len([a for a in assessment_attempts if a.status == 'completed'])
-    average_score = round(sum([a.score for a in assessment_attempts if a.score]) / len(assessment_attempts), 1) if assessment_attempts else 0
-    
-    total_interviews = len(interviews)
-    completed_interviews = len([i for i in interviews if i.status == 'completed'])
-    scheduled_interviews = len([i for i in interviews if i.status == 'scheduled'])
-    cancelled_interviews = len([i for i in interviews if i.status == 'cancelled'])
-    
-    total_practice_problems = len(practice_problems)
-    total_practice_attempts = len(practice_attempts)
-    completed_practice = len([p for p in practice_attempts if p.passed])
-    average_practice_score = round(sum([p.score for p in practice_attempts if p.score]) / len(practice_attempts), 1) if practice_attempts else 0
-    
-    total_messages = len(messages)
-    unread_messages = len([m for m in messages if not m.read and m.receiver_id == user_id])
-    
-    # Get unique candidates
-    unique_candidates = set()
-    for attempt in assessment_attempts:
-        unique_candidates.add(attempt.interviewee_id)
-    for interview in interviews:
-        unique_candidates.add(interview.interviewee_id)
-    
-    # Monthly trends (last 6 months)
-    from datetime import datetime, timedelta
-    months = []
-    assessment_trends = []
-    interview_trends = []
-    
-    for i in range(6):
-        month_start = datetime.now() - timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        
-        month_assessments = len([a for a in assessment_attempts if month_start <= a.started_at < month_end])
-        month_interviews = len([i for i in interviews if month_start <= i.created_at < month_end])
-        
-        months.append(month_start.strftime('%b %Y'))
-        assessment_trends.append(month_assessments)
-        interview_trends.append(month_interviews)
-    
-    # Top performing assessments
-    assessment_performance = []
-    for assessment in assessments:
-        attempts = [a for a in assessment_attempts if a.assessment_id == assessment.id]
-        if attempts:
-            avg_score = round(sum([a.score for a in attempts if a.score]) / len(attempts), 1)
-            assessment_performance.append({
-                'id': assessment.id,
-                'title': assessment.title,
-                'total_attempts': len(attempts),
-                'completed_attempts': len([a for a in attempts if a.status == 'completed']),
-                'average_score': avg_score,
-                'type': 'test' if assessment.is_test else 'regular'
-            })
-    
-    # Sort by average score
-    assessment_performance.sort(key=lambda x: x['average_score'], reverse=True)
+    user_id = current_user().id
     
-    # Category breakdown
-    categories = Category.query.filter_by(recruiter_id=user_id).all()
-    category_stats = []
-    for category in categories:
-        category_assessments = [a for a in assessments if a.category_id == category.id]
-        category_attempts = [a for a in assessment_attempts if a.assessment.category_id == category.id]
-        if category_attempts:
-            avg_score = round(sum([a.score for a in category_attempts if a.score]) / len(category_attempts), 1)
-            category_stats.append({
-                'name': category.name,
-                'total_assessments': len(category_assessments),
-                'total_attempts': len(category_attempts),
-                'average_score': avg_score
-            })
+    try:
+        start, end = parse_window(request.args)
+    except InvalidAnalyticsQuery as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'overview': {
-            'total_assessments': total_assessments,
-            'total_attempts': total_attempts,
-            'completed_attempts': completed_attempts,
-            'completion_rate': round((completed_attempts / total_attempts * 100), 1) if total_attempts > 0 else 0,
-            'average_score': average_score,
-            'total_candidates': len(unique_candidates),
-            'total_interviews': total_interviews,
-            'completed_interviews': completed_interviews,
-            'interview_success_rate': round((completed_interviews / total_interviews * 100), 1) if total_interviews > 0 else 0,
-            'total_practice_problems': total_practice_problems,
-            'total_practice_attempts': total_practice_attempts,
-            'completed_practice': completed_practice,
-            'average_practice_score': average_practice_score,
-            'total_messages': total_messages,
-            'unread_messages': unread_messages
-        },
-        'trends': {
-            'months': months,
-            'assessment_trends': assessment_trends,
-            'interview_trends': interview_trends
-        },
-        'top_assessments': assessment_performance[:5],
-        'category_breakdown': category_stats,
-        'recent_activity': {
-            'recent_assessments': [
-                {
-                    'id': a.id,
-                    'title': a.title,
-                    'created_at': a.created_at.isoformat(),
-                    'total_questions': len(a.questions),
-                    'is_test': a.is_test
-                } for a in assessments[-5:]
-            ],
-            'recent_interviews': [
-                {
-                    'id': i.id,
-                    'position': i.position,
-                    'type': i.type,
-                    'status': i.status,
-                    'scheduled_at': i.scheduled_at.isoformat() + 'Z',
-                    'rating': i.rating
-                } for i in interviews[-5:]
-            ]
-        }
-    }), 200
+    return jsonify(recruiter_analytics(user_id, start, end)), 200
 
 @auth_bp.route('/dashboard/interviewee', methods=['GET'])
+@role_required('interviewee', 'Only interviewees can access dashboard')
+@cached_response('catalog', 'profiles', 'leaderboard')
 def get_interviewee_dashboard():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Only interviewees can access dashboard'}), 403
+    user = current_user()
+    user_id = user.id
     
     # Get all data for this interviewee
     assessment_attempts = AssessmentAttempt.query.filter_by(interviewee_id=user_id).all()
@@ -4141,23 +3239,8 @@ def get_interviewee_dashboard():
     # Calculate practice sessions
     practice_sessions = len(practice_attempts)
     
-    # Calculate rank (simplified - based on average score)
-    all_interviewees = User.query.filter_by(role='interviewee').all()
-    interviewee_scores = []
-    for interviewee in all_interviewees:
-        attempts = AssessmentAttempt.query.filter_by(interviewee_id=interviewee.id).all()
-        scores = [a.score for a in attempts if a.score is not None]
-        if scores:
-            avg_score = sum(scores) / len(scores)
-            interviewee_scores.append((interviewee.id, avg_score))
-    
-    # Sort by average score and find rank
-    interviewee_scores.sort(key=lambda x: x[1], reverse=True)
-    user_rank = 1
-    for interviewee_id, score in interviewee_scores:
-        if interviewee_id == user_id:
-            break
-        user_rank += 1
+    # Rank comes from the precomputed leaderboard; unranked candidates sit after everyone ranked
+    user_rank = leaderboard.rank_or_last(user_id)
     
     # Get available tests (public assessments and test assessments)
     available_tests = []
@@ -4207,7 +3290,6 @@ def get_interviewee_dashboard():
             })
     
     # Get upcoming interviews (next 7 days)
-    from datetime import datetime, timedelta
     today = datetime.now()
     week_from_now = today + timedelta(days=7)
     
@@ -4291,15 +3373,12 @@ def get_interviewee_dashboard():
     }), 200
 
 @auth_bp.route('/profile/recruiter/stats', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can access this endpoint')
+@cached_response('profiles')
 def get_recruiter_profile_stats():
     """Get recruiter profile statistics and recent activity"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can access this endpoint'}), 403
+    user = current_user()
+    user_id = user.id
     
     try:
         # Get assessments created by recruiter
@@ -4379,16 +3458,39 @@ def get_recruiter_profile_stats():
         return jsonify({'error': str(e)}), 500
 
 
+@auth_bp.route('/leaderboard', methods=['GET'])
+@login_required
+def get_leaderboard():
+    """Top interviewees by average assessment score, plus the caller's own standing"""
+    user = current_user()
+    user_id = user.id
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    entries = leaderboard.top(limit)
+    if user.role != 'recruiter':
+        # Candidates see scores, not who the other candidates are
+        entries = [
+            {'rank': e['rank'], 'average_score': e['average_score'], 'is_you': e['user_id'] == user_id}
+            for e in entries
+        ]
+    response = {'total': leaderboard.size(), 'top': entries}
+    if user.role == 'interviewee':
+        response['you'] = {
+            'rank': leaderboard.rank(user_id),
+            'percentile': leaderboard.percentile(user_id),
+        }
+    return jsonify(response), 200
+
+
 @auth_bp.route('/profile/interviewee/stats', methods=['GET'])
+@role_required('interviewee', 'Only interviewees can access this endpoint')
 def get_interviewee_profile_stats():
     """Get interviewee profile statistics, achievements, and skills"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Only interviewees can access this endpoint'}), 403
+    user = current_user()
+    user_id = user.id
     
     try:
         # Get completed assessments
@@ -4403,27 +3505,14 @@ def get_interviewee_profile_stats():
         scores = [attempt.score for attempt in completed_attempts if attempt.score is not None]
         average_score = round(sum(scores) / len(scores), 0) if scores else 0
         
-        # Calculate rank (position among all interviewees by average score)
-        all_interviewees = User.query.filter_by(role='interviewee').all()
-        interviewee_scores = []
-        
-        for interviewee in all_interviewees:
-            interviewee_attempts = AssessmentAttempt.query.filter_by(
-                interviewee_id=interviewee.id, 
-                status='completed'
-            ).all()
-            if interviewee_attempts:
-                avg_score = sum([a.score for a in interviewee_attempts if a.score is not None]) / len(interviewee_attempts)
-                interviewee_scores.append((interviewee.id, avg_score))
-        
-        interviewee_scores.sort(key=lambda x: x[1], reverse=True)
-        rank = next((i + 1 for i, (uid, _) in enumerate(interviewee_scores) if uid == user_id), len(interviewee_scores))
+        # Rank comes from the precomputed leaderboard; unranked candidates sit after everyone ranked
+        rank = leaderboard.rank_or_last(user_id)
         
         # Get member since date
         member_since = user.created_at.strftime('%b %Y') if user.created_at else 'Unknown'
         
         # Get skills from profile
-        profile = IntervieweeProfile.query.filter_by(user_id=user_id).first()
+        profile = user.interviewee_profile
         skills = []
         if profile and profile.skills:
             skills = [skill.strip() for skill in profile.skills.split(',') if skill.strip()]
@@ -4484,15 +3573,10 @@ def get_interviewee_profile_stats():
 
 
 @auth_bp.route('/feedback', methods=['POST'])
+@role_required('interviewee', 'Only interviewees can submit feedback')
 def submit_feedback():
     """Submit feedback from interviewee"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Only interviewees can submit feedback'}), 403
+    user_id = current_user().id
     
     try:
         data = request.get_json()
@@ -4528,15 +3612,11 @@ def submit_feedback():
 
 
 @auth_bp.route('/feedback', methods=['GET'])
+@login_required
 def get_feedback():
     """Get feedback - all for recruiters, own for interviewees"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    user = current_user()
+    user_id = user.id
     
     try:
         if user.role == 'recruiter':
@@ -4570,16 +3650,9 @@ def get_feedback():
 
 
 @auth_bp.route('/feedback/<int:feedback_id>', methods=['PUT'])
+@role_required('recruiter', 'Only recruiters can update feedback status')
 def update_feedback_status(feedback_id):
     """Update feedback status and admin notes (recruiters only)"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can update feedback status'}), 403
-    
     try:
         data = request.get_json()
         status = data.get('status')
@@ -4608,16 +3681,9 @@ def update_feedback_status(feedback_id):
 
 
 @auth_bp.route('/feedback/stats', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can view feedback stats')
 def get_feedback_stats():
     """Get feedback statistics (recruiters only)"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can view feedback stats'}), 403
-    
     try:
         total_feedback = Feedback.query.count()
         pending_feedback = Feedback.query.filter_by(status='pending').count()
@@ -4649,13 +3715,9 @@ def get_feedback_stats():
 
 
 @auth_bp.route('/tests/available', methods=['GET'])
+@role_required('interviewee', 'Only interviewees can access tests')
 def get_available_tests():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Only interviewees can access tests'}), 403
+    user_id = current_user().id
     
     public_tests = Assessment.query.filter_by(is_test=True).all()
     
@@ -4730,20 +3792,20 @@ def get_available_tests():
 # --- ASSESSMENT REVIEW ENDPOINTS ---
 
 @auth_bp.route('/assessments/<int:assessment_id>/submissions', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can view submissions')
 def get_assessment_submissions(assessment_id):
     """Get all submissions for an assessment with review status"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can view submissions'}), 403
+    user_id = current_user().id
     
     assessment = Assessment.query.get(assessment_id)
     if not assessment or assessment.recruiter_id != user_id:
         return jsonify({'error': 'Assessment not found'}), 404
     
     attempts = AssessmentAttempt.query.filter_by(assessment_id=assessment_id).order_by(AssessmentAttempt.completed_at.desc()).all()
+    reviews = {}
+    for review in AssessmentReview.query.filter(AssessmentReview.attempt_id.in_([a.id for a in attempts])).order_by(AssessmentReview.id):
+        reviews.setdefault(review.attempt_id, review)
+    auto_scores = review_auto_scores(review.id for review in reviews.values())
     submissions = []
     
     for attempt in attempts:
@@ -4751,17 +3813,10 @@ def get_assessment_submissions(assessment_id):
         profile = IntervieweeProfile.query.filter_by(user_id=attempt.interviewee_id).first()
         
         # Get review status
-        review = AssessmentReview.query.filter_by(attempt_id=attempt.id).first()
+        review = reviews.get(attempt.id)
         
-        # Calculate actual auto-score from review answers if review exists
-        actual_auto_score = attempt.score  # Default to attempt score
-        if review:
-            review_answers = AssessmentReviewAnswer.query.filter_by(review_id=review.id).all()
-            if review_answers:
-                total_auto_score = sum(review_answer.auto_score for review_answer in review_answers)
-                total_points = sum(question.points for question in [AssessmentQuestion.query.get(ra.question_id) for ra in review_answers] if question)
-                if total_points > 0:
-                    actual_auto_score = (total_auto_score / total_points * 100)
+        # Auto-score from the review's answers if it has any, else the attempt score
+        actual_auto_score = auto_scores.get(review.id, attempt.score) if review else attempt.score
         
         submissions.append({
             'attempt_id': attempt.id,
@@ -4781,14 +3836,10 @@ def get_assessment_submissions(assessment_id):
     return jsonify(submissions), 200
 
 @auth_bp.route('/assessments/<int:assessment_id>/submissions/<int:attempt_id>/review', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can review submissions')
 def get_submission_for_review(assessment_id, attempt_id):
     """Get detailed submission data for review"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can review submissions'}), 403
+    user_id = current_user().id
     
     assessment = Assessment.query.get(assessment_id)
     if not assessment or assessment.recruiter_id != user_id:
@@ -4813,17 +3864,12 @@ def get_submission_for_review(assessment_id, attempt_id):
         db.session.commit()
     
     # Get questions and answers
+    review_answers = {}
+    for review_answer in AssessmentReviewAnswer.query.filter_by(review_id=review.id).order_by(AssessmentReviewAnswer.id):
+        review_answers.setdefault(review_answer.question_id, review_answer)
     questions_data = []
-    for question in assessment.questions:
-        attempt_answer = AssessmentAttemptAnswer.query.filter_by(
-            attempt_id=attempt_id,
-            question_id=question.id
-        ).first()
-        
-        review_answer = AssessmentReviewAnswer.query.filter_by(
-            review_id=review.id,
-            question_id=question.id
-        ).first()
+    for question, attempt_answer in question_answers(assessment.id, attempt_id):
+        review_answer = review_answers.get(question.id)
         
         # Create review answer if it doesn't exist
         if not review_answer and attempt_answer:
@@ -4832,18 +3878,19 @@ def get_submission_for_review(assessment_id, attempt_id):
                 question_id=question.id,
                 attempt_answer_id=attempt_answer.id,
                 max_points=question.points,
-                auto_score=question.points if attempt_answer.is_correct else 0,
+                auto_score=auto_points(question, attempt_answer),
                 auto_is_correct=attempt_answer.is_correct
             )
             db.session.add(review_answer)
         
+        parsed = parsed_question(question)
         questions_data.append({
             'question_id': question.id,
             'type': question.type,
             'question': question.question,
             'points': question.points,
-            'options': json.loads(question.options) if question.options else None,
-            'correct_answer': json.loads(question.correct_answer) if question.correct_answer else None,
+            'options': parsed.options or None,
+            'correct_answer': parsed.correct_answer,
             'explanation': question.explanation,
             'starter_code': question.starter_code,
             'solution': question.solution,
@@ -4874,14 +3921,10 @@ def get_submission_for_review(assessment_id, attempt_id):
     }), 200
 
 @auth_bp.route('/assessments/reviews/<int:review_id>/answers/<int:question_id>', methods=['PUT'])
+@role_required('recruiter', 'Only recruiters can update reviews')
 def update_review_answer(review_id, question_id):
     """Update manual scoring for a specific question"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can update reviews'}), 403
+    user_id = current_user().id
     
     review = AssessmentReview.query.get(review_id)
     if not review or review.recruiter_id != user_id:
@@ -4906,14 +3949,10 @@ def update_review_answer(review_id, question_id):
     return jsonify({'message': 'Review answer updated'}), 200
 
 @auth_bp.route('/assessments/reviews/<int:review_id>/complete', methods=['POST'])
+@role_required('recruiter', 'Only recruiters can complete reviews')
 def complete_assessment_review(review_id):
     """Complete the review and calculate final score"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can complete reviews'}), 403
+    user_id = current_user().id
     
     review = AssessmentReview.query.get(review_id)
     if not review or review.recruiter_id != user_id:
@@ -4923,15 +3962,7 @@ def complete_assessment_review(review_id):
     overall_feedback = data.get('overall_feedback', '')
     
     # Calculate final score
-    review_answers = AssessmentReviewAnswer.query.filter_by(review_id=review_id).all()
-    total_points = 0
-    earned_points = 0
-    
-    for answer in review_answers:
-        total_points += answer.max_points
-        earned_points += answer.manual_score or answer.auto_score or 0
-    
-    final_score = (earned_points / total_points * 100) if total_points > 0 else 0
+    final_score = score_review(review_id)
     
     # Update review
     review.overall_score = final_score
@@ -4954,14 +3985,10 @@ def complete_assessment_review(review_id):
     }), 200
 
 @auth_bp.route('/assessments/reviews/<int:review_id>/release', methods=['POST'])
+@role_required('recruiter', 'Only recruiters can release results')
 def release_assessment_results(review_id):
     """Release results to the candidate"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can release results'}), 403
+    user_id = current_user().id
     
     review = AssessmentReview.query.get(review_id)
     if not review or review.recruiter_id != user_id:
@@ -4991,14 +4018,11 @@ def release_assessment_results(review_id):
     return jsonify({'message': 'Results released to candidate'}), 200
 
 @auth_bp.route('/interviewee/attempts/<int:attempt_id>/review', methods=['GET'])
+@role_required('interviewee')
 def get_interviewee_review(attempt_id):
     """Get review details for an interviewee's attempt"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
+    user_id = user.id
     
     # Verify the attempt belongs to this user
     attempt = AssessmentAttempt.query.get(attempt_id)
@@ -5029,12 +4053,12 @@ def get_interviewee_review(attempt_id):
                 'question': question.question,
                 'type': question.type,
                 'points': question.points,
-                'options': json.loads(question.options) if question.options else None,
+                'options': parsed_question(question).options or None,
                 'correct_answer': question.correct_answer,
                 'starter_code': question.starter_code,
                 'answer': attempt_answer.answer if attempt_answer else None,
                 'auto_score': review_answer.auto_score,
-                'final_score': review_answer.manual_score or review_answer.auto_score,
+                'final_score': final_points(review_answer),
                 'auto_is_correct': review_answer.auto_is_correct,
                 'final_is_correct': review_answer.is_correct,
                 'feedback': review_answer.feedback,
@@ -5042,9 +4066,7 @@ def get_interviewee_review(attempt_id):
             })
     
     # Calculate actual auto-score from individual question auto-scores
-    total_auto_score = sum(review_answer.auto_score for review_answer in review_answers)
-    total_points = sum(question.points for question in [AssessmentQuestion.query.get(ra.question_id) for ra in review_answers] if question)
-    actual_auto_score = (total_auto_score / total_points * 100) if total_points > 0 else 0
+    actual_auto_score = review_auto_scores([review.id]).get(review.id, 0)
     
     return jsonify({
         'attempt_id': attempt.id,
@@ -5059,14 +4081,8 @@ def get_interviewee_review(attempt_id):
     }), 200
 
 @auth_bp.route('/interviews/candidates', methods=['GET'])
+@role_required('recruiter', 'Only recruiters can view candidates')
 def get_interview_candidates():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Only recruiters can view candidates'}), 403
-    
     # Get all interviewee users with their profiles and assessment results
     interviewees = User.query.filter_by(role='interviewee').all()
     candidates = []
@@ -5096,15 +4112,10 @@ def get_interview_candidates():
     return jsonify({'candidates': candidates}), 200
 
 @auth_bp.route('/search/recruiter', methods=['GET'])
+@role_required('recruiter')
 def recruiter_search():
     """Search functionality for recruiter dashboard"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     query = request.args.get('q', '').strip()
     if not query:
@@ -5256,15 +4267,10 @@ def recruiter_search():
     return jsonify(results), 200
 
 @auth_bp.route('/search/interviewee', methods=['GET'])
+@role_required('interviewee')
 def interviewee_search():
     """Search functionality for interviewee dashboard"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     query = request.args.get('q', '').strip()
     if not query:
@@ -5391,15 +4397,10 @@ def interviewee_search():
     return jsonify(results), 200
 
 @auth_bp.route('/export/interviewee/results', methods=['GET'])
+@role_required('interviewee')
 def export_interviewee_results():
     """Export interviewee's assessment results"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     # Get all attempts for this interviewee
     attempts = db.session.query(
@@ -5469,15 +4470,10 @@ def export_interviewee_results():
     return response
 
 @auth_bp.route('/export/recruiter/results', methods=['GET'])
+@role_required('recruiter')
 def export_recruiter_results():
     """Export recruiter's assessment results"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     # Get all assessment attempts for recruiter's assessments
     attempts = db.session.query(
@@ -5565,15 +4561,10 @@ def export_recruiter_results():
     return response
 
 @auth_bp.route('/export/recruiter/candidates', methods=['GET'])
+@role_required('recruiter')
 def export_recruiter_candidates():
     """Export recruiter's candidates"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     # Get all candidates who have taken assessments for this recruiter
     candidates = db.session.query(
@@ -5651,15 +4642,10 @@ def export_recruiter_candidates():
     return response
 
 @auth_bp.route('/export/recruiter/analytics', methods=['GET'])
+@role_required('recruiter')
 def export_recruiter_analytics():
     """Export recruiter's analytics report"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     # Get analytics data
     total_assessments = Assessment.query.filter_by(recruiter_id=user_id).count()
@@ -5751,15 +4737,10 @@ def export_recruiter_analytics():
     return response
 
 @auth_bp.route('/invitations', methods=['GET'])
+@role_required('interviewee')
 def get_invitations():
     """Get invitations for the current user (interviewee)"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     
     # Get invitations for this user's email
     invitations = AssessmentInvitation.query.filter_by(
@@ -5803,15 +4784,10 @@ def get_invitations():
     return jsonify(invitation_data), 200
 
 @auth_bp.route('/invitations/<int:invitation_id>/accept', methods=['POST'])
+@role_required('interviewee')
 def accept_invitation(invitation_id):
     """Accept an invitation and start assessment"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'interviewee':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = current_user()
     
     invitation = AssessmentInvitation.query.get(invitation_id)
     if not invitation:
@@ -5873,15 +4849,10 @@ def accept_invitation(invitation_id):
     }), 200
 
 @auth_bp.route('/assessments/<int:assessment_id>/invitation-count', methods=['GET'])
+@role_required('recruiter')
 def get_assessment_invitation_count(assessment_id):
     """Get invitation count for an assessment (for recruiter dashboard)"""
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    user = User.query.get(user_id)
-    if not user or user.role != 'recruiter':
-        return jsonify({'error': 'Unauthorized'}), 403
+    user_id = current_user().id
     
     assessment = Assessment.query.filter_by(id=assessment_id, recruiter_id=user_id).first()
     if not assessment:
@@ -5915,12 +4886,13 @@ def handle_assessment_invitation(assessment_id):
     questions = AssessmentQuestion.query.filter_by(assessment_id=assessment.id).all()
     questions_data = []
     for q in questions:
+        parsed = parsed_question(q)
         question_data = {
             'id': q.id,
             'type': q.type,
             'question': q.question,
-            'options': json.loads(q.options) if q.options else [],
-            'correct_answer': json.loads(q.correct_answer) if q.correct_answer else None,
+            'options': parsed.options,
+            'correct_answer': parsed.correct_answer,
             'points': q.points,
             'explanation': q.explanation,
             'starter_code': q.starter_code,
@@ -0,0 +1,16 @@
+"""
+Sandboxed code execution for SmartRecruiter
+
+See ``pool.py`` for the warm worker pool and the per-case cold runner.
+"""
+
+from .pool import (
+    ColdRunner,
+    SandboxError,
+    WorkerPool,
+    get_runner,
+    CRASH_MESSAGE,
+    TIMEOUT_MESSAGE,
+)
+
+__all__ = ['ColdRunner', 'SandboxError', 'WorkerPool', 'get_runner', 'CRASH_MESSAGE', 'TIMEOUT_MESSAGE']
@@ -0,0 +1,160 @@
+// Warm Node.js sandbox worker for SmartRecruiter code execution.
+//
+// Reads one JSON job per line on stdin ({id, source, inputs, timeout}), runs
+// the submitted program once per input inside a fresh vm context and writes
+// one JSON line ({id, results: [...]}) back on stdout.
+//
+// The context gets shims for console, process and timers, and a require()
+// limited to a few modules without I/O. A vm context is not a security
+// boundary, so the pool also treats anything on stdout besides the reply to
+// the current job as a corrupted worker, and replaces this process after
+// every job so nothing a submission changes can reach the next one.
+'use strict';
+
+const readlineInterface = require('readline');
+const util = require('util');
+const vm = require('vm');
+
+// Held from start-up, before any submission code can patch the globals
+const protocolWrite = process.stdout.write.bind(process.stdout);
+const stringify = JSON.stringify;
+
+const ALLOWED_MODULES = new Set(['assert', 'buffer', 'events', 'string_decoder', 'util']);
+
+class ExitSignal extends Error {}
+
+// Keep the worker alive if user timers throw after their case has finished
+process.on('uncaughtException', () => {});
+process.on('unhandledRejection', () => {});
+
+function formatError(err) {
+  if (err && err.stack) {
+    // Hide the worker's own frames so the trace starts at the submission
+    const lines = String(err.stack).split('\n').filter(
+      (frame) => !(frame.trimStart().startsWith('at ') && !frame.includes('main.js'))
+    );
+    return lines.join('\n') + '\n';
+  }
+  return String(err) + '\n';
+}
+
+function sandboxRequire(name) {
+  const id = String(name).replace(/^node:/, '');
+  if (!ALLOWED_MODULES.has(id)) {
+    const err = new Error(`Cannot find module '${name}'`);
+    err.code = 'MODULE_NOT_FOUND';
+    throw err;
+  }
+  return require(id);
+}
+
+function createSandbox(input, stdout, stderr, timers) {
+  const log = (buffer) => (...args) => { buffer.push(util.format(...args) + '\n'); };
+  const write = (buffer) => (chunk) => { buffer.push(String(chunk)); return true; };
+  const track = (schedule, clear) => (...args) => {
+    const handle = schedule(...args);
+    timers.push([clear, handle]);
+    return handle;
+  };
+  const moduleObject = { exports: {} };
+  return vm.createContext({
+    console: {
+      log: log(stdout),
+      info: log(stdout),
+      debug: log(stdout),
+      warn: log(stderr),
+      error: log(stderr),
+    },
+    // Same contract as the original runner: readline() returns the test input
+    readline: () => input,
+    require: sandboxRequire,
+    module: moduleObject,
+    exports: moduleObject.exports,
+    Buffer,
+    process: {
+      argv: ['node', 'main.js'],
+      env: {},
+      stdout: { write: write(stdout) },
+      stderr: { write: write(stderr) },
+      exit: (code) => { throw new ExitSignal(String(code || 0)); },
+    },
+    setTimeout: track(setTimeout, clearTimeout),
+    setInterval: track(setInterval, clearInterval),
+    setImmediate: track(setImmediate, clearImmediate),
+    clearTimeout,
+    clearInterval,
+    clearImmediate,
+  });
+}
+
+function cpuMs(usage) {
+  return (usage.user + usage.system) / 1000;
+}
+
+async function runCase(script, compileError, input, timeoutMs) {
+  const stdout = [];
+  const stderr = [];
+  const timers = [];
+  let timedOut = false;
+  const started = process.hrtime.bigint();
+  const cpuStarted = process.cpuUsage();
+  if (compileError) {
+    stderr.push(formatError(compileError));
+  } else {
+    try {
+      script.runInContext(createSandbox(input, stdout, stderr, timers), { timeout: timeoutMs });
+      // Let resolved promises and setImmediate callbacks flush their output
+      await new Promise((resolve) => setImmediate(resolve));
+    } catch (err) {
+      if (err && err.code === 'ERR_SCRIPT_EXECUTION_TIMEOUT') {
+        timedOut = true;
+      } else if (!(err instanceof ExitSignal)) {
+        stderr.push(formatError(err));
+      }
+    }
+  }
+  timers.forEach(([clear, handle]) => clear(handle));
+  return {
+    stdout: stdout.join(''),
+    stderr: stderr.join(''),
+    timed_out: timedOut,
+    wall_ms: Number(process.hrtime.bigint() - started) / 1e6,
+    cpu_ms: cpuMs(process.cpuUsage(cpuStarted)),
+  };
+}
+
+async function handleJob(line) {
+  let id = null;
+  let results = [];
+  try {
+    const job = JSON.parse(line);
+    id = job.id === undefined ? null : job.id;
+    const timeoutMs = Math.max(1, Math.round((job.timeout || 5) * 1000));
+    let script = null;
+    let compileError = null;
+    try {
+      script = new vm.Script(job.source || '', { filename: 'main.js' });
+    } catch (err) {
+      compileError = err;
+    }
+    for (const input of job.inputs || []) {
+      const result = await runCase(script, compileError, input, timeoutMs);
+      results.push(result);
+      if (result.timed_out) {
+        break;
+      }
+    }
+  } catch (err) {
+    results = [{ stdout: '', stderr: formatError(err), timed_out: false, wall_ms: 0, cpu_ms: 0 }];
+  }
+  protocolWrite(stringify({ id, results }) + '\n');
+}
+
+const jobs = readlineInterface.createInterface({ input: process.stdin });
+let queue = Promise.resolve();
+jobs.on('line', (line) => {
+  queue = queue.then(() => handleJob(line));
+});
+jobs.on('close', () => {
+  queue.then(() => process.exit(0));
+});
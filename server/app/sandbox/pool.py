@@ -0,0 +1,405 @@
+"""
+Code execution runners for SmartRecruiter
+
+``WorkerPool`` keeps a small number of pre-started ``node`` and ``python3``
+worker processes per language. A whole batch of test-case inputs is sent to one
+worker as a single JSON line on stdin and comes back as a single JSON line on
+stdout, so a submission pays interpreter start-up once instead of once per
+test case.
+
+Each job carries a random id that the worker echoes back. A reply with the
+wrong id, a line that is not a reply, or any output beyond the one reply marks
+the worker as corrupted: it is killed and replaced, and the batch reports a
+crash. Python workers fork a fresh process per test case, so a submission
+cannot change what the next one runs with. ``vm`` contexts give no such
+guarantee, so a Node worker serves a single job and is replaced with a
+freshly started one as soon as it is released.
+
+``ColdRunner`` starts a fresh interpreter for every input, which is how
+``/run-code`` used to work. It is kept for deployments that disable the pool
+and as the baseline for ``scripts/benchmark_code_runner.py``.
+
+Both runners return one dict per executed input with ``stdout``, ``stderr``,
+``timed_out``, ``wall_ms`` and ``cpu_ms`` keys. Execution stops at the first
+input that times out, so the list can be shorter than ``inputs``.
+
+Both runners are safe to call from several threads at once. Each runner caps
+how many batches execute at the same time across all languages
+(``max_concurrency``, default one per CPU), so fanning test cases out over
+threads cannot oversubscribe the host.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import resource
+import secrets
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKER_COMMANDS = {
+    'javascript': ['node', '--max-old-space-size=256', os.path.join(HARNESS_DIR, 'node_worker.js')],
+    'python': ['python3', '-I', os.path.join(HARNESS_DIR, 'python_worker.py')],
+}
+
+# Languages whose workers are replaced after every job instead of reused
+SINGLE_USE_LANGUAGES = {'javascript'}
+
+# Extra time a worker gets on top of the per-case limits before it is killed
+RESPONSE_GRACE = 2.0
+# How long a request waits for a busy pool before giving up
+ACQUIRE_TIMEOUT = 30.0
+
+TIMEOUT_MESSAGE = 'Error: Code execution timed out (possible infinite loop)'
+CRASH_MESSAGE = 'Error: Code execution was terminated unexpectedly'
+
+
+class SandboxError(Exception):
+    """Raised when a worker dies, stops answering or cannot be acquired."""
+
+    def __init__(self, message: str, timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+def _sandbox_env() -> Dict[str, str]:
+    """Minimal environment for user code: no app secrets, no DATABASE_URL."""
+    return {
+        'PATH': os.environ.get('PATH', '/usr/local/bin:/usr/bin:/bin'),
+        'LANG': 'C.UTF-8',
+        'PYTHONIOENCODING': 'utf-8',
+    }
+
+
+def _timed_out_result() -> Dict:
+    return {'stdout': '', 'stderr': '', 'timed_out': True, 'wall_ms': 0, 'cpu_ms': 0}
+
+
+def _crashed_result() -> Dict:
+    return {'stdout': '', 'stderr': CRASH_MESSAGE, 'timed_out': False, 'wall_ms': 0, 'cpu_ms': 0}
+
+
+def _default_concurrency() -> int:
+    return os.cpu_count() or 2
+
+
+class _ExecutionSlots:
+    """Caps the number of batches executing at once."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise SandboxError('Sandbox is at its concurrency limit')
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+
+
+class SandboxWorker:
+    """One long-lived interpreter process speaking the JSON-lines protocol."""
+
+    def __init__(self, language: str, workdir: str):
+        self.language = language
+        self.jobs = 0
+        self._buffer = b''
+        self.process = subprocess.Popen(
+            WORKER_COMMANDS[language],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=workdir,
+            env=_sandbox_env(),
+            start_new_session=True,
+        )
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def usable(self) -> bool:
+        """Alive, and has written nothing since its last reply."""
+        return self.alive() and not self._buffer and not self._readable()
+
+    def _readable(self) -> bool:
+        return bool(select.select([self.process.stdout.fileno()], [], [], 0)[0])
+
+    def run(self, source: str, inputs: List[str], timeout: float) -> List[Dict]:
+        if not self.usable():
+            raise SandboxError(f'{self.language} worker wrote outside the protocol')
+        job_id = secrets.token_hex(16)
+        job = json.dumps({'id': job_id, 'source': source, 'inputs': inputs, 'timeout': timeout}) + '\n'
+        try:
+            self.process.stdin.write(job.encode('utf-8'))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SandboxError(f'{self.language} worker is not accepting jobs: {e}')
+        self.jobs += 1
+        deadline = time.monotonic() + timeout * max(len(inputs), 1) + RESPONSE_GRACE
+        line = self._read_line(deadline)
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            reply = None
+        if (
+            not isinstance(reply, dict)
+            or reply.get('id') != job_id
+            or not isinstance(reply.get('results'), list)
+            or len(reply['results']) > len(inputs)
+            or self._buffer
+        ):
+            raise SandboxError(f'{self.language} worker sent an unexpected reply')
+        return reply['results']
+
+    def _read_line(self, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SandboxError(f'{self.language} worker did not answer in time', timed_out=True)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise SandboxError(f'{self.language} worker exited')
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class WorkerPool:
+    """Pool of warm sandbox workers, ``size`` per language.
+
+    At most ``max_concurrency`` batches run at once over all languages.
+    """
+
+    def __init__(self, size: int = 2, max_jobs: int = 200, timeout: float = 5, max_concurrency: Optional[int] = None):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._slots = _ExecutionSlots(max_concurrency or _default_concurrency())
+        self.pid = os.getpid()
+        self._idle = {language: queue.LifoQueue() for language in WORKER_COMMANDS}
+        self._spawned = {language: 0 for language in WORKER_COMMANDS}
+        self._lock = threading.Lock()
+        self._workdir = tempfile.mkdtemp(prefix='smartrecruiter-sandbox-')
+
+    def warm(self, languages: Optional[List[str]] = None):
+        """Pre-start workers so the first submissions do not pay start-up."""
+        for language in languages or list(WORKER_COMMANDS):
+            if shutil.which(WORKER_COMMANDS[language][0]) is None:
+                continue
+            while True:
+                with self._lock:
+                    if self._spawned[language] >= self.size:
+                        break
+                    self._spawned[language] += 1
+                self._idle[language].put(self._spawn(language))
+
+    def run(self, language: str, source: str, inputs: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        if language not in WORKER_COMMANDS:
+            raise ValueError(f'Unsupported language: {language}')
+        timeout = timeout or self.timeout
+        with self._slots:
+            worker = self._acquire(language)
+            try:
+                results = worker.run(source, inputs, timeout)
+            except SandboxError as e:
+                logging.warning(f'Sandbox worker replaced: {e}')
+                self._discard(worker)
+                return [_timed_out_result()] if e.timed_out else [_crashed_result() for _ in inputs]
+            except Exception:
+                self._discard(worker)
+                raise
+            self._release(worker)
+        return results
+
+    def shutdown(self):
+        for language, idle in self._idle.items():
+            while True:
+                try:
+                    worker = idle.get_nowait()
+                except queue.Empty:
+                    break
+                worker.kill()
+                with self._lock:
+                    self._spawned[language] -= 1
+        shutil.rmtree(self._workdir, ignore_errors=True)
+
+    def _spawn(self, language: str) -> SandboxWorker:
+        try:
+            return SandboxWorker(language, self._workdir)
+        except OSError:
+            with self._lock:
+                self._spawned[language] -= 1
+            raise
+
+    def _acquire(self, language: str) -> SandboxWorker:
+        idle = self._idle[language]
+        while True:
+            try:
+                worker = idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_spawn = self._spawned[language] < self.size
+                    if can_spawn:
+                        self._spawned[language] += 1
+                if can_spawn:
+                    return self._spawn(language)
+                try:
+                    worker = idle.get(timeout=ACQUIRE_TIMEOUT)
+                except queue.Empty:
+                    raise SandboxError(f'No {language} sandbox worker became available')
+            if worker.usable():
+                return worker
+            self._discard(worker)
+
+    def _release(self, worker: SandboxWorker):
+        if not worker.alive() or worker.jobs >= self.max_jobs:
+            self._discard(worker)
+        elif worker.language in SINGLE_USE_LANGUAGES:
+            # Start the replacement right away so the next submission finds it warm
+            worker.kill()
+            try:
+                replacement = SandboxWorker(worker.language, self._workdir)
+            except OSError:
+                with self._lock:
+                    self._spawned[worker.language] -= 1
+                return
+            self._idle[worker.language].put(replacement)
+        else:
+            self._idle[worker.language].put(worker)
+
+    def _discard(self, worker: SandboxWorker):
+        worker.kill()
+        with self._lock:
+            self._spawned[worker.language] -= 1
+
+
+class ColdRunner:
+    """Starts a fresh interpreter for every input (the pre-pool behaviour).
+
+    Python runs through the same harness as the pool workers, so compile
+    errors and timing are reported identically.
+    """
+
+    def __init__(self, timeout: float = 5, max_concurrency: Optional[int] = None):
+        self.timeout = timeout
+        self._slots = _ExecutionSlots(max_concurrency or _default_concurrency())
+
+    def run(self, language: str, source: str, inputs: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        if language not in WORKER_COMMANDS:
+            raise ValueError(f'Unsupported language: {language}')
+        with self._slots:
+            return self._run(language, source, inputs, timeout or self.timeout)
+
+    def _run(self, language: str, source: str, inputs: List[str], timeout: float) -> List[Dict]:
+        run_one = self._run_python if language == 'python' else self._run_javascript
+        results = []
+        for input_val in inputs:
+            result = run_one(source, input_val, timeout)
+            results.append(result)
+            if result['timed_out']:
+                break
+        return results
+
+    def _run_python(self, source: str, input_val: str, timeout: float) -> Dict:
+        # Same harness as the pool, in a fresh interpreter that exits after one case
+        job = json.dumps({'source': source, 'inputs': [input_val], 'timeout': timeout}) + '\n'
+        try:
+            proc = subprocess.run(
+                WORKER_COMMANDS['python'], input=job, capture_output=True, text=True,
+                timeout=timeout + RESPONSE_GRACE, env=_sandbox_env(),
+            )
+            return json.loads(proc.stdout)['results'][0]
+        except subprocess.TimeoutExpired:
+            return _timed_out_result()
+        except (ValueError, KeyError, IndexError):
+            return _crashed_result()
+
+    def _run_javascript(self, source: str, input_val: str, timeout: float) -> Dict:
+        program = f"const readline = () => {json.dumps(input_val)};\n{source}\n"
+        with tempfile.NamedTemporaryFile(suffix='.js', delete=False, mode='w') as f:
+            f.write(program)
+            temp_path = f.name
+        started = time.perf_counter()
+        # Children's rusage is process-wide, so this over-counts when cold runs overlap
+        usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            proc = subprocess.run(['node', temp_path], capture_output=True, text=True, timeout=timeout)
+            usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            return {
+                'stdout': proc.stdout,
+                'stderr': proc.stderr,
+                'timed_out': False,
+                'wall_ms': (time.perf_counter() - started) * 1000,
+                'cpu_ms': (
+                    usage_after.ru_utime + usage_after.ru_stime
+                    - usage_before.ru_utime - usage_before.ru_stime
+                ) * 1000,
+            }
+        except subprocess.TimeoutExpired:
+            return _timed_out_result()
+        finally:
+            os.remove(temp_path)
+
+
+_pool = None
+_cold_runner = None
+_pool_lock = threading.Lock()
+
+
+def get_runner(config):
+    """Return the runner selected by the app config.
+
+    The pool is created lazily and per process, so gunicorn workers forked
+    from a preloaded master each get their own sandbox processes.
+    """
+    timeout = config.get('SANDBOX_TIMEOUT', 5)
+    max_concurrency = config.get('SANDBOX_MAX_CONCURRENCY')
+    global _pool, _cold_runner
+    if not config.get('SANDBOX_POOL_ENABLED', True):
+        with _pool_lock:
+            if _cold_runner is None:
+                _cold_runner = ColdRunner(timeout=timeout, max_concurrency=max_concurrency)
+        return _cold_runner
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = WorkerPool(
+                # Enough workers for one submission to use its full fan-out
+                size=max(config.get('SANDBOX_WORKERS_PER_LANGUAGE', 2), config.get('SANDBOX_PARALLEL_CASES', 1)),
+                max_jobs=config.get('SANDBOX_MAX_JOBS_PER_WORKER', 200),
+                timeout=timeout,
+                max_concurrency=max_concurrency,
+            )
+            _pool.warm()
+            atexit.register(_pool.shutdown)
+    return _pool
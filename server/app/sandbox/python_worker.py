@@ -0,0 +1,183 @@
+"""
+Warm Python sandbox worker for SmartRecruiter code execution.
+
+Reads one JSON job per line ({id, source, inputs, timeout}), executes the
+submitted program once per input and writes one JSON line ({id, results: [...]})
+back.
+
+Every input runs in a child forked from the worker, in a fresh ``__main__``
+namespace with its own copy of the builtins. Whatever the submission changes
+(``sys.modules``, the ``builtins`` module, open files, signal handlers) dies
+with the child, so nothing carries over to the next case or submission. The
+child has no access to the protocol pipes: its stdout and stderr go to
+temporary files that the worker reads back, and the worker measures the time
+and kills the child when it runs past its limit.
+
+Each source is compiled once and the code object is kept in a small LRU
+cache, so re-running a submission (or another batch of its test cases) skips
+parsing entirely. A source that does not compile is reported once per input
+with ``compile_error`` set instead of being executed.
+
+This file is started as a standalone script by ``app.sandbox.pool`` and must
+not import anything from the application.
+"""
+import builtins
+import hashlib
+import io
+import json
+import os
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from collections import OrderedDict
+
+CODE_CACHE_SIZE = 32
+# Poll interval while waiting for a case when pidfds are not available
+WAIT_INTERVAL = 0.002
+
+_code_cache = OrderedDict()
+# Descriptors of the protocol pipes, closed in every case process
+_protocol_fds = []
+
+
+def _format_exception(exc):
+    # Drop the worker's own frame so tracebacks start at the submission
+    tb = exc.__traceback__.tb_next if exc.__traceback__ else None
+    return ''.join(traceback.format_exception(type(exc), exc, tb))
+
+
+def compile_source(source):
+    """Return ``(code, compile_error)`` for ``source``, cached by content hash."""
+    key = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    if key in _code_cache:
+        _code_cache.move_to_end(key)
+        return _code_cache[key]
+    try:
+        compiled = (compile(source, 'main.py', 'exec'), None)
+    except (SyntaxError, ValueError) as exc:
+        # Same message the pre-harness compile check returned
+        compiled = (None, str(exc))
+    _code_cache[key] = compiled
+    if len(_code_cache) > CODE_CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return compiled
+
+
+def _exec_case(code, stdin_text, stdout_fd, stderr_fd):
+    """Body of the forked case process; never returns."""
+    try:
+        os.setpgid(0, 0)
+        for fd in _protocol_fds:
+            os.close(fd)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        sys.stdin = io.StringIO(stdin_text)
+        try:
+            exec(code, {'__name__': '__main__', '__builtins__': dict(vars(builtins))})
+        except SystemExit as exc:
+            if exc.code is not None and not isinstance(exc.code, int):
+                sys.__stderr__.write(f'{exc.code}\n')
+        except BaseException as exc:
+            sys.__stderr__.write(_format_exception(exc))
+        for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+            try:
+                stream.flush()
+            except BaseException:
+                pass
+    finally:
+        os._exit(0)
+
+
+def _wait_for_exit(pid, timeout):
+    """True once ``pid`` has exited, False if ``timeout`` runs out first. Does not reap it."""
+    deadline = time.monotonic() + timeout
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+    try:
+        while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if pidfd is None:
+                time.sleep(min(remaining, WAIT_INTERVAL))
+            else:
+                select.select([pidfd], [], [], remaining)
+        return True
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def run_case(code, compile_error, stdin_text, timeout):
+    if compile_error:
+        return {'stdout': '', 'stderr': compile_error, 'timed_out': False,
+                'wall_ms': 0, 'cpu_ms': 0, 'compile_error': True}
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            _exec_case(code, stdin_text, stdout.fileno(), stderr.fileno())
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass
+        timed_out = not _wait_for_exit(pid, timeout)
+        # Take down anything the case started along with it
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+        usage = os.wait4(pid, 0)[2]
+        wall_ms = (time.perf_counter() - started) * 1000
+        stdout.seek(0)
+        stderr.seek(0)
+        return {
+            'stdout': stdout.read().decode('utf-8', 'replace'),
+            'stderr': stderr.read().decode('utf-8', 'replace'),
+            'timed_out': timed_out,
+            'wall_ms': wall_ms,
+            'cpu_ms': (usage.ru_utime + usage.ru_stime) * 1000,
+            'compile_error': False,
+        }
+
+
+def handle_job(line):
+    job = {}
+    try:
+        job = json.loads(line)
+        timeout = float(job.get('timeout') or 5)
+        code, compile_error = compile_source(job.get('source') or '')
+        results = []
+        for stdin_text in job.get('inputs') or []:
+            result = run_case(code, compile_error, stdin_text, timeout)
+            results.append(result)
+            if result['timed_out']:
+                break
+    except Exception as exc:
+        results = [{'stdout': '', 'stderr': f'{exc}\n', 'timed_out': False, 'wall_ms': 0, 'cpu_ms': 0}]
+    return {'id': job.get('id') if isinstance(job, dict) else None, 'results': results}
+
+
+def main():
+    # Keep private copies of the protocol pipes and point fds 0/1 at /dev/null;
+    # case processes close the copies, so submissions cannot reach the channel.
+    protocol_in = os.fdopen(os.dup(0), 'r', encoding='utf-8')
+    protocol_out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    _protocol_fds.extend([protocol_in.fileno(), protocol_out.fileno()])
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    for line in protocol_in:
+        if not line.strip():
+            continue
+        protocol_out.write(json.dumps(handle_job(line)) + '\n')
+        protocol_out.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Assessment scoring for SmartRecruiter
+
+One set of rules for every score an attempt gets: the automatic score when
+the candidate submits, the per-question auto scores a review starts from, and
+the final score when the review is completed.
+
+* multiple-choice and short-answer questions earn their points when correct;
+* coding questions earn their points times the share of test cases passed;
+* essays earn nothing automatically and are left to the reviewer.
+
+Scores are percentages of the points available. Each function loads what it
+needs with a single query and indexes it by question id, so the cost is one
+pass over the questions however many answers an attempt has.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, func, select
+
+from .models import db, AssessmentAttemptAnswer, AssessmentQuestion, AssessmentReviewAnswer
+
+
+class AttemptScore(NamedTuple):
+    score: float  # percentage
+    earned_points: float
+    total_points: float
+    points: Dict[int, float]  # auto points per question id
+
+
+def percentage(earned: float, total: float) -> float:
+    return (earned / total * 100) if total > 0 else 0
+
+
+def auto_points(question: AssessmentQuestion, answer: Optional[AssessmentAttemptAnswer]) -> float:
+    """Points a question earns before any manual review."""
+    if answer is None or question.type == 'essay':
+        return 0
+    if question.type == 'coding':
+        return question.points * answer.test_case_score if answer.test_case_score is not None else 0
+    return question.points if answer.is_correct else 0
+
+
+def question_answers(assessment_id: int, attempt_id: int) -> List[Tuple[AssessmentQuestion, Optional[AssessmentAttemptAnswer]]]:
+    """The assessment's questions in order, each with the attempt's answer (or None), in one query."""
+    rows = db.session.execute(
+        select(AssessmentQuestion, AssessmentAttemptAnswer)
+        .outerjoin(AssessmentAttemptAnswer, and_(AssessmentAttemptAnswer.question_id == AssessmentQuestion.id,
+                                                 AssessmentAttemptAnswer.attempt_id == attempt_id))
+        .where(AssessmentQuestion.assessment_id == assessment_id)
+        .order_by(AssessmentQuestion.id, AssessmentAttemptAnswer.id)
+    ).all()
+    # A question answered twice keeps its first answer
+    index = OrderedDict()
+    for question, answer in rows:
+        if question.id not in index:
+            index[question.id] = (question, answer)
+    return list(index.values())
+
+
+def score_attempt(attempt) -> AttemptScore:
+    """Automatic score of an attempt from its answers."""
+    earned = 0
+    total = 0
+    points = {}
+    for question, answer in question_answers(attempt.assessment_id, attempt.id):
+        points[question.id] = auto_points(question, answer)
+        earned += points[question.id]
+        total += question.points
+    return AttemptScore(percentage(earned, total), earned, total, points)
+
+
+def final_points(review_answer: AssessmentReviewAnswer) -> float:
+    return review_answer.manual_score or review_answer.auto_score or 0
+
+
+def score_review(review_id: int) -> float:
+    """Final score of a review: non-zero manual scores, auto scores otherwise."""
+    review_answers = AssessmentReviewAnswer.query.filter_by(review_id=review_id).all()
+    return percentage(sum(final_points(a) for a in review_answers),
+                      sum(a.max_points or 0 for a in review_answers))
+
+
+def review_auto_scores(review_ids: Iterable[int]) -> Dict[int, float]:
+    """Auto score percentage per review id, for reviews with answers worth points; one grouped query."""
+    review_ids = list(review_ids)
+    if not review_ids:
+        return {}
+    rows = db.session.execute(
+        select(
+            AssessmentReviewAnswer.review_id,
+            func.sum(AssessmentReviewAnswer.auto_score),
+            func.sum(AssessmentQuestion.points),
+        )
+        .outerjoin(AssessmentQuestion, AssessmentQuestion.id == AssessmentReviewAnswer.question_id)
+        .where(AssessmentReviewAnswer.review_id.in_(review_ids))
+        .group_by(AssessmentReviewAnswer.review_id)
+    )
+    return {review_id: percentage(earned or 0, total) for review_id, earned, total in rows if total}
@@ -0,0 +1,141 @@
+"""
+Session cache for SmartRecruiter
+
+``DatabaseSessionInterface`` keeps sessions in the ``session`` table. This
+write-through cache holds each session's decoded data, its serialized form
+and its expiry in process, so a request for a recently confirmed session
+reads neither the table nor JSON.
+
+The cache belongs to one process. A hit confirmed against the table less
+than ``SESSION_CACHE_CONFIRM_AFTER`` seconds ago is used as is; an older hit
+is confirmed with one primary-key read of the row. Every write stores a new
+expiry, so a matching expiry means the cached data is still current and is
+used without decoding. Otherwise the row read in that same statement
+replaces the entry. A session rewritten or ended by another worker (logout
+deletes the row) is therefore noticed within ``SESSION_CACHE_CONFIRM_AFTER``
+seconds, the same lag the signed-session denylist accepts; set it to 0 to
+confirm every hit. Entries also expire after ``SESSION_CACHE_TTL`` seconds.
+The cache is off unless ``SESSION_CACHE_ENABLED`` is set. Skipping unchanged
+writes does not depend on it: ``open_session`` remembers what it read.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class CachedSession(NamedTuple):
+    data: str  # JSON as stored in session.data
+    values: Dict[str, Any]  # data decoded; callers copy it before use
+    expiry: datetime
+    confirmed_at: float  # time.time() the entry last matched the table
+
+
+class SessionCache:
+    """LRU + TTL cache of ``CachedSession`` entries keyed by session id."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60, confirm_after: float = 5):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.confirm_after = confirm_after
+        self._entries = OrderedDict()  # sid -> (cached_at, CachedSession)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+        self.confirmations = 0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    def get(self, sid: str) -> Optional[CachedSession]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(sid)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[sid]
+            self.misses += 1
+            return None
+
+    def needs_confirmation(self, entry: CachedSession) -> bool:
+        return time.time() - entry.confirmed_at >= self.confirm_after
+
+    def put(self, sid: str, data: str, values: Dict[str, Any], expiry: datetime):
+        now = time.time()
+        with self._lock:
+            self._entries[sid] = (now, CachedSession(data, values, expiry, now))
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, sid: str):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def confirmed(self, sid: str, entry: CachedSession):
+        """Record that the table still agrees with ``entry``."""
+        with self._lock:
+            self.confirmations += 1
+            if sid in self._entries:
+                self._entries[sid] = (self._entries[sid][0], entry._replace(confirmed_at=time.time()))
+
+    def reject(self, sid: str):
+        """Drop a hit the table no longer agrees with and count it as a miss."""
+        with self._lock:
+            self._entries.pop(sid, None)
+            self.hits -= 1
+            self.misses += 1
+            self.stale += 1
+
+    def record_write(self, skipped: bool):
+        with self._lock:
+            if skipped:
+                self.skipped_writes += 1
+            else:
+                self.writes += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            saves = self.writes + self.skipped_writes
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'confirm_after': self.confirm_after,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'stale': self.stale,
+                'confirmations': self.confirmations,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'writes': self.writes,
+                'skipped_writes': self.skipped_writes,
+                'write_skip_rate': self.skipped_writes / saves if saves else 0,
+            }
+
+
+def get_session_cache(app) -> Optional[SessionCache]:
+    """The app's session cache, created on first use; None when caching is disabled."""
+    config = app.config
+    if not config.get('SESSION_CACHE_ENABLED', False):
+        return None
+    cache = app.extensions.get('session_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('session_cache', SessionCache(
+            max_entries=config.get('SESSION_CACHE_SIZE', 10000),
+            ttl=config.get('SESSION_CACHE_TTL', 60),
+            confirm_after=config.get('SESSION_CACHE_CONFIRM_AFTER', 5),
+        ))
+    return cache
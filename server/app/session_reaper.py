@@ -0,0 +1,119 @@
+"""
+Expired session reaper for SmartRecruiter
+
+``open_session`` ignores expired rows but never deletes them. ``purge_expired``
+removes them in batches of ``SESSION_REAPER_BATCH_SIZE``, oldest first, by
+walking the index on ``session.expiry``. It commits after every batch, so no
+single transaction holds many row locks.
+
+Revocations of signed-cookie sessions are dropped once the cookie they
+block has expired. Run it from cron with ``flask purge-sessions``.
+Alternatively, set ``SESSION_REAPER_INTERVAL`` (seconds) to run it from a
+daemon thread in each web process.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+import click
+from flask import current_app
+from sqlalchemy import delete, select
+
+from .models import db, Session
+from .signed_sessions import purge_revocations
+
+_sessions = Session.__table__
+_reaper = None
+_reaper_pid = None
+_reaper_lock = threading.Lock()
+
+
+def purge_expired(batch_size: int = 1000, max_batches: Optional[int] = None,
+                  now: Optional[datetime] = None) -> int:
+    """Delete sessions that expired before ``now``; returns the number of rows removed."""
+    now = now or datetime.utcnow()
+    purged = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.execute(
+            select(_sessions.c.id).where(_sessions.c.expiry < now).order_by(_sessions.c.expiry).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(_sessions).where(_sessions.c.id.in_(ids)))
+        db.session.commit()
+        purged += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return purged
+
+
+class SessionReaper:
+    """Daemon thread that purges expired sessions every ``interval`` seconds."""
+
+    def __init__(self, app, interval: float, batch_size: int = 1000):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='session-reaper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    purged = purge_expired(batch_size=self.batch_size)
+                    revocations = purge_revocations()
+                    if purged or revocations:
+                        logging.info(f'Purged {purged} expired session(s) and {revocations} revocation(s)')
+                except Exception:
+                    logging.exception('Session reaper iteration failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+def _ensure_reaper():
+    """Start this process's reaper thread on its first request (after any fork)."""
+    global _reaper, _reaper_pid
+    if _reaper is not None and _reaper_pid == os.getpid():
+        return
+    config = current_app.config
+    with _reaper_lock:
+        if _reaper is None or _reaper_pid != os.getpid():
+            _reaper = SessionReaper(
+                current_app._get_current_object(),
+                interval=config['SESSION_REAPER_INTERVAL'],
+                batch_size=config.get('SESSION_REAPER_BATCH_SIZE', 1000),
+            )
+            _reaper_pid = os.getpid()
+            _reaper.start()
+
+
+def init_app(app):
+    """Register ``flask purge-sessions`` and, if configured, the in-process reaper."""
+    if app.config.get('SESSION_REAPER_INTERVAL'):
+        app.before_request(_ensure_reaper)
+
+    @app.cli.command('purge-sessions')
+    @click.option('--batch-size', default=None, type=int, help='Rows deleted per transaction.')
+    @click.option('--max-batches', default=None, type=int, help='Stop after this many batches.')
+    def purge_sessions(batch_size, max_batches):
+        """Delete expired sessions from the session table."""
+        purged = purge_expired(
+            batch_size=batch_size or current_app.config.get('SESSION_REAPER_BATCH_SIZE', 1000),
+            max_batches=max_batches,
+        )
+        click.echo(f'Purged {purged} expired session(s)')
+        click.echo(f'Purged {purge_revocations()} expired revocation(s)')
@@ -0,0 +1,208 @@
+"""
+Signed cookie sessions for SmartRecruiter
+
+With ``SESSION_BACKEND = 'signed'`` the session payload (``user_id``,
+``role``) travels in the cookie itself. The payload is signed with the app's
+secret key and carries a timestamp, so tampered or expired cookies are
+rejected without touching the database. Only a random session id inside the
+payload ties a cookie to the server.
+
+Signed cookies cannot be deleted server-side. Instead, ending a session
+(logout, account deletion) records its id in the ``revoked_session``
+denylist until the cookie would have expired anyway. Each process keeps the denylist in memory.
+It picks up revocations made by other processes with one incremental query
+at most every ``SESSION_DENYLIST_REFRESH`` seconds, so ordinary requests run
+no session query at all.
+
+The incremental query goes by ``revoked_at``. It reaches back
+``SESSION_DENYLIST_OVERLAP`` seconds before the previous sync, so a
+revocation committed after a later one, or stamped by a clock that runs
+slightly behind, is still picked up. Every ``SESSION_DENYLIST_FULL_SYNC``
+seconds the whole unexpired set is read again, which bounds anything the
+window misses.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.datastructures import CallbackDict
+
+from .models import db, RevokedSession
+
+_revoked = RevokedSession.__table__
+
+
+class SessionDenylist:
+    """In-process copy of ``revoked_session``, refreshed by revocation time."""
+
+    def __init__(self, refresh_interval: float = 5, overlap: float = 60, full_sync_interval: float = 300):
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self.full_sync_interval = full_sync_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._since = None  # revoked_at the next incremental query starts from
+        self._synced_at = None
+        self._full_synced_at = None
+        self._lock = threading.Lock()
+
+    def revoke(self, sid: str, expires_at: datetime):
+        """Record ``sid`` as revoked; a concurrent revocation of the same id is a no-op.
+
+        Leaves committing to the caller.
+        """
+        with self._lock:
+            if sid in self._revoked:
+                return
+        values = dict(session_id=sid, expires_at=expires_at, revoked_at=datetime.utcnow())
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+            db.session.execute(dialect_insert(_revoked).values(**values).on_conflict_do_nothing(
+                index_elements=[_revoked.c.session_id],
+            ))
+        elif db.session.execute(select(_revoked.c.id).where(_revoked.c.session_id == sid)).first() is None:
+            db.session.execute(insert(_revoked).values(**values))
+        with self._lock:
+            self._revoked[sid] = expires_at
+
+    def is_revoked(self, sid: str) -> bool:
+        self._sync()
+        with self._lock:
+            return sid in self._revoked
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.refresh_interval:
+            return
+        started = datetime.utcnow()
+        query = select(_revoked.c.session_id, _revoked.c.expires_at).where(_revoked.c.expires_at >= started)
+        full = self._full_synced_at is None or now - self._full_synced_at >= self.full_sync_interval
+        if not full:
+            query = query.where(_revoked.c.revoked_at >= self._since)
+        rows = db.session.execute(query).all()
+        with self._lock:
+            for row in rows:
+                self._revoked[row.session_id] = row.expires_at
+            for sid in [sid for sid, expires_at in self._revoked.items() if expires_at < started]:
+                del self._revoked[sid]
+            self._since = started - self.overlap
+            self._synced_at = now
+            if full:
+                self._full_synced_at = now
+
+
+def get_session_denylist(app) -> SessionDenylist:
+    denylist = app.extensions.get('session_denylist')
+    if denylist is None:
+        denylist = app.extensions.setdefault('session_denylist', SessionDenylist(
+            refresh_interval=app.config.get('SESSION_DENYLIST_REFRESH', 5),
+            overlap=app.config.get('SESSION_DENYLIST_OVERLAP', 60),
+            full_sync_interval=app.config.get('SESSION_DENYLIST_FULL_SYNC', 300),
+        ))
+    return denylist
+
+
+def purge_revocations(now: Optional[datetime] = None) -> int:
+    """Drop denylist rows whose cookies have expired; returns the number removed."""
+    result = db.session.execute(delete(_revoked).where(_revoked.c.expires_at < (now or datetime.utcnow())))
+    db.session.commit()
+    return result.rowcount
+
+
+class SignedSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, permanent=False, issued_at=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial or {}, on_update)
+        self.sid = sid
+        self.permanent = permanent
+        self.issued_at = issued_at  # None until a cookie has been issued
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class SignedSessionInterface(SessionInterface):
+    salt = 'smartrecruiter-session'
+
+    def __init__(self, app):
+        self.app = app
+        self.permanent = app.config.get('SESSION_PERMANENT', False)
+        self.cookie_name = app.config.get('SESSION_COOKIE_NAME', 'session')
+        self.cookie_path = app.config.get('SESSION_COOKIE_PATH', '/')
+        self.cookie_domain = app.config.get('SESSION_COOKIE_DOMAIN', None)
+        self.cookie_secure = app.config.get('SESSION_COOKIE_SECURE', True)
+        self.cookie_httponly = app.config.get('SESSION_COOKIE_HTTPONLY', True)
+        self.cookie_samesite = app.config.get('SESSION_COOKIE_SAMESITE', 'None')
+        self.max_age = app.config.get('SESSION_MAX_AGE', timedelta(days=31))
+        self.refresh_interval = app.config.get('SESSION_REFRESH_INTERVAL', 300)
+
+    def _serializer(self, app):
+        return URLSafeTimedSerializer(app.secret_key, salt=self.salt)
+
+    def _lifetime(self, permanent: bool) -> timedelta:
+        return self.max_age if permanent else timedelta(days=1)
+
+    def open_session(self, app, request):
+        token = request.cookies.get(self.cookie_name)
+        if not token:
+            return SignedSession(sid=self._generate_sid(), permanent=self.permanent)
+        lifetime = self._lifetime(self.permanent)
+        try:
+            payload, issued_at = self._serializer(app).loads(
+                token, max_age=lifetime.total_seconds(), return_timestamp=True
+            )
+        except BadSignature:
+            # Also covers expired signatures and cookies from the database backend
+            return SignedSession(sid=self._generate_sid(), permanent=self.permanent)
+        sid = payload.get('sid') if isinstance(payload, dict) else None
+        if not sid or get_session_denylist(app).is_revoked(sid):
+            return SignedSession(sid=self._generate_sid(), permanent=self.permanent)
+        issued_at = issued_at.replace(tzinfo=None)
+        return SignedSession(payload.get('data') or {}, sid=sid, permanent=self.permanent,
+                             issued_at=issued_at, expires_at=issued_at + lifetime)
+
+    def save_session(self, app, session, response):
+        if not self.should_set_cookie(app, session):
+            return
+
+        # A cleared session (logout) loses its cookie; ``end_session`` has revoked its id
+        if not session:
+            response.delete_cookie(self.cookie_name, path=self.cookie_path, domain=self.cookie_domain,
+                                   secure=self.cookie_secure, httponly=self.cookie_httponly,
+                                   samesite=self.cookie_samesite)
+            return
+
+        # Unchanged sessions are only re-signed once their cookie is older than the refresh interval
+        if not session.modified and session.issued_at is not None and \
+                datetime.utcnow() - session.issued_at < timedelta(seconds=self.refresh_interval):
+            return
+
+        expiry = datetime.utcnow() + self._lifetime(session.permanent)
+        token = self._serializer(app).dumps({'sid': session.sid, 'data': dict(session)})
+        response.set_cookie(
+            self.cookie_name,
+            token,
+            max_age=self.max_age.total_seconds() if session.permanent else None,
+            expires=expiry if session.permanent else None,
+            path=self.cookie_path,
+            domain=self.cookie_domain,
+            secure=self.cookie_secure,
+            httponly=self.cookie_httponly,
+            samesite=self.cookie_samesite
+        )
+
+    def end_session(self, session):
+        """Revoke the session's id so a copy of its cookie stops working; leaves committing to the caller."""
+        if session.issued_at is not None:
+            get_session_denylist(self.app).revoke(session.sid, session.expires_at)
+
+    def _generate_sid(self):
+        return uuid.uuid4().hex
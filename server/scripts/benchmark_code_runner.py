@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark submission latency for /run-code with and without the sandbox pool
+
+Runs the same JavaScript and Python submissions through the per-case cold
+runner (one interpreter per test case) and the warm worker pool, and prints
+median / p95 latency per submission.
+
+Usage:
+    python scripts/benchmark_code_runner.py [test_cases] [submissions]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.sandbox import ColdRunner, WorkerPool
+
+JS_SUBMISSION = """
+const n = parseInt(readline());
+console.log(n * 2);
+"""
+
+PY_SUBMISSION = """def solution(n):
+    return n * 2
+if __name__ == '__main__':
+    import sys
+    import ast
+    inputs = sys.stdin.read().strip().split('\\n')
+    n = ast.literal_eval(inputs[0])
+    print(solution(n))
+"""
+
+
+def measure(runner, language: str, source: str, inputs, submissions: int):
+    """Return per-submission latencies in milliseconds."""
+    latencies = []
+    for _ in range(submissions):
+        started = time.perf_counter()
+        results = runner.run(language, source, inputs)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert len(results) == len(inputs), results
+    return latencies
+
+
+def report(label: str, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"  {label:<6} median {statistics.median(ordered):8.1f}ms   p95 {p95:8.1f}ms")
+
+
+def main():
+    test_cases = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    submissions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    inputs = [str(i) for i in range(test_cases)]
+
+    pool = WorkerPool(size=1)
+    pool.warm()
+    cold = ColdRunner()
+    try:
+        print(f"{test_cases} test cases per submission, {submissions} submissions")
+        for language, source in (('javascript', JS_SUBMISSION), ('python', PY_SUBMISSION)):
+            print(f"{language}:")
+            report('cold', measure(cold, language, source, inputs, submissions))
+            report('pool', measure(pool, language, source, inputs, submissions))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
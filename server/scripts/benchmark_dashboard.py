@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recruiter dashboard against a large attempt history
+
+Seeds an in-memory database with one recruiter, a pool of candidates and
+100k assessment attempts (plus a few thousand interviews), then compares the
+previous dashboard implementation, which loaded every attempt and interview
+and looked up each listed candidate separately, with the current one that
+reads the materialized stats and runs bounded, joined queries.
+
+Usage:
+    python scripts/benchmark_dashboard.py [attempts] [requests]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.config import TestingConfig
+from app.dashboard_stats import rebuild, recent_candidate_activity, recruiter_dashboard_stats, upcoming_interviews
+from app.models import (
+    db, Assessment, AssessmentAttempt, Category, Interview, IntervieweeProfile, User,
+)
+
+CANDIDATES = 2000
+ASSESSMENTS = 40
+INTERVIEWS = 5000
+
+
+def seed(attempts: int) -> int:
+    """Populate the database and return the recruiter's id."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    recruiter = User(email='recruiter@example.com', password_hash='x', role='recruiter')
+    db.session.add(recruiter)
+    db.session.flush()
+    categories = [Category(name=f'Category {n}', recruiter_id=recruiter.id) for n in range(4)]
+    db.session.add_all(categories)
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {'email': f'candidate{n}@example.com', 'password_hash': 'x', 'role': 'interviewee'}
+        for n in range(CANDIDATES)
+    ])
+    candidate_ids = [u.id for u in User.query.filter_by(role='interviewee')]
+    db.session.execute(insert(IntervieweeProfile), [
+        {'user_id': user_id, 'first_name': 'Cand', 'last_name': str(user_id)} for user_id in candidate_ids
+    ])
+    db.session.execute(insert(Assessment), [
+        {'recruiter_id': recruiter.id, 'category_id': categories[n % len(categories)].id, 'title': f'Assessment {n}',
+         'type': 'coding', 'difficulty': 'easy', 'duration': 30, 'passing_score': 60, 'status': 'active',
+         'created_at': now - timedelta(days=n)}
+        for n in range(ASSESSMENTS)
+    ])
+    assessment_ids = [a.id for a in Assessment.query.filter_by(recruiter_id=recruiter.id)]
+    rows = []
+    for _ in range(attempts):
+        completed = rng.random() < 0.7
+        rows.append({
+            'interviewee_id': rng.choice(candidate_ids),
+            'assessment_id': rng.choice(assessment_ids),
+            'status': 'completed' if completed else 'in_progress',
+            'score': rng.uniform(0, 100) if completed else None,
+            'started_at': now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+        })
+    db.session.execute(insert(AssessmentAttempt), rows)
+    db.session.execute(insert(Interview), [
+        {'recruiter_id': recruiter.id, 'interviewee_id': rng.choice(candidate_ids), 'position': 'Developer',
+         'type': 'technical', 'duration': 30, 'status': rng.choice(['scheduled', 'completed', 'cancelled']),
+         'scheduled_at': datetime.now() + timedelta(hours=rng.randrange(-24 * 180, 24 * 180))}
+        for _ in range(INTERVIEWS)
+    ])
+    # Bulk inserts bypass the flush hooks, so materialize the stats once
+    rebuild(db.session.connection())
+    db.session.commit()
+    return recruiter.id
+
+
+def legacy_dashboard(user_id: int):
+    """The dashboard body as it was computed before the stats tables and bounded queries."""
+    assessments = Assessment.query.filter_by(recruiter_id=user_id).all()
+    assessment_attempts = AssessmentAttempt.query.join(Assessment).filter(Assessment.recruiter_id == user_id).all()
+    interviews = Interview.query.filter_by(recruiter_id=user_id).all()
+    total_candidates = len({a.interviewee_id for a in assessment_attempts})
+    completed = len([a for a in assessment_attempts if a.status == 'completed'])
+    scores = [a.score for a in assessment_attempts if a.score is not None]
+    recent = []
+    for attempt in sorted(assessment_attempts, key=lambda x: x.started_at, reverse=True)[:5]:
+        interviewee = User.query.get(attempt.interviewee_id)
+        profile = IntervieweeProfile.query.filter_by(user_id=attempt.interviewee_id).first()
+        if interviewee and profile:
+            recent.append((attempt.id, attempt.assessment.title, interviewee.email, profile.last_name))
+    today = datetime.now()
+    upcoming = []
+    for interview in interviews:
+        if interview.status == 'scheduled' and today <= interview.scheduled_at <= today + timedelta(days=7):
+            interviewee = User.query.get(interview.interviewee_id)
+            profile = IntervieweeProfile.query.filter_by(user_id=interview.interviewee_id).first()
+            if interviewee and profile:
+                upcoming.append((interview.scheduled_at, profile.last_name))
+    upcoming.sort()
+    performance = []
+    for category in Category.query.filter_by(recruiter_id=user_id).all():
+        category_attempts = [a for a in assessment_attempts if a.assessment.category_id == category.id]
+        performance.append((category.name, len(category_attempts)))
+    return total_candidates, completed, sum(scores), recent, upcoming[:3], performance
+
+
+def current_dashboard(user_id: int):
+    return recruiter_dashboard_stats(user_id), recent_candidate_activity(user_id), upcoming_interviews(user_id)
+
+
+def measure(fn, user_id: int, requests: int):
+    """Return per-request latencies in milliseconds, each with a cold identity map."""
+    latencies = []
+    for _ in range(requests):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn(user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label: str, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"  {label:<8} median {statistics.median(ordered):9.1f}ms   p95 {p95:9.1f}ms")
+
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        user_id = seed(attempts)
+        print(f"Seeded {attempts} attempts, {CANDIDATES} candidates, {INTERVIEWS} interviews "
+              f"in {time.perf_counter() - started:.1f}s")
+        print(f"GET /dashboard/recruiter body, {requests} requests:")
+        report('legacy', measure(legacy_dashboard, user_id, requests))
+        report('current', measure(current_dashboard, user_id, requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import time
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.evaluation import EvaluationRequest, GradingCache, evaluate, parse_test_cases, run_single
+from app.evaluation.cache import cache_key
+from app.sandbox import ColdRunner, WorkerPool
+
+PY_DOUBLE = 'def solution(n):\n    return n * 2\n'
+
+
+@pytest.fixture
+def runner():
+    pool = WorkerPool(size=1, timeout=2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def wide_runner():
+    pool = WorkerPool(size=3, timeout=2, max_concurrency=3)
+    yield pool
+    pool.shutdown()
+
+
+def double_cases(count, wrong_at=()):
+    return parse_test_cases([
+        {'input': str(i), 'expectedOutput': str(i * 2 + (1 if i in wrong_at else 0))}
+        for i in range(count)
+    ])
+
+
+class TestEvaluationEngine:
+    """Test cases for the shared code evaluation engine."""
+
+    def test_parse_test_cases_from_json_text(self):
+        cases = parse_test_cases('[{"input": "1", "expectedOutput": "2"}, "junk"]')
+        assert [(c.input, c.expected) for c in cases] == [('1', '2')]
+        assert parse_test_cases('not json') == []
+        assert parse_test_cases(None) == []
+
+    def test_evaluate_scores_python(self, runner):
+        request = EvaluationRequest(
+            code=PY_DOUBLE,
+            language='python',
+            test_cases=parse_test_cases([
+                {'input': '1', 'expectedOutput': '2'},
+                {'input': '2', 'expectedOutput': '5'},
+            ]),
+        )
+        result = evaluate(request, runner)
+        assert result.passed_count == 1
+        assert result.score(2) == 0.5
+        assert result.results_as_dicts()[0]['runtime_error'] is False
+
+    def test_evaluate_python_compile_error(self, runner):
+        request = EvaluationRequest(code='def solution(n):\n    return (', language='python',
+                                    test_cases=parse_test_cases([{'input': '1', 'expectedOutput': '1'}]))
+        result = evaluate(request, runner)
+        assert result.compile_error is True
+        assert result.to_dict()['compile_error'] is True
+        # str() of the SyntaxError, as the compile check always reported it
+        assert result.error.endswith('(main.py, line 2)')
+        assert 'Traceback' not in result.error and 'SyntaxError' not in result.error
+
+    def test_cold_runner_reports_compile_error(self):
+        request = EvaluationRequest(code='def solution(n)\n    return n', language='python',
+                                    test_cases=parse_test_cases([{'input': '1', 'expectedOutput': '1'}]))
+        result = evaluate(request, ColdRunner(timeout=2))
+        assert result.compile_error is True
+
+    def test_evaluate_unsupported_language(self, runner):
+        request = EvaluationRequest(code='x', language='cobol',
+                                    test_cases=parse_test_cases([{'input': '1', 'expectedOutput': '1'}]))
+        result = evaluate(request, runner)
+        assert result.error == 'Unsupported language'
+        assert result.passed_count == 0
+
+    def test_run_single_echoes_wrapped_python(self, runner):
+        run = run_single(PY_DOUBLE, 'python', '21', runner)
+        assert run.output == '42'
+        assert "if __name__ == '__main__':" in run.to_dict()['code']
+
+    def test_default_runner_comes_from_app_config(self):
+        app = create_app(TestingConfig)
+        with app.app_context():
+            request = EvaluationRequest(code=PY_DOUBLE, language='python',
+                                        test_cases=parse_test_cases([{'input': '3', 'expectedOutput': '6'}]))
+            assert evaluate(request).passed_count == 1
+
+    def test_parallel_matches_sequential(self, runner, wide_runner):
+        cases = double_cases(7, wrong_at=(4,))
+        sequential = evaluate(EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=cases), runner)
+        parallel = evaluate(EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=cases, parallelism=3),
+                            wide_runner)
+        assert [r.passed for r in parallel.test_case_results] == [r.passed for r in sequential.test_case_results]
+        assert [r.input for r in parallel.test_case_results] == [c.input for c in cases]
+
+    def test_results_record_timing(self, runner):
+        result = evaluate(EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(2)), runner)
+        for case in result.results_as_dicts():
+            assert case['wall_ms'] > 0
+            assert case['cpu_ms'] >= 0
+            assert case['skipped'] is False
+
+    def test_fail_fast_skips_remaining_cases(self, runner):
+        request = EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(5, wrong_at=(1,)),
+                                    fail_fast=True)
+        result = evaluate(request, runner)
+        assert [r.passed for r in result.test_case_results] == [True, False, False, False, False]
+        assert [r.skipped for r in result.test_case_results] == [False, False, True, True, True]
+
+    def test_parallel_timeout_reports_timeout(self, wide_runner):
+        code = 'def solution(n):\n    while n == 3:\n        pass\n    return n * 2\n'
+        request = EvaluationRequest(code=code, language='python', test_cases=double_cases(6), parallelism=3,
+                                    timeout=0.3)
+        result = evaluate(request, wide_runner)
+        assert result.timeout is True
+        assert result.to_dict()['timeout'] is True
+
+
+    @pytest.mark.parametrize('parallelism', [1, 3])
+    def test_cases_after_a_timeout_are_still_graded(self, runner, wide_runner, parallelism):
+        code = 'def solution(n):\n    while n == 1:\n        pass\n    return n * 2\n'
+        request = EvaluationRequest(code=code, language='python', test_cases=double_cases(6, wrong_at=(4,)),
+                                    parallelism=parallelism, timeout=0.3, continue_after_timeout=True)
+        result = evaluate(request, wide_runner if parallelism > 1 else runner)
+        assert result.timeout is True
+        assert len(result.test_case_results) == 6
+        assert [r.passed for r in result.test_case_results] == [True, False, True, True, False, True]
+        assert result.test_case_results[1].timed_out
+        assert result.score(6) == 4 / 6
+
+class CountingRunner:
+    """Wraps a runner and counts how many batches reach the sandbox."""
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.calls = 0
+
+    def run(self, *args, **kwargs):
+        self.calls += 1
+        return self.runner.run(*args, **kwargs)
+
+
+class TestGradingCache:
+    """Test cases for the content-addressed grading result cache."""
+
+    def test_identical_submission_is_served_from_cache(self, runner):
+        cache = GradingCache()
+        counting = CountingRunner(runner)
+        first = evaluate(EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(3)),
+                         counting, cache)
+        # CRLF line endings do not change the key
+        resubmitted = PY_DOUBLE.replace('\n', '\r\n')
+        second = evaluate(EvaluationRequest(code=resubmitted, language='python', test_cases=double_cases(3)),
+                          counting, cache)
+        assert counting.calls == 1
+        assert second.results_as_dicts() == first.results_as_dicts()
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_key_covers_language_and_test_suite(self):
+        base = EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(2))
+        assert cache_key(base) != cache_key(EvaluationRequest(code=PY_DOUBLE, language='javascript',
+                                                              test_cases=double_cases(2)))
+        assert cache_key(base) != cache_key(EvaluationRequest(code=PY_DOUBLE, language='python',
+                                                              test_cases=double_cases(2, wrong_at=(1,))))
+
+    def test_key_keeps_whitespace_inside_the_code(self):
+        def key(code):
+            return cache_key(EvaluationRequest(code=code, language='python', test_cases=double_cases(1)))
+        # Trailing spaces inside a triple-quoted string are printed
+        assert key('print("""a  \nb""")\n') != key('print("""a\nb""")\n')
+        assert key('print("""a  \r\nb""")\n') == key('print("""a  \nb""")\n')
+
+    def test_lru_eviction_and_ttl(self, runner):
+        cache = GradingCache(max_entries=1, ttl=60)
+        a = EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(1))
+        b = EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(2))
+        cache.put(a, evaluate(a, runner))
+        cache.put(b, evaluate(b, runner))
+        assert cache.get(a) is None
+        assert cache.get(b) is not None
+        assert cache.stats()['evictions'] == 1
+        cache.ttl = 0
+        time.sleep(0.01)
+        assert cache.get(b) is None
+
+    def test_disk_tier_survives_a_new_cache(self, runner, tmp_path):
+        request = EvaluationRequest(code=PY_DOUBLE, language='python', test_cases=double_cases(2))
+        GradingCache(directory=str(tmp_path)).put(request, evaluate(request, runner))
+        fresh = GradingCache(directory=str(tmp_path))
+        assert fresh.get(request).passed_count == 2
+        assert fresh.stats()['disk_hits'] == 1
+
+    def test_timeouts_are_not_cached(self, runner):
+        cache = GradingCache()
+        request = EvaluationRequest(code='def solution(n):\n    while True:\n        pass\n', language='python',
+                                    test_cases=double_cases(1), timeout=0.2)
+        assert evaluate(request, runner, cache).timeout is True
+        assert cache.stats()['entries'] == 0
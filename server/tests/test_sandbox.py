@@ -0,0 +1,188 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.sandbox import CRASH_MESSAGE, ColdRunner, WorkerPool, python_worker
+
+requires_node = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+JS_DOUBLE = "const n = parseInt(readline());\nconsole.log(n * 2);\n"
+PY_DOUBLE = "import sys\nprint(int(sys.stdin.read()) * 2)\n"
+
+
+@pytest.fixture
+def pool():
+    """A single-worker pool, shut down after each test."""
+    pool = WorkerPool(size=1, max_jobs=3, timeout=2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def client():
+    app = create_app(TestingConfig)
+    return app.test_client()
+
+
+class TestWorkerPool:
+    """Test cases for the warm sandbox worker pool."""
+
+    @requires_node
+    def test_javascript_batch(self, pool):
+        results = pool.run('javascript', JS_DOUBLE, ['1', '2', '3'])
+        assert [r['stdout'].strip() for r in results] == ['2', '4', '6']
+        assert not any(r['timed_out'] for r in results)
+
+    def test_python_batch(self, pool):
+        results = pool.run('python', PY_DOUBLE, ['4', '5'])
+        assert [r['stdout'].strip() for r in results] == ['8', '10']
+
+    def test_cases_do_not_share_state(self, pool):
+        source = "try:\n    seen.append(1)\nexcept NameError:\n    seen = [1]\nprint(len(seen))\n"
+        results = pool.run('python', source, ['', '', ''])
+        assert [r['stdout'].strip() for r in results] == ['1', '1', '1']
+
+    def test_runtime_error_goes_to_stderr(self, pool):
+        results = pool.run('python', "raise ValueError('boom')", [''])
+        assert 'ValueError: boom' in results[0]['stderr']
+
+    def test_timeout_stops_batch(self, pool):
+        results = pool.run('python', "while True:\n    pass\n", ['', ''], timeout=0.3)
+        assert len(results) == 1
+        assert results[0]['timed_out'] is True
+        # The worker is still usable afterwards
+        assert pool.run('python', PY_DOUBLE, ['1'])[0]['stdout'].strip() == '2'
+
+    def test_crashed_worker_is_replaced(self, pool):
+        pool.warm(['python'])
+        worker = pool._idle['python'].get()
+        worker.process.kill()
+        worker.process.wait()
+        pool._idle['python'].put(worker)
+        assert pool.run('python', PY_DOUBLE, ['3'])[0]['stdout'].strip() == '6'
+        assert pool._spawned['python'] == 1
+
+    def test_exiting_submission_keeps_worker(self, pool):
+        results = pool.run('python', "import os\nprint('partial', flush=True)\nos._exit(1)\n", [''])
+        assert results[0]['stdout'] == 'partial\n'
+        assert pool.run('python', PY_DOUBLE, ['3'])[0]['stdout'].strip() == '6'
+
+    def test_changes_do_not_leak_between_submissions(self, pool):
+        tamper = (
+            "import builtins, sys\n"
+            "builtins.print = lambda *args, **kwargs: None\n"
+            "builtins.int = lambda value: 0\n"
+            "sys.modules['json'] = None\n"
+        )
+        pool.run('python', tamper, [''])
+        source = "import json\n" + PY_DOUBLE
+        assert pool.run('python', source, ['5'])[0]['stdout'].strip() == '10'
+
+    def test_submission_cannot_reach_protocol_pipes(self, pool):
+        forge = "import os\nfor fd in range(3, 10):\n    try:\n        os.write(fd, b'{\"results\": []}\\n')\n    except OSError:\n        pass\n"
+        assert len(pool.run('python', forge, [''])) == 1
+        assert pool.run('python', PY_DOUBLE, ['2'])[0]['stdout'].strip() == '4'
+
+    @requires_node
+    def test_javascript_has_no_real_require(self, pool):
+        source = "try { require('process'); } catch (e) { console.log(e.code); }\nconsole.log(typeof require('util').format);"
+        assert pool.run('javascript', source, [''])[0]['stdout'].split() == ['MODULE_NOT_FOUND', 'function']
+
+    @requires_node
+    def test_forged_reply_replaces_worker(self, pool):
+        escape = "console.log.constructor('return process')().stdout.write('{\"results\": []}\\n');"
+        results = pool.run('javascript', escape, ['', ''])
+        assert [r['stderr'] for r in results] == [CRASH_MESSAGE, CRASH_MESSAGE]
+        assert pool.run('javascript', JS_DOUBLE, ['4'])[0]['stdout'].strip() == '8'
+
+    @requires_node
+    def test_javascript_worker_is_replaced_after_each_job(self, pool):
+        pool.run('javascript', JS_DOUBLE, ['1'])
+        worker = pool._idle['javascript'].get()
+        assert worker.jobs == 0
+        assert pool._spawned['javascript'] == 1
+        pool._idle['javascript'].put(worker)
+
+    def test_worker_recycled_after_max_jobs(self, pool):
+        for _ in range(pool.max_jobs + 1):
+            assert pool.run('python', PY_DOUBLE, ['1'])[0]['stdout'].strip() == '2'
+        assert pool._spawned['python'] == 1
+
+    def test_concurrency_cap_serialises_batches(self):
+        capped = WorkerPool(size=2, timeout=2, max_concurrency=1)
+        try:
+            source = "import time\ntime.sleep(0.2)\n"
+            threads = [threading.Thread(target=capped.run, args=('python', source, [''])) for _ in range(2)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert time.perf_counter() - started >= 0.4
+        finally:
+            capped.shutdown()
+
+    def test_results_include_cpu_time(self, pool):
+        result = pool.run('python', "sum(range(200000))", [''])[0]
+        assert result['cpu_ms'] > 0
+
+    def test_source_is_compiled_once(self):
+        source = "print(input())\n"
+        code, error = python_worker.compile_source(source)
+        assert error is None
+        assert python_worker.compile_source(source)[0] is code
+
+    def test_compile_error_is_flagged(self, pool):
+        source = "def broken(:\n"
+        results = pool.run('python', source, ['', ''])
+        assert all(r['compile_error'] for r in results)
+        with pytest.raises(SyntaxError) as exc:
+            compile(source, 'main.py', 'exec')
+        assert results[0]['stderr'] == str(exc.value)
+
+    def test_cold_runner_matches_pool(self, pool):
+        cold = ColdRunner(timeout=5)
+        assert cold.run('python', PY_DOUBLE, ['7'])[0]['stdout'] == pool.run('python', PY_DOUBLE, ['7'])[0]['stdout']
+
+
+class TestRunCodeRoute:
+    """Test cases for /run-code backed by the sandbox pool."""
+
+    @requires_node
+    def test_run_javascript_test_cases(self, client):
+        response = client.post('/run-code', json={
+            'code': JS_DOUBLE,
+            'language': 'javascript',
+            'test_cases': [
+                {'input': '1', 'expectedOutput': '2'},
+                {'input': '2', 'expectedOutput': '5'},
+            ],
+        })
+        assert response.status_code == 200
+        results = response.json['test_case_results']
+        assert [r['passed'] for r in results] == [True, False]
+        assert response.json['timeout'] is False
+
+    def test_run_python_test_cases(self, client):
+        response = client.post('/run-code', json={
+            'code': 'def solution(n):\n    return n * 2\n',
+            'language': 'python',
+            'test_cases': [
+                {'input': '3', 'expectedOutput': '6'},
+                {'input': '4', 'expectedOutput': '8'},
+            ],
+        })
+        assert response.status_code == 200
+        assert all(r['passed'] for r in response.json['test_case_results'])
+
+    def test_run_python_timeout(self, client):
+        response = client.post('/run-code', json={
+            'code': 'def solution(n):\n    while True:\n        pass\n',
+            'language': 'python',
+            'test_cases': [{'input': '1', 'expectedOutput': '1'}],
+        })
+        assert response.json['timeout'] is True